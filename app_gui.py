@@ -6,16 +6,35 @@ Gradio-based web interface for audio enhancement and noise removal
 
 import os
 import sys
+import json
+import atexit
+import time
+import struct
+import hashlib
+import functools
+import itertools
+import threading
+import collections
 import subprocess
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+import numpy as np
 import gradio as gr
 
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+sys.path.insert(0, str(Path(__file__).parent.resolve() / "scripts"))
+from audio_handoff import HANDOFF_SUFFIX, handoff_to_wav
+
 # ===== Mode Definitions =====
 # Each mode contains: display_name, models_used, description, best_for, speed
 PROCESSING_MODES = {
@@ -254,9 +273,317 @@ DEMUCS_VENV = find_demucs_venv()
 SPLEETER_VENV = find_spleeter_venv()
 
 
+# ===== Persistent Model Workers =====
+# Each backend runs in a long-lived worker process (scripts/model_worker.py) inside
+# its own venv, so torch imports and weight loading are paid once per backend
+# instead of once per processed file.
+
+WORKER_SCRIPT = SCRIPT_DIR / "scripts" / "model_worker.py"
+
+# backend -> python interpreter, directory of its run_*.py script, working directory
+WORKER_BACKENDS = {
+    "denoiser": {
+        "python": CLEARSOUND_DIR / "venv" / "bin" / "python",
+        "script_dir": CLEARSOUND_DIR,
+        "cwd": CLEARSOUND_DIR,
+    },
+    "voicefixer": {
+        "python": VOICEFIXER_DIR / "venv" / "bin" / "python",
+        "script_dir": VOICEFIXER_DIR,
+        "cwd": VOICEFIXER_DIR,
+    },
+    "resemble_enhance": {
+        "python": SCRIPT_DIR / "venv" / "bin" / "python",
+        "script_dir": SCRIPT_DIR / "scripts",
+        "cwd": SCRIPT_DIR,
+    },
+    "mp_senet": {
+        "python": SCRIPT_DIR / "venv" / "bin" / "python",
+        "script_dir": SCRIPT_DIR / "scripts",
+        "cwd": SCRIPT_DIR,
+    },
+    "mossformer2": {
+        "python": SCRIPT_DIR / "venv" / "bin" / "python",
+        "script_dir": SCRIPT_DIR / "scripts",
+        "cwd": SCRIPT_DIR,
+    },
+}
+
+if DEMUCS_VENV:
+    # The backend's DemucsEngine (audioknife-tauri/python-backend/processors/demucs_engine.py)
+    # on the Demucs venv, keeping htdemucs loaded between files
+    WORKER_BACKENDS["demucs"] = {
+        "python": DEMUCS_VENV / "bin" / "python",
+        "script_dir": SCRIPT_DIR / "audioknife-tauri" / "python-backend" / "processors",
+        "cwd": SCRIPT_DIR,
+    }
+
+if SPLEETER_VENV:
+    # scripts/run_spleeter.py on the Spleeter venv; decode/encode threads per batch come from
+    # AUDIOKNIFE_SPLEETER_DECODE_THREADS / AUDIOKNIFE_SPLEETER_ENCODE_THREADS (default 2)
+    WORKER_BACKENDS["spleeter"] = {
+        "python": SPLEETER_VENV / "bin" / "python",
+        "script_dir": SCRIPT_DIR / "scripts",
+        "cwd": SCRIPT_DIR,
+    }
+
+
+class ModelWorker:
+    """Long-lived backend process that keeps one model resident between jobs"""
+
+    def __init__(self, backend, python_path, script_dir, cwd):
+        self.backend = backend
+        self.python_path = Path(python_path)
+        self.script_dir = Path(script_dir)
+        self.cwd = Path(cwd)
+        self.load_time = None
+        self.startup_time = None
+        self.jobs_done = 0
+        self._process = None
+        self._stderr_tail = collections.deque(maxlen=50)
+        self._lock = threading.Lock()
+        self._job_counter = itertools.count(1)
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def stderr_tail(self):
+        """Return the last lines the worker printed to stderr"""
+        return "".join(self._stderr_tail)
+
+    def _drain_stderr(self, stream):
+        # Backend scripts log heavily; keep the pipe drained so the worker never blocks
+        for line in stream:
+            self._stderr_tail.append(line)
+
+    def start(self):
+        """
+        Start the worker process and wait until its model is loaded
+
+        Sets load_time (model load, as reported by the worker) and startup_time
+        (spawn to ready message, timed here before any job is sent).
+        """
+        self._stderr_tail.clear()
+        started = time.time()
+        self._process = subprocess.Popen(
+            [str(self.python_path), str(WORKER_SCRIPT), self.backend, "--script-dir", str(self.script_dir)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            cwd=str(self.cwd)
+        )
+        threading.Thread(target=self._drain_stderr, args=(self._process.stderr,), daemon=True).start()
+
+        message = self._read_message()
+        if message is None or not message.get("ready"):
+            error = (message or {}).get("error") or self.stderr_tail()[-300:]
+            self.stop()
+            raise RuntimeError(f"{self.backend} worker failed to start: {error}")
+        self.startup_time = time.time() - started
+        self.load_time = message.get("load_time")
+
+    def ensure_started(self):
+        """Start the worker if it is not running (safe to call while jobs are in flight)"""
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+
+    def _read_message(self):
+        line = self._process.stdout.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def submit(self, input_file, output_file, on_progress=None, **options):
+        """
+        Run one job on the worker, starting it first if needed
+
+        Args:
+            on_progress: Optional callback receiving the worker's progress dicts
+                (stage, processed_seconds, total_seconds, rtf, eta)
+
+        Returns:
+            tuple: (success, error_detail)
+        """
+        message = self._request(
+            {"input": str(input_file), "output": str(output_file), "options": options},
+            on_progress
+        )
+        if message is None:
+            return False, f"{self.backend} worker exited unexpectedly: {self.stderr_tail()}"
+
+        self.jobs_done += 1
+        if message.get("ok"):
+            return True, ""
+        return False, message.get("error") or self.stderr_tail()
+
+    def submit_batch(self, jobs):
+        """
+        Run several jobs back to back on the same loaded model
+
+        Args:
+            jobs: List of (input_file, output_file, options_dict)
+
+        Returns:
+            list: (success, error_detail) per job, in input order
+        """
+        message = self._request({
+            "jobs": [
+                {"input": str(input_file), "output": str(output_file), "options": options}
+                for input_file, output_file, options in jobs
+            ]
+        })
+        if message is None:
+            error = f"{self.backend} worker exited unexpectedly: {self.stderr_tail()}"
+            return [(False, error)] * len(jobs)
+
+        self.jobs_done += len(jobs)
+        return [
+            (True, "") if result.get("ok") else (False, result.get("error") or self.stderr_tail())
+            for result in message.get("results", [])
+        ]
+
+    def _request(self, payload, on_progress=None):
+        """Send one request and wait for its response (None if the worker died)"""
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+
+            payload["id"] = f"{self.backend}-{next(self._job_counter)}"
+            try:
+                self._process.stdin.write(json.dumps(payload, ensure_ascii=False) + "\n")
+                self._process.stdin.flush()
+                message = self._read_message()
+                # Progress reports arrive before the final response
+                while message is not None and "progress" in message:
+                    if on_progress:
+                        on_progress(message["progress"])
+                    message = self._read_message()
+            except (OSError, ValueError):
+                message = None
+
+            if message is None:
+                # The worker died mid-job; it will be restarted on the next request
+                self.stop()
+            return message
+
+    def stop(self):
+        """Ask the worker to exit, killing it if it does not respond"""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            if process.poll() is None:
+                process.stdin.write(json.dumps({"command": "shutdown"}) + "\n")
+                process.stdin.flush()
+                process.wait(timeout=5)
+        except Exception:
+            process.kill()
+
+
+WORKER_POOL = {}
+_WORKER_POOL_LOCK = threading.Lock()
+
+
+def get_worker(backend):
+    """Get (or create) the persistent worker for a backend"""
+    with _WORKER_POOL_LOCK:
+        worker = WORKER_POOL.get(backend)
+        if worker is None:
+            spec = WORKER_BACKENDS[backend]
+            worker = ModelWorker(backend, spec["python"], spec["script_dir"], spec["cwd"])
+            WORKER_POOL[backend] = worker
+        return worker
+
+
+def shutdown_workers():
+    """Stop all persistent workers"""
+    with _WORKER_POOL_LOCK:
+        workers = list(WORKER_POOL.values())
+        WORKER_POOL.clear()
+    for worker in workers:
+        worker.stop()
+
+
+atexit.register(shutdown_workers)
+
+
+# ===== Warm-up =====
+# Workers for the default models are started in the background at launch, so the
+# first request does not pay for importing torch and loading weights. The comma
+# separated AUDIOKNIFE_WARMUP_BACKENDS list selects them ("none" disables warm-up).
+
+WARMUP_BACKENDS = [
+    name.strip()
+    for name in os.environ.get("AUDIOKNIFE_WARMUP_BACKENDS", "resemble_enhance").split(",")
+    if name.strip() and name.strip().lower() != "none"
+]
+
+# backend -> {"status": pending/loading/ready/failed, "load_time": seconds, "error": str}
+WARMUP_STATE = {}
+_WARMUP_LOCK = threading.Lock()
+
+
+def _set_warmup_state(backend, **state):
+    with _WARMUP_LOCK:
+        WARMUP_STATE[backend] = state
+
+
+def get_warmup_state(backend):
+    """Return the warm-up state of a backend (None if it is not warmed up at launch)"""
+    with _WARMUP_LOCK:
+        state = WARMUP_STATE.get(backend)
+        return dict(state) if state else None
+
+
+def warmup_in_progress():
+    with _WARMUP_LOCK:
+        return any(state["status"] in ("pending", "loading") for state in WARMUP_STATE.values())
+
+
+def warm_up_workers(backends):
+    """Start the workers for the given backends one after another, recording load times"""
+    for backend in backends:
+        spec = WORKER_BACKENDS[backend]
+        if not Path(spec["python"]).exists():
+            _set_warmup_state(backend, status="failed", error=f"Python not found: {spec['python']}")
+            continue
+
+        _set_warmup_state(backend, status="loading")
+        worker = get_worker(backend)
+        try:
+            worker.ensure_started()
+        except Exception as e:
+            _set_warmup_state(backend, status="failed", error=str(e))
+            print(f"[Warm-up] {backend} failed: {e}")
+            continue
+
+        # Timed by the worker around its own start-up: ensure_started may also have
+        # waited for a job that started the worker first
+        load_time = worker.startup_time
+        _set_warmup_state(backend, status="ready", load_time=load_time)
+        print(f"[Warm-up] {backend} ready in {load_time:.1f}s")
+
+
+def start_warmup(backends=None):
+    """Warm up the default backends on a background thread"""
+    backends = [b for b in (WARMUP_BACKENDS if backends is None else backends) if b in WORKER_BACKENDS]
+    if not backends:
+        return None
+
+    for backend in backends:
+        _set_warmup_state(backend, status="pending")
+    thread = threading.Thread(target=warm_up_workers, args=(backends,), name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
 # ===== Processing Functions =====
 
-def run_denoiser(input_file, output_file):
+def run_denoiser(input_file, output_file, on_progress=None):
     """Run Facebook Denoiser for noise reduction"""
     denoiser_venv = CLEARSOUND_DIR / "venv" / "bin" / "python"
     denoiser_script = CLEARSOUND_DIR / "run_clearSound.py"
@@ -264,94 +591,117 @@ def run_denoiser(input_file, output_file):
     if not denoiser_venv.exists() or not denoiser_script.exists():
         return None, "Denoiser not found. Please install clearSound first."
     
-    cmd = [str(denoiser_venv), str(denoiser_script), str(input_file), "-o", str(output_file), "-q", "high"]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(CLEARSOUND_DIR))
-        if result.returncode == 0:
+        ok, error = get_worker("denoiser").submit(input_file, output_file, on_progress, quality="high")
+        if ok:
             return output_file, "Denoiser: OK"
         else:
-            return None, f"Denoiser failed: {result.stderr[:200]}"
+            return None, f"Denoiser failed: {error[:200]}"
     except Exception as e:
         return None, f"Denoiser error: {str(e)}"
 
 
-def run_voicefixer(input_file, output_file, mode=0):
+def run_voicefixer(input_file, output_file, mode=0, on_progress=None):
     """Run VoiceFixer for audio enhancement"""
     venv_python = VOICEFIXER_DIR / "venv" / "bin" / "python"
     
     if not venv_python.exists():
         return None, "VoiceFixer not found. Please install VoiceFixer first."
     
-    cmd = [str(venv_python), "-c", f"""
-import sys
-sys.path.insert(0, '{VOICEFIXER_DIR}')
-sys.path.insert(0, '{VOICEFIXER_DIR}/voicefixer')
-
-from voicefixer import VoiceFixer
-vf = VoiceFixer()
-vf.restore('{input_file}', '{output_file}', cuda=False, mode={mode})
-print('OK')
-"""]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(VOICEFIXER_DIR))
-        if result.returncode == 0:
+        ok, error = get_worker("voicefixer").submit(input_file, output_file, on_progress, mode=mode)
+        if ok:
             return output_file, "VoiceFixer: OK"
         else:
-            return None, f"VoiceFixer failed: {result.stderr[:200]}"
+            return None, f"VoiceFixer failed: {error[:200]}"
     except Exception as e:
         return None, f"VoiceFixer error: {str(e)}"
 
 
-def run_demucs(input_file, output_file):
-    """Run Demucs for BGM removal / vocal extraction"""
+def run_voicefixer_batch(jobs):
+    """
+    Restore many files with a single resident VoiceFixer model
+
+    Args:
+        jobs: List of (input_file, output_file, mode) tuples
+
+    Returns:
+        list: (output_file_path or None, status_message) per job
+    """
+    venv_python = VOICEFIXER_DIR / "venv" / "bin" / "python"
+
+    if not venv_python.exists():
+        return [(None, "VoiceFixer not found. Please install VoiceFixer first.")] * len(jobs)
+
+    try:
+        results = get_worker("voicefixer").submit_batch(
+            [(input_file, output_file, {"mode": mode}) for input_file, output_file, mode in jobs]
+        )
+    except Exception as e:
+        return [(None, f"VoiceFixer error: {str(e)}")] * len(jobs)
+
+    return [
+        (output_file, "VoiceFixer: OK") if ok else (None, f"VoiceFixer failed: {error[:200]}")
+        for (input_file, output_file, mode), (ok, error) in zip(jobs, results)
+    ]
+
+
+def separate_demucs(input_file, work_dir, on_progress=None, model="htdemucs"):
+    """
+    Run Demucs once and return every stem, reusing the stem cache when the input was separated before
+    
+    Args:
+        input_file: Input audio file path
+        work_dir: Scratch directory the returned stems are written or linked into
+        on_progress: Optional progress callback
+        model: Demucs model name
+    
+    Returns:
+        tuple: ({stem_name: wav_path} for vocals, drums, bass and other, status_message);
+            the dict is empty on failure
+    """
     if not DEMUCS_VENV:
-        return None, "Demucs not found. Please install Demucs first."
+        return {}, "Demucs not found. Please install Demucs first."
     
     demucs_python = DEMUCS_VENV / "bin" / "python"
     
     if not demucs_python.exists():
-        return None, f"Demucs Python not found at {demucs_python}"
-    
-    temp_output_dir = Path(output_file).parent / "demucs_temp"
-    temp_output_dir.mkdir(exist_ok=True)
-    
-    cmd = [
-        str(demucs_python), "-m", "demucs.separate",
-        "-n", "htdemucs",
-        "--two-stems=vocals",
-        "-d", "cpu",
-        "-o", str(temp_output_dir),
-        str(input_file)
-    ]
-    
+        return {}, f"Demucs Python not found at {demucs_python}"
+    
+    cache_key = STEM_CACHE.make_key(input_file, "demucs", {"model": model})
+    stems = STEM_CACHE.get_stems(cache_key, Path(work_dir) / "cached")
+    if stems:
+        return stems, "Demucs: OK (stem cache)"
+    
+    # The resident worker keeps the model loaded between files
+    stem_dir = Path(work_dir) / "separated"
+    ok, error = get_worker("demucs").submit(input_file, stem_dir, on_progress, model=model)
+    if not ok:
+        return {}, f"Demucs failed: {error[-300:]}"
+    
+    stems = {path.stem: path for path in stem_dir.glob("*.wav")}
+    if not stems:
+        return {}, "Demucs: Stem files not found"
+    STEM_CACHE.put_stems(cache_key, stems)
+    return stems, "Demucs: OK"
+
+
+def run_demucs(input_file, output_file, on_progress=None, stem="vocals"):
+    """Run Demucs for BGM removal / vocal extraction (or any other Demucs stem)"""
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            input_name = Path(input_file).stem
-            vocals_path = temp_output_dir / "htdemucs" / input_name / "vocals.wav"
-            
-            if vocals_path.exists():
-                shutil.copy(vocals_path, output_file)
-                shutil.rmtree(temp_output_dir)
-                return output_file, "Demucs: OK"
-            else:
-                return None, "Demucs: Vocals file not found"
-        else:
-            return None, f"Demucs failed: {result.stderr[-300:]}"
+        with tempfile.TemporaryDirectory() as work_dir:
+            stems, msg = separate_demucs(input_file, work_dir, on_progress)
+            if not stems:
+                return None, msg
+            if stem not in stems:
+                return None, f"Demucs: {stem} not found. Available: {', '.join(sorted(stems))}"
+            shutil.copy(stems[stem], output_file)
+            return output_file, msg
     except Exception as e:
         return None, f"Demucs error: {str(e)}"
-    finally:
-        if temp_output_dir.exists():
-            try:
-                shutil.rmtree(temp_output_dir)
-            except:
-                pass
 
 
-def run_resemble_enhance(input_file, output_file, mode="denoise"):
+def run_resemble_enhance(input_file, output_file, mode="denoise", on_progress=None):
     """Run Resemble Enhance for SE/noise removal"""
     venv_python = SCRIPT_DIR / "venv" / "bin" / "python"
     resemble_script = SCRIPT_DIR / "scripts" / "run_resemble_enhance.py"
@@ -362,83 +712,144 @@ def run_resemble_enhance(input_file, output_file, mode="denoise"):
     if not resemble_script.exists():
         return None, "Resemble Enhance script not found"
     
-    cmd = [str(venv_python), str(resemble_script), str(input_file), "-o", str(output_file), "-m", mode]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(SCRIPT_DIR))
-        if result.returncode == 0:
+        ok, error = get_worker("resemble_enhance").submit(input_file, output_file, on_progress, mode=mode)
+        if ok:
             return output_file, f"Resemble Enhance ({mode}): OK"
         else:
-            return None, f"Resemble Enhance failed: {result.stderr[-300:]}"
+            return None, f"Resemble Enhance failed: {error[-300:]}"
     except Exception as e:
         return None, f"Resemble Enhance error: {str(e)}"
 
 
-def run_spleeter(input_file, output_file, stems="2stems", extract_stem="vocals"):
+def separate_spleeter(input_file, work_dir, stems="2stems"):
     """
-    Run Spleeter for source separation
+    Run Spleeter once and return every stem, reusing the stem cache when the input was separated before
     
     Args:
         input_file: Input audio file path
-        output_file: Output audio file path
+        work_dir: Scratch directory the returned stems are written or linked into
         stems: Model type - "2stems", "4stems", or "5stems"
-        extract_stem: Which stem to extract - "vocals", "drums", "bass", "piano", "other"
     
     Returns:
-        tuple: (output_file_path, status_message)
+        tuple: ({stem_name: wav_path}, status_message); the dict is empty on failure
+    """
+    return separate_spleeter_batch([input_file], work_dir, stems)[0]
+
+
+def separate_spleeter_batch(input_files, work_dir, stems="2stems"):
+    """
+    Separate many files with the resident Spleeter worker, which loads the model once
+    and decodes/encodes in parallel with inference; cached inputs are not separated again
+    
+    Args:
+        input_files: Input audio file paths
+        work_dir: Scratch directory the returned stems are written or linked into
+        stems: Model type - "2stems", "4stems", or "5stems"
+    
+    Returns:
+        list: ({stem_name: wav_path}, status_message) per input, in order
     """
     if not SPLEETER_VENV:
-        return None, "Spleeter not found. Please install Spleeter first."
+        return [({}, "Spleeter not found. Please install Spleeter first.")] * len(input_files)
     
     spleeter_python = SPLEETER_VENV / "bin" / "python"
-    spleeter_cmd = SPLEETER_VENV / "bin" / "spleeter"
     
     if not spleeter_python.exists():
-        return None, f"Spleeter Python not found at {spleeter_python}"
+        return [({}, f"Spleeter Python not found at {spleeter_python}")] * len(input_files)
+    
+    results = [None] * len(input_files)
+    cache_keys = [STEM_CACHE.make_key(input_file, "spleeter", {"model": stems}) for input_file in input_files]
+    missing = []
+    for i, cache_key in enumerate(cache_keys):
+        cached = STEM_CACHE.get_stems(cache_key, Path(work_dir) / "cached" / str(i))
+        if cached:
+            results[i] = (cached, f"Spleeter ({stems}): OK (stem cache)")
+        else:
+            missing.append(i)
     
-    temp_output_dir = Path(output_file).parent / "spleeter_temp"
-    temp_output_dir.mkdir(exist_ok=True)
+    if missing:
+        # One output directory per input, so files with the same name do not collide
+        jobs = [(input_files[i], Path(work_dir) / str(i), {"model": stems}) for i in missing]
+        try:
+            outcomes = get_worker("spleeter").submit_batch(jobs)
+        except Exception as e:
+            outcomes = [(False, str(e))] * len(jobs)
+        
+        for i, (input_file, stem_dir, options), (ok, error) in zip(missing, jobs, outcomes):
+            separated = {path.stem: path for path in stem_dir.glob("*.wav")} if ok else {}
+            if separated:
+                STEM_CACHE.put_stems(cache_keys[i], separated)
+                results[i] = (separated, f"Spleeter ({stems}): OK")
+            elif ok:
+                results[i] = ({}, f"Spleeter: Output not found at {stem_dir}")
+            else:
+                results[i] = ({}, f"Spleeter failed: {(error or '')[-300:]}")
+    return results
+
+
+def run_spleeter(input_file, output_file, stems="2stems", extract_stem="vocals"):
+    """
+    Run Spleeter for source separation
     
-    # Build spleeter command
-    cmd = [
-        str(spleeter_cmd), "separate",
-        "-p", f"spleeter:{stems}",
-        "-o", str(temp_output_dir),
-        str(input_file)
-    ]
+    Args:
+        input_file: Input audio file path
+        output_file: Output audio file path
+        stems: Model type - "2stems", "4stems", or "5stems"
+        extract_stem: Which stem to extract - "vocals", "drums", "bass", "piano", "other"
     
+    Returns:
+        tuple: (output_file_path, status_message)
+    """
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            input_name = Path(input_file).stem
-            stem_path = temp_output_dir / input_name / f"{extract_stem}.wav"
-            
-            if stem_path.exists():
-                shutil.copy(stem_path, output_file)
-                shutil.rmtree(temp_output_dir)
-                return output_file, f"Spleeter ({stems}): OK - Extracted {extract_stem}"
-            else:
-                # Try to find what was created
-                created_dir = temp_output_dir / input_name
-                if created_dir.exists():
-                    available_stems = list(created_dir.glob("*.wav"))
-                    stems_info = ", ".join([s.stem for s in available_stems])
-                    return None, f"Spleeter: {extract_stem} not found. Available: {stems_info}"
-                return None, f"Spleeter: Output not found at {stem_path}"
-        else:
-            return None, f"Spleeter failed: {result.stderr[-300:]}"
+        with tempfile.TemporaryDirectory() as work_dir:
+            separated, msg = separate_spleeter(input_file, work_dir, stems)
+            if not separated:
+                return None, msg
+            if extract_stem not in separated:
+                stems_info = ", ".join(sorted(separated))
+                return None, f"Spleeter: {extract_stem} not found. Available: {stems_info}"
+            shutil.copy(separated[extract_stem], output_file)
+            return output_file, f"{msg} - Extracted {extract_stem}"
     except Exception as e:
         return None, f"Spleeter error: {str(e)}"
-    finally:
-        if temp_output_dir.exists():
-            try:
-                shutil.rmtree(temp_output_dir)
-            except:
-                pass
 
 
-def run_mp_senet(input_file, output_file):
+def run_spleeter_batch(jobs):
+    """
+    Extract stems from many files, separating each model's files in one batch
+    
+    Args:
+        jobs: List of (input_file, output_file, stems, extract_stem) tuples
+    
+    Returns:
+        list: (output_file_path or None, status_message) per job
+    """
+    results = [(None, "Spleeter: not run")] * len(jobs)
+    by_model = collections.OrderedDict()
+    for i, (input_file, output_file, stems, extract_stem) in enumerate(jobs):
+        by_model.setdefault(stems, []).append(i)
+    
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for stems, indices in by_model.items():
+                separations = separate_spleeter_batch([jobs[i][0] for i in indices], Path(work_dir) / stems, stems)
+                for i, (separated, msg) in zip(indices, separations):
+                    input_file, output_file, _, extract_stem = jobs[i]
+                    if not separated:
+                        results[i] = (None, msg)
+                    elif extract_stem not in separated:
+                        stems_info = ", ".join(sorted(separated))
+                        results[i] = (None, f"Spleeter: {extract_stem} not found. Available: {stems_info}")
+                    else:
+                        shutil.copy(separated[extract_stem], output_file)
+                        results[i] = (output_file, f"{msg} - Extracted {extract_stem}")
+    except Exception as e:
+        results = [result if result[0] else (None, f"Spleeter error: {str(e)}") for result in results]
+    return results
+
+
+def run_mp_senet(input_file, output_file, on_progress=None):
     """
     Run MP-SENet for high-quality speech enhancement
     
@@ -458,19 +869,17 @@ def run_mp_senet(input_file, output_file):
     if not mp_senet_script.exists():
         return None, "MP-SENet script not found"
     
-    cmd = [str(venv_python), str(mp_senet_script), str(input_file), "-o", str(output_file)]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(SCRIPT_DIR))
-        if result.returncode == 0:
+        ok, error = get_worker("mp_senet").submit(input_file, output_file, on_progress)
+        if ok:
             return output_file, "MP-SENet: OK"
         else:
-            return None, f"MP-SENet failed: {result.stderr[-300:]}"
+            return None, f"MP-SENet failed: {error[-300:]}"
     except Exception as e:
         return None, f"MP-SENet error: {str(e)}"
 
 
-def run_mossformer2(input_file, output_file, speaker_index=0):
+def run_mossformer2(input_file, output_file, speaker_index=0, on_progress=None):
     """
     Run MossFormer2 for speaker separation
     
@@ -491,74 +900,219 @@ def run_mossformer2(input_file, output_file, speaker_index=0):
     if not mossformer2_script.exists():
         return None, "MossFormer2 script not found"
     
-    cmd = [
-        str(venv_python), str(mossformer2_script), 
-        str(input_file), 
-        "-o", str(output_file),
-        "-s", str(speaker_index)
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(SCRIPT_DIR))
-        if result.returncode == 0:
+        ok, error = get_worker("mossformer2").submit(input_file, output_file, on_progress, speaker_index=speaker_index)
+        if ok:
             return output_file, f"MossFormer2: OK - Speaker {speaker_index + 1} extracted"
         else:
-            return None, f"MossFormer2 failed: {result.stderr[-300:]}"
+            return None, f"MossFormer2 failed: {error[-300:]}"
     except Exception as e:
         return None, f"MossFormer2 error: {str(e)}"
 
 
+def _read_wav_header(f):
+    """Parse a RIFF/RF64 WAVE header; returns (sample_rate, channels) or None"""
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] not in (b"RIFF", b"RF64") or riff[8:12] != b"WAVE":
+        return None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(8)
+            if len(fmt) < 8:
+                return None
+            channels, sample_rate = struct.unpack("<HI", fmt[2:8])
+            return sample_rate, channels
+        # Chunks are word aligned
+        f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def _read_flac_header(f):
+    """Parse the FLAC STREAMINFO block; returns (sample_rate, channels) or None"""
+    head = f.read(10)
+    if head[:3] == b"ID3" and len(head) == 10:
+        # Skip a leading ID3v2 tag (synchsafe size)
+        size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        f.seek(size, 1)
+        head = f.read(4)
+    else:
+        f.seek(4)
+        head = head[:4]
+    if head != b"fLaC":
+        return None
+    block = f.read(4 + 18)
+    if len(block) < 4 + 18 or (block[0] & 0x7F) != 0:
+        return None
+    info = block[4:]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    channels = ((info[12] >> 1) & 0x07) + 1
+    return sample_rate, channels
+
+
+def _read_ogg_header(f):
+    """Parse the first Ogg page (Vorbis or Opus); returns (sample_rate, channels) or None"""
+    page = f.read(27)
+    if len(page) < 27 or page[:4] != b"OggS":
+        return None
+    f.seek(page[26], 1)  # segment table
+    packet = f.read(19)
+    if packet[:7] == b"\x01vorbis" and len(packet) >= 16:
+        channels = packet[11]
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+        return sample_rate, channels
+    if packet[:8] == b"OpusHead" and len(packet) >= 10:
+        # Opus always decodes at 48 kHz
+        return 48000, packet[9]
+    return None
+
+
+AUDIO_HEADER_PARSERS = {
+    ".wav": _read_wav_header,
+    ".wave": _read_wav_header,
+    ".flac": _read_flac_header,
+    ".ogg": _read_ogg_header,
+    ".oga": _read_ogg_header,
+    ".opus": _read_ogg_header,
+}
+
+
+def _probe_with_ffprobe(input_file):
+    """Get (sample_rate, channels) from ffprobe, or None on error"""
+    cmd = [
+        "ffprobe", "-v", "quiet", "-print_format", "json",
+        "-show_streams", str(input_file)
+    ]
+    
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode == 0:
+        data = json.loads(result.stdout)
+        for stream in data.get("streams", []):
+            if stream.get("codec_type") == "audio":
+                sample_rate = int(stream.get("sample_rate", 44100))
+                channels = int(stream.get("channels", 2))
+                return sample_rate, channels
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _probe_audio_info(path, size, mtime_ns):
+    """
+    Probe one file version; memoized by (path, size, mtime)
+    
+    Raises ValueError when the file cannot be probed, so the caller's fallback
+    is never memoized and a later call probes again.
+    """
+    parser = AUDIO_HEADER_PARSERS.get(Path(path).suffix.lower())
+    if parser is not None:
+        try:
+            with open(path, "rb") as f:
+                info = parser(f)
+            if info and info[0] > 0 and info[1] > 0:
+                return info
+        except (OSError, struct.error):
+            pass
+    # Exotic containers and codecs (MP3, AAC, ...) still go through ffprobe
+    info = _probe_with_ffprobe(path)
+    if info is None:
+        raise ValueError(f"Cannot probe {path}")
+    return info
+
+
 def get_audio_info(input_file):
     """
-    Get audio file information using ffprobe
+    Get audio file information
+    
+    WAV, FLAC and OGG headers are read in-process; other formats fall back to
+    ffprobe. Successful probes are memoized by (path, size, mtime); failures are not.
     
     Args:
         input_file: Input audio file path
     
     Returns:
-        tuple: (sample_rate, channels) or (None, None) on error
+        tuple: (sample_rate, channels), (44100, 2) if the file cannot be probed
     """
-    cmd = [
-        "ffprobe", "-v", "quiet", "-print_format", "json",
-        "-show_streams", str(input_file)
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            import json
-            data = json.loads(result.stdout)
-            for stream in data.get("streams", []):
-                if stream.get("codec_type") == "audio":
-                    sample_rate = int(stream.get("sample_rate", 44100))
-                    channels = int(stream.get("channels", 2))
-                    return sample_rate, channels
-        return 44100, 2  # default values
+        path = os.path.abspath(input_file)
+        st = os.stat(path)
+        return _probe_audio_info(path, st.st_size, st.st_mtime_ns)
     except Exception:
         return 44100, 2
 
 
 # Output format configurations
 OUTPUT_FORMATS = {
-    "WAV": {"ext": ".wav", "codec": ["pcm_s16le"], "description": "Lossless, large file size"},
+    "WAV": {"ext": ".wav", "codec": ["pcm_s16le"], "native": ("WAV", "PCM_16"), "description": "Lossless, large file size"},
     "MP3 (320kbps)": {"ext": ".mp3", "codec": ["-c:a", "libmp3lame", "-b:a", "320k"], "description": "High quality compressed"},
     "MP3 (192kbps)": {"ext": ".mp3", "codec": ["-c:a", "libmp3lame", "-b:a", "192k"], "description": "Standard quality"},
     "MP3 (128kbps)": {"ext": ".mp3", "codec": ["-c:a", "libmp3lame", "-b:a", "128k"], "description": "Smaller file size"},
     "AAC (256kbps)": {"ext": ".m4a", "codec": ["-c:a", "aac", "-b:a", "256k"], "description": "Apple/iOS compatible"},
     "AAC (192kbps)": {"ext": ".m4a", "codec": ["-c:a", "aac", "-b:a", "192k"], "description": "Standard AAC"},
-    "FLAC": {"ext": ".flac", "codec": ["-c:a", "flac"], "description": "Lossless, compressed"},
+    "FLAC": {"ext": ".flac", "codec": ["-c:a", "flac"], "native": ("FLAC", None), "description": "Lossless, compressed"},
     "OGG (192kbps)": {"ext": ".ogg", "codec": ["-c:a", "libvorbis", "-b:a", "192k"], "description": "Open format"},
 }
 
 
+# Frames per block when padding lossless outputs natively
+NATIVE_PAD_BLOCK_FRAMES = 65536
+
+# Concurrent ffprobe/ffmpeg jobs in batch silence padding (default: one per core)
+PADDING_BATCH_WORKERS = int(os.environ.get("AUDIOKNIFE_PADDING_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
 def get_output_format_choices():
     """Get list of output format choices for dropdown"""
     return list(OUTPUT_FORMATS.keys())
 
 
+def _write_silence(dst, frames, channels):
+    """Write zero frames to an open SoundFile in constant memory"""
+    block = np.zeros((min(frames, NATIVE_PAD_BLOCK_FRAMES), channels), dtype=np.float32)
+    while frames > 0:
+        n = min(frames, len(block))
+        dst.write(block[:n])
+        frames -= n
+
+
+def _pad_native(input_file, output_file, pre_silence, post_silence, format_config):
+    """
+    Pad a lossless output without ffmpeg: header, zero frames, source blocks, zero frames
+    
+    Returns:
+        bool: False if soundfile is unavailable or cannot decode the input
+    """
+    if sf is None:
+        return False
+    try:
+        src = sf.SoundFile(str(input_file))
+    except Exception:
+        return False
+    
+    container, subtype = format_config["native"]
+    with src:
+        if subtype is None:
+            # FLAC keeps 24-bit sources at 24 bit, like ffmpeg's flac encoder
+            subtype = "PCM_24" if src.subtype in ("PCM_24", "PCM_32", "FLOAT", "DOUBLE") else "PCM_16"
+        sample_rate, channels = src.samplerate, src.channels
+        
+        with sf.SoundFile(str(output_file), "w", samplerate=sample_rate, channels=channels,
+                          format=container, subtype=subtype) as dst:
+            _write_silence(dst, int(round(pre_silence * sample_rate)), channels)
+            for block in src.blocks(blocksize=NATIVE_PAD_BLOCK_FRAMES, dtype="float32", always_2d=True):
+                dst.write(block)
+            _write_silence(dst, int(round(post_silence * sample_rate)), channels)
+    return True
+
+
 def add_silence_padding(input_file, output_file, pre_silence=0.0, post_silence=0.0, output_format="WAV"):
     """
-    Add silence padding before and/or after audio using ffmpeg
+    Add silence padding before and/or after audio
+    
+    WAV and FLAC outputs are written natively in blocks (no ffmpeg process) when
+    soundfile can decode the input. Lossy formats use a single ffmpeg encode with
+    the padding applied as a filter.
     
     Args:
         input_file: Input audio file path
@@ -577,57 +1131,29 @@ def add_silence_padding(input_file, output_file, pre_silence=0.0, post_silence=0
     output_path = Path(output_file)
     output_file = output_path.parent / (output_path.stem + format_config["ext"])
     
+    pre_silence = max(pre_silence, 0.0)
+    post_silence = max(post_silence, 0.0)
     if pre_silence <= 0 and post_silence <= 0:
-        # No silence to add, just convert format
-        cmd = ["ffmpeg", "-y", "-i", str(input_file)]
-        if format_config["codec"][0] != "pcm_s16le":
-            cmd.extend(format_config["codec"])
-        cmd.append(str(output_file))
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0 and Path(output_file).exists():
-                return output_file, f"Format converted to {output_format}"
-            else:
-                return None, f"ffmpeg failed: {result.stderr[-300:]}"
-        except Exception as e:
-            return None, f"Format conversion error: {str(e)}"
-    
-    # Get audio info
-    sample_rate, channels = get_audio_info(input_file)
-    channel_layout = "stereo" if channels == 2 else "mono"
+        success_msg = f"Format converted to {output_format}"
+    else:
+        success_msg = f"Silence padding added: {pre_silence}s (pre) + {post_silence}s (post) [{output_format}]"
     
     try:
-        # Build base command
-        if pre_silence > 0 and post_silence > 0:
-            # Add silence both before and after
-            cmd = [
-                "ffmpeg", "-y",
-                "-f", "lavfi", "-t", str(pre_silence),
-                "-i", f"anullsrc=r={sample_rate}:cl={channel_layout}",
-                "-i", str(input_file),
-                "-f", "lavfi", "-t", str(post_silence),
-                "-i", f"anullsrc=r={sample_rate}:cl={channel_layout}",
-                "-filter_complex", "[0:a][1:a][2:a]concat=n=3:v=0:a=1"
-            ]
-        elif pre_silence > 0:
-            # Add silence only before
-            cmd = [
-                "ffmpeg", "-y",
-                "-f", "lavfi", "-t", str(pre_silence),
-                "-i", f"anullsrc=r={sample_rate}:cl={channel_layout}",
-                "-i", str(input_file),
-                "-filter_complex", "[0:a][1:a]concat=n=2:v=0:a=1"
-            ]
-        else:
-            # Add silence only after
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", str(input_file),
-                "-f", "lavfi", "-t", str(post_silence),
-                "-i", f"anullsrc=r={sample_rate}:cl={channel_layout}",
-                "-filter_complex", "[0:a][1:a]concat=n=2:v=0:a=1"
-            ]
+        if format_config.get("native") and _pad_native(input_file, output_file, pre_silence, post_silence, format_config):
+            return output_file, success_msg
+        
+        # Single ffmpeg pass: delay (pre) and pad (post) fused into the encode
+        filters = []
+        if pre_silence > 0 or post_silence > 0:
+            sample_rate, channels = get_audio_info(input_file)
+            if pre_silence > 0:
+                filters.append(f"adelay=delays={int(round(pre_silence * sample_rate))}S:all=1")
+            if post_silence > 0:
+                filters.append(f"apad=pad_dur={post_silence}")
+        
+        cmd = ["ffmpeg", "-y", "-i", str(input_file)]
+        if filters:
+            cmd.extend(["-af", ",".join(filters)])
         
         # Add codec settings for non-WAV formats
         if format_config["codec"][0] != "pcm_s16le":
@@ -639,7 +1165,7 @@ def add_silence_padding(input_file, output_file, pre_silence=0.0, post_silence=0
         result = subprocess.run(cmd, capture_output=True, text=True)
         
         if result.returncode == 0 and Path(output_file).exists():
-            return output_file, f"Silence padding added: {pre_silence}s (pre) + {post_silence}s (post) [{output_format}]"
+            return output_file, success_msg
         else:
             return None, f"ffmpeg failed: {result.stderr[-300:]}"
     
@@ -767,46 +1293,51 @@ def process_silence_padding_batch(audio_files, pre_silence, post_silence, output
     # Create temp directory for output files
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     temp_output_dir = Path(tempfile.mkdtemp(prefix="silence_padding_"))
-    processed_files = []
+    zip_filename = f"{timestamp}__padded_audio_batch.zip"
+    zip_path = temp_output_dir / zip_filename
     success_count = 0
     fail_count = 0
+    arcnames = set()
+    
+    def pad_one(index, audio_file):
+        input_path = Path(audio_file)
+        # Per-file subdirectory so concurrent jobs never write the same path
+        file_dir = temp_output_dir / str(index)
+        file_dir.mkdir()
+        # Create output filename (extension will be set by add_silence_padding)
+        output_path = file_dir / f"{input_path.stem}_padded{output_ext}"
+        result, msg = add_silence_padding(input_path, output_path, pre_sec, post_sec, output_format)
+        return index, input_path, result, msg
     
     try:
-        for i, audio_file in enumerate(audio_files):
-            input_path = Path(audio_file)
-            progress((i + 0.5) / len(audio_files), desc=f"Processing {input_path.name}...")
-            
-            # Create output filename (extension will be set by add_silence_padding)
-            output_name = f"{input_path.stem}_padded{output_ext}"
-            output_path = temp_output_dir / output_name
-            
-            # Process the file
-            result, msg = add_silence_padding(input_path, output_path, pre_sec, post_sec, output_format)
-            
-            # Result may have different path due to extension change
-            result_path = Path(result) if result else None
-            
-            if result_path and result_path.exists():
-                processed_files.append(result_path)
-                success_count += 1
-                status_messages.append(f"[OK] {input_path.name}")
-            else:
-                fail_count += 1
-                status_messages.append(f"[FAIL] {input_path.name}: {msg}")
+        status_messages.append(f"Workers: {PADDING_BATCH_WORKERS}")
+        progress(0.0, desc=f"Processing {len(audio_files)} files...")
         
-        progress(0.9, desc="Creating ZIP archive...")
+        # Probe + encode run concurrently; each finished file goes straight into the ZIP
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf, \
+                ThreadPoolExecutor(max_workers=PADDING_BATCH_WORKERS) as executor:
+            futures = [executor.submit(pad_one, i, audio_file) for i, audio_file in enumerate(audio_files)]
+            
+            for done, future in enumerate(as_completed(futures), start=1):
+                index, input_path, result, msg = future.result()
+                
+                # Result may have different path due to extension change
+                result_path = Path(result) if result else None
+                
+                if result_path and result_path.exists():
+                    zipf.write(result_path, unique_arcname(result_path.name, index, arcnames))
+                    result_path.unlink()
+                    success_count += 1
+                    status_messages.append(f"[OK] {input_path.name}")
+                else:
+                    fail_count += 1
+                    status_messages.append(f"[FAIL] {input_path.name}: {msg}")
+                
+                progress(done / len(audio_files), desc=f"Processed {done}/{len(audio_files)}: {input_path.name}")
         
-        if len(processed_files) == 0:
+        if success_count == 0:
             return None, "\n".join(status_messages) + "\n\nNo files were processed successfully."
         
-        # Create ZIP file
-        zip_filename = f"{timestamp}__padded_audio_batch.zip"
-        zip_path = temp_output_dir / zip_filename
-        
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_path in processed_files:
-                zipf.write(file_path, file_path.name)
-        
         progress(1.0, desc="Complete!")
         
         status_messages.append("-" * 40)
@@ -823,6 +1354,239 @@ def process_silence_padding_batch(audio_files, pre_silence, post_silence, output
         return None, f"Error: {str(e)}\n\n{traceback.format_exc()}"
 
 
+# ===== Result Cache =====
+# Finished outputs are stored on disk keyed by input content hash, mode and model
+# parameters, so re-running the same upload through the same mode is a file copy.
+
+RESULT_CACHE_DIR = Path(os.environ.get("AUDIOKNIFE_CACHE_DIR", Path.home() / ".cache" / "audioknife" / "results"))
+RESULT_CACHE_MAX_MB = int(os.environ.get("AUDIOKNIFE_CACHE_MAX_MB", "2048"))
+
+# Model parameters used by each mode in process_audio; part of the cache key so
+# changing them invalidates old results
+MODE_CACHE_PARAMS = {
+    "Standard (Denoiser + VoiceFixer)": {"denoiser": "dns64", "quality": "high", "voicefixer_mode": 0},
+    "High Noise (Aggressive)": {"denoiser": "dns64", "quality": "high", "voicefixer_mode": 1},
+    "Severely Degraded": {"denoiser": "dns64", "quality": "high", "voicefixer_mode": 2},
+    "BGM Removal (Demucs)": {"model": "htdemucs", "stem": "vocals"},
+    "Denoiser Only": {"denoiser": "dns64", "quality": "high"},
+    "Resemble Denoise (SE/Noise removal)": {"mode": "denoise"},
+    "Resemble Enhance (Denoise + Quality)": {"mode": "enhance", "nfe": 32, "solver": "midpoint", "lambd": 0.5, "tau": 0.5},
+    "Spleeter (Vocal Extract)": {"model": "2stems", "stem": "vocals"},
+    "Spleeter (4stems)": {"model": "4stems", "stem": "vocals"},
+    "Spleeter (5stems)": {"model": "5stems", "stem": "vocals"},
+    "MP-SENet (High Quality)": {"model": "JacobLinCool/MP-SENet-DNS"},
+    "MossFormer2 (Speaker Separation)": {"model": "damo/speech_mossformer2_separation_temporal_8k", "speaker_index": 0},
+}
+
+
+class ResultCache:
+    """Content-addressed, size-bounded LRU cache of processed outputs"""
+
+    def __init__(self, cache_dir, max_bytes, hash_memo=None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = None  # path -> size, in least-recently-used order
+        self._hash_memo = {} if hash_memo is None else hash_memo
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        if self._entries is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            files = sorted(self.cache_dir.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+            self._entries = collections.OrderedDict((p, p.stat().st_size) for p in files)
+
+    def file_hash(self, path):
+        """SHA-256 of the file content, memoized by (path, size, mtime)"""
+        path = Path(path)
+        st = path.stat()
+        memo_key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(block)
+            digest = h.hexdigest()
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    def make_key(self, input_path, mode, params):
+        """Build the cache key for an input file processed with a mode and parameters"""
+        h = hashlib.sha256()
+        h.update(self.file_hash(input_path).encode())
+        h.update(json.dumps({"mode": mode, "params": params}, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def get(self, key, output_path):
+        """Copy a cached result to output_path; returns True on a hit"""
+        with self._lock:
+            self._load_index()
+            entry = self.cache_dir / f"{key}.wav"
+            if entry not in self._entries:
+                self.misses += 1
+                return False
+            try:
+                os.utime(entry)
+            except FileNotFoundError:
+                # Removed from the cache directory behind our back
+                self._entries.pop(entry, None)
+                self.misses += 1
+                return False
+            # Copied under the lock, so a concurrent put() cannot evict the entry mid-copy
+            try:
+                os.link(entry, output_path)
+            except OSError:
+                shutil.copy(entry, output_path)
+            self._entries.move_to_end(entry)
+            self.hits += 1
+        return True
+
+    def put(self, key, result_path):
+        """Store a result, evicting least-recently-used entries over the byte budget"""
+        entry = self.cache_dir / f"{key}.wav"
+        size = Path(result_path).stat().st_size
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._load_index()
+            tmp = self.cache_dir / f".{key}.tmp"
+            try:
+                shutil.copy(result_path, tmp)
+                os.replace(tmp, entry)
+            except OSError:
+                # A full or read-only cache disk must not fail the processing itself
+                return
+            self._entries[entry] = size
+            self._entries.move_to_end(entry)
+
+            total = sum(self._entries.values())
+            while total > self.max_bytes and self._entries:
+                victim, victim_size = self._entries.popitem(last=False)
+                try:
+                    victim.unlink()
+                except OSError:
+                    pass
+                total -= victim_size
+                self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss statistics and current size"""
+        with self._lock:
+            self._load_index()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": sum(self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_MB * 1024 * 1024)
+
+
+# ===== Stem Cache =====
+# Separations (Spleeter, Demucs) produce every stem in one pass; all of them are kept,
+# keyed by input content hash and model, so a later request for another stem is a copy.
+
+STEM_CACHE_DIR = Path(os.environ.get("AUDIOKNIFE_STEM_CACHE_DIR", Path.home() / ".cache" / "audioknife" / "stems"))
+STEM_CACHE_MAX_MB = int(os.environ.get("AUDIOKNIFE_STEM_CACHE_MAX_MB", "4096"))
+
+
+def _dir_size(path):
+    return sum(p.stat().st_size for p in Path(path).glob("*.wav"))
+
+
+class StemCache(ResultCache):
+    """Size-bounded LRU cache of separated stems, one directory of WAV files per key"""
+
+    def _load_index(self):
+        if self._entries is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            dirs = [p for p in self.cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+            dirs.sort(key=lambda p: p.stat().st_mtime)
+            self._entries = collections.OrderedDict((p, _dir_size(p)) for p in dirs)
+
+    def get_stems(self, key, dest_dir):
+        """
+        Link (or copy) a cached separation's stems into dest_dir, under the cache lock
+        so a concurrent put_stems() cannot evict them half-way
+
+        Returns:
+            dict: {stem_name: path in dest_dir}, or an empty dict on a miss
+        """
+        with self._lock:
+            self._load_index()
+            entry = self.cache_dir / key
+            cached = sorted(entry.glob("*.wav")) if entry in self._entries else []
+            stems = {}
+            try:
+                if cached:
+                    os.utime(entry)
+                    Path(dest_dir).mkdir(parents=True, exist_ok=True)
+                for path in cached:
+                    stems[path.stem] = Path(dest_dir) / path.name
+                    try:
+                        os.link(path, stems[path.stem])
+                    except OSError:
+                        shutil.copy(path, stems[path.stem])
+            except FileNotFoundError:
+                # Removed from the cache directory behind our back
+                stems = {}
+            if not stems:
+                self._entries.pop(entry, None)
+                self.misses += 1
+                return {}
+            self._entries.move_to_end(entry)
+            self.hits += 1
+        return stems
+
+    def put_stems(self, key, stems):
+        """
+        Store a separation's stems ({stem_name: path}), evicting least-recently-used entries
+        over the byte budget (never the new one)
+
+        Returns:
+            bool: True if the stems were stored
+        """
+        with self._lock:
+            self._load_index()
+            entry = self.cache_dir / key
+            tmp = self.cache_dir / f".{key}.tmp"
+            try:
+                shutil.rmtree(tmp, ignore_errors=True)
+                tmp.mkdir()
+                for name, path in stems.items():
+                    shutil.copy(path, tmp / f"{name}.wav")
+                shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp, entry)
+            except OSError:
+                # A full or read-only cache disk must not fail the processing itself
+                shutil.rmtree(tmp, ignore_errors=True)
+                return False
+            self._entries[entry] = _dir_size(entry)
+            self._entries.move_to_end(entry)
+
+            total = sum(self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                victim, victim_size = self._entries.popitem(last=False)
+                shutil.rmtree(victim, ignore_errors=True)
+                total -= victim_size
+                self.evictions += 1
+        return True
+
+
+# Shares the input hashes memoized by the result cache
+STEM_CACHE = StemCache(STEM_CACHE_DIR, STEM_CACHE_MAX_MB * 1024 * 1024, RESULT_CACHE._hash_memo)
+
+
 # ===== Main Processing Function =====
 
 def process_audio(audio_file, mode, progress=gr.Progress()):
@@ -847,83 +1611,142 @@ def process_audio(audio_file, mode, progress=gr.Progress()):
     output_name = f"{timestamp}__{input_path.stem}_cleaned.wav"
     output_path = input_path.parent / output_name
     
+    return enhance_file(input_path, output_path, mode, progress)
+
+
+def format_progress(info):
+    """Format a backend progress dict for the progress bar"""
+    text = f"{info['stage']}: {info['processed_seconds']:.1f}/{info['total_seconds']:.1f}s audio"
+    if info.get("rtf") is not None:
+        text += f", RTF {info['rtf']:.2f}"
+    if info.get("eta") is not None:
+        text += f", ETA {info['eta']:.0f}s"
+    return text
+
+
+def stage_progress(progress, start, end):
+    """Map a backend's progress reports onto the [start, end] range of the progress bar"""
+    def on_progress(info):
+        total = info.get("total_seconds") or 0
+        fraction = min(info["processed_seconds"] / total, 1.0) if total else 0.0
+        progress(start + (end - start) * fraction, desc=format_progress(info))
+    return on_progress
+
+
+def enhance_file(input_path, output_path, mode, progress=None):
+    """
+    Run one processing mode on one file (shared by single-file and batch processing)
+    
+    Args:
+        input_path: Input audio file path
+        output_path: Output WAV file path
+        mode: Processing mode (display name)
+        progress: Gradio progress tracker, or None
+    
+    Returns:
+        tuple: (output_file_path, status_message)
+    """
+    if progress is None:
+        progress = lambda *args, **kwargs: None
+    
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+    
     status_messages = []
     status_messages.append(f"Input: {input_path.name}")
     status_messages.append(f"Mode: {mode}")
     
     try:
+        cache_key = None
+        if mode in MODE_CACHE_PARAMS:
+            progress(0.05, desc="Checking result cache...")
+            cache_key = RESULT_CACHE.make_key(input_path, mode, MODE_CACHE_PARAMS[mode])
+            if RESULT_CACHE.get(cache_key, output_path):
+                stats = RESULT_CACHE.stats()
+                progress(1.0, desc="Complete (cached)!")
+                status_messages.append(f"Result cache: HIT ({stats['hits']} hits / {stats['misses']} misses)")
+                status_messages.append(f"\nOutput: {output_path.name}")
+                status_messages.append(f"Size: {output_path.stat().st_size / 1024 / 1024:.2f} MB")
+                return str(output_path), "\n".join(status_messages)
+        
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
-            temp_file = temp_path / "temp_processed.wav"
+            # Denoiser -> VoiceFixer handoff: raw float32, memory-mapped by the next stage
+            temp_file = temp_path / f"temp_processed{HANDOFF_SUFFIX}"
             
             progress(0.1, desc="Starting processing...")
+            # Cleared when a stage fails and the pipeline carries on without it
+            stages_ok = True
             
             if mode == "Standard (Denoiser + VoiceFixer)":
                 # Step 1: Denoiser
                 progress(0.2, desc="Running Denoiser...")
-                result, msg = run_denoiser(input_path, temp_file)
+                result, msg = run_denoiser(input_path, temp_file, stage_progress(progress, 0.2, 0.6))
                 status_messages.append(msg)
                 
                 if result:
                     current_file = temp_file
                 else:
                     current_file = input_path
+                    stages_ok = False
                 
                 # Step 2: VoiceFixer
                 progress(0.6, desc="Running VoiceFixer...")
-                result, msg = run_voicefixer(current_file, output_path, mode=0)
+                result, msg = run_voicefixer(current_file, output_path, mode=0, on_progress=stage_progress(progress, 0.6, 0.9))
                 status_messages.append(msg)
                 
                 if not result and current_file != input_path:
-                    shutil.copy(current_file, output_path)
+                    handoff_to_wav(current_file, output_path)
                     status_messages.append("Saved Denoiser result only")
             
             elif mode == "High Noise (Aggressive)":
                 progress(0.2, desc="Running Denoiser...")
-                result, msg = run_denoiser(input_path, temp_file)
+                result, msg = run_denoiser(input_path, temp_file, stage_progress(progress, 0.2, 0.6))
                 status_messages.append(msg)
                 
                 current_file = temp_file if result else input_path
+                stages_ok = stages_ok and bool(result)
                 
                 progress(0.6, desc="Running VoiceFixer (Mode 1)...")
-                result, msg = run_voicefixer(current_file, output_path, mode=1)
+                result, msg = run_voicefixer(current_file, output_path, mode=1, on_progress=stage_progress(progress, 0.6, 0.9))
                 status_messages.append(msg)
                 
                 if not result and current_file != input_path:
-                    shutil.copy(current_file, output_path)
+                    handoff_to_wav(current_file, output_path)
             
             elif mode == "Severely Degraded":
                 progress(0.2, desc="Running Denoiser...")
-                result, msg = run_denoiser(input_path, temp_file)
+                result, msg = run_denoiser(input_path, temp_file, stage_progress(progress, 0.2, 0.6))
                 status_messages.append(msg)
                 
                 current_file = temp_file if result else input_path
+                stages_ok = stages_ok and bool(result)
                 
                 progress(0.6, desc="Running VoiceFixer (Mode 2)...")
-                result, msg = run_voicefixer(current_file, output_path, mode=2)
+                result, msg = run_voicefixer(current_file, output_path, mode=2, on_progress=stage_progress(progress, 0.6, 0.9))
                 status_messages.append(msg)
                 
                 if not result and current_file != input_path:
-                    shutil.copy(current_file, output_path)
+                    handoff_to_wav(current_file, output_path)
             
             elif mode == "BGM Removal (Demucs)":
                 progress(0.3, desc="Running Demucs (this may take a while)...")
-                result, msg = run_demucs(input_path, output_path)
+                result, msg = run_demucs(input_path, output_path, stage_progress(progress, 0.3, 0.9))
                 status_messages.append(msg)
             
             elif mode == "Denoiser Only":
                 progress(0.3, desc="Running Denoiser...")
-                result, msg = run_denoiser(input_path, output_path)
+                result, msg = run_denoiser(input_path, output_path, stage_progress(progress, 0.3, 0.9))
                 status_messages.append(msg)
             
             elif mode == "Resemble Denoise (SE/Noise removal)":
                 progress(0.3, desc="Running Resemble Enhance (Denoise)...")
-                result, msg = run_resemble_enhance(input_path, output_path, "denoise")
+                result, msg = run_resemble_enhance(input_path, output_path, "denoise", stage_progress(progress, 0.3, 0.9))
                 status_messages.append(msg)
             
             elif mode == "Resemble Enhance (Denoise + Quality)":
                 progress(0.3, desc="Running Resemble Enhance (Full)...")
-                result, msg = run_resemble_enhance(input_path, output_path, "enhance")
+                result, msg = run_resemble_enhance(input_path, output_path, "enhance", stage_progress(progress, 0.3, 0.9))
                 status_messages.append(msg)
             
             elif mode == "Spleeter (Vocal Extract)":
@@ -943,12 +1766,12 @@ def process_audio(audio_file, mode, progress=gr.Progress()):
             
             elif mode == "MP-SENet (High Quality)":
                 progress(0.3, desc="Running MP-SENet...")
-                result, msg = run_mp_senet(input_path, output_path)
+                result, msg = run_mp_senet(input_path, output_path, stage_progress(progress, 0.3, 0.9))
                 status_messages.append(msg)
             
             elif mode == "MossFormer2 (Speaker Separation)":
                 progress(0.3, desc="Running MossFormer2...")
-                result, msg = run_mossformer2(input_path, output_path)
+                result, msg = run_mossformer2(input_path, output_path, on_progress=stage_progress(progress, 0.3, 0.9))
                 status_messages.append(msg)
             
             else:
@@ -957,6 +1780,10 @@ def process_audio(audio_file, mode, progress=gr.Progress()):
             progress(0.9, desc="Finalizing...")
             
             if output_path.exists():
+                # Only complete pipelines are cached, not outputs missing a failed stage
+                if result and stages_ok and cache_key:
+                    RESULT_CACHE.put(cache_key, output_path)
+                
                 progress(1.0, desc="Complete!")
                 status_messages.append(f"\nOutput: {output_path.name}")
                 status_messages.append(f"Size: {output_path.stat().st_size / 1024 / 1024:.2f} MB")
@@ -969,6 +1796,227 @@ def process_audio(audio_file, mode, progress=gr.Progress()):
         return None, f"Error: {str(e)}\n\n{traceback.format_exc()}"
 
 
+# ===== Batch Enhancement =====
+# Batch jobs are grouped by the backend models their mode uses, so one warm worker
+# handles its whole group back to back. Independent groups run concurrently.
+
+# Backends each mode runs through (used to group batch jobs by model affinity)
+MODE_BACKENDS = {
+    "Standard (Denoiser + VoiceFixer)": ("denoiser", "voicefixer"),
+    "High Noise (Aggressive)": ("denoiser", "voicefixer"),
+    "Severely Degraded": ("denoiser", "voicefixer"),
+    "BGM Removal (Demucs)": ("demucs",),
+    "Denoiser Only": ("denoiser",),
+    "Resemble Denoise (SE/Noise removal)": ("resemble_enhance",),
+    "Resemble Enhance (Denoise + Quality)": ("resemble_enhance",),
+    "Spleeter (Vocal Extract)": ("spleeter",),
+    "Spleeter (4stems)": ("spleeter",),
+    "Spleeter (5stems)": ("spleeter",),
+    "MP-SENet (High Quality)": ("mp_senet",),
+    "MossFormer2 (Speaker Separation)": ("mossformer2",),
+}
+
+# Cores available to batch enhancement, and cores one model group keeps busy
+BATCH_CPU_BUDGET = int(os.environ.get("AUDIOKNIFE_BATCH_CPU_BUDGET", "0")) or (os.cpu_count() or 1)
+BATCH_CORES_PER_GROUP = int(os.environ.get("AUDIOKNIFE_BATCH_CORES_PER_GROUP", "4"))
+
+
+def resolve_mode_name(value, default_mode):
+    """Accept a display name or internal key (e.g. "bgm_removal"); returns a display name or None"""
+    value = (value or "").strip()
+    if not value:
+        return default_mode
+    if value in MODE_NAME_MAP:
+        return value
+    for display_name, key in MODE_NAME_MAP.items():
+        if key == value:
+            return display_name
+    return None
+
+
+def build_batch_mode_table(audio_files, default_mode):
+    """Build the editable [file, mode] table shown after files are uploaded"""
+    if not audio_files:
+        return []
+    return [[Path(audio_file).name, default_mode] for audio_file in audio_files]
+
+
+def unique_arcname(name, index, used):
+    """
+    ZIP entry name for a batch output, suffixed with the input's index when another
+    input (e.g. a same-named file from another folder) already produced that name
+
+    Args:
+        used: Set of names already written; the returned name is added to it
+    """
+    arcname = name
+    if arcname in used:
+        stem, suffix = os.path.splitext(name)
+        arcname = f"{stem}_{index + 1}{suffix}"
+        n = 2
+        while arcname in used:
+            arcname = f"{stem}_{index + 1}_{n}{suffix}"
+            n += 1
+    used.add(arcname)
+    return arcname
+
+
+def group_batch_jobs(audio_files, modes):
+    """
+    Group (index, path) jobs by the model workers their modes use
+
+    Modes sharing any worker (e.g. "Denoiser Only" and "Standard", which both use
+    the denoiser) land in one group, since they would take turns on that worker anyway.
+
+    Returns:
+        dict: backend tuple -> list of (index, input_path, mode)
+    """
+    groups = []  # [set of backends, jobs]
+    for index, (audio_file, mode) in enumerate(zip(audio_files, modes)):
+        backends = set(MODE_BACKENDS[mode])
+        jobs = [(index, Path(audio_file), mode)]
+        # Absorb every group this mode shares a worker with
+        for group in [g for g in groups if g[0] & backends]:
+            groups.remove(group)
+            backends |= group[0]
+            jobs = group[1] + jobs
+        groups.append([backends, jobs])
+    groups.sort(key=lambda group: group[1][0][0])
+    return collections.OrderedDict(
+        (tuple(sorted(backends)), sorted(jobs)) for backends, jobs in groups
+    )
+
+
+def process_audio_batch(audio_files, file_modes, default_mode, progress=gr.Progress()):
+    """
+    Process many files with per-file modes, scheduled by model affinity
+
+    Args:
+        audio_files: List of input audio file paths
+        file_modes: Rows of [file name, mode] (mode may be empty for the default)
+        default_mode: Mode used for files without an explicit mode
+        progress: Gradio progress tracker
+
+    Returns:
+        tuple: (zip_file_path, status_message)
+    """
+    import zipfile
+    import queue
+
+    if audio_files is None or len(audio_files) == 0:
+        return None, "Please upload at least one audio file."
+
+    file_modes = list(file_modes or [])
+    modes = []
+    for i, audio_file in enumerate(audio_files):
+        requested = file_modes[i][1] if i < len(file_modes) and len(file_modes[i]) > 1 else ""
+        mode = resolve_mode_name(requested, default_mode)
+        if mode is None:
+            return None, f"Unknown mode for {Path(audio_file).name}: {requested}"
+        modes.append(mode)
+
+    groups = group_batch_jobs(audio_files, modes)
+    max_groups = max(1, min(len(groups), BATCH_CPU_BUDGET // max(1, BATCH_CORES_PER_GROUP)))
+
+    status_messages = []
+    status_messages.append(f"Batch Enhancement: {len(audio_files)} files in {len(groups)} model groups")
+    for backends, jobs in groups.items():
+        status_messages.append(f"  {' + '.join(backends)}: {len(jobs)} files")
+    status_messages.append(f"Concurrent groups: {max_groups} (CPU budget {BATCH_CPU_BUDGET} cores)")
+    status_messages.append("-" * 40)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    temp_output_dir = Path(tempfile.mkdtemp(prefix="batch_enhance_"))
+    zip_filename = f"{timestamp}__enhanced_audio_batch.zip"
+    zip_path = temp_output_dir / zip_filename
+    finished = queue.Queue()
+    arcnames = set()
+    success_count = 0
+    fail_count = 0
+
+    posted = set()
+
+    def post(index, input_path, mode, result, log):
+        posted.add(index)
+        finished.put((index, input_path, mode, result, log))
+
+    def output_for(index, input_path, mode):
+        file_dir = temp_output_dir / str(index)
+        file_dir.mkdir(exist_ok=True)
+        return file_dir / f"{input_path.stem}_{MODE_NAME_MAP[mode]}_cleaned.wav"
+
+    def run_spleeter_group(jobs):
+        # The whole group goes through one resident separator as a single batch
+        outputs = [output_for(index, input_path, mode) for index, input_path, mode in jobs]
+        results = run_spleeter_batch([
+            (input_path, output_path, MODE_CACHE_PARAMS[mode]["model"], MODE_CACHE_PARAMS[mode]["stem"])
+            for (index, input_path, mode), output_path in zip(jobs, outputs)
+        ])
+        for (index, input_path, mode), (result, log) in zip(jobs, results):
+            post(index, input_path, mode, result, log)
+
+    def run_group_jobs(backends, jobs):
+        if backends == ("spleeter",):
+            return run_spleeter_group(jobs)
+        # Jobs of one group run back to back on the same warm backend workers
+        for index, input_path, mode in jobs:
+            try:
+                result, log = enhance_file(input_path, output_for(index, input_path, mode), mode)
+            except Exception as e:
+                result, log = None, f"Error: {str(e)}"
+            post(index, input_path, mode, result, log)
+
+    def run_group(backends, jobs):
+        # Every job must post a result, or the collector below would wait for it forever
+        try:
+            run_group_jobs(backends, jobs)
+        except Exception as e:
+            for index, input_path, mode in jobs:
+                if index not in posted:
+                    post(index, input_path, mode, None, f"Error: {str(e)}")
+
+    try:
+        progress(0.0, desc=f"Processing {len(audio_files)} files...")
+
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf, \
+                ThreadPoolExecutor(max_workers=max_groups) as executor:
+            for backends, jobs in groups.items():
+                executor.submit(run_group, backends, jobs)
+
+            for done in range(1, len(audio_files) + 1):
+                index, input_path, mode, result, log = finished.get()
+                result_path = Path(result) if result else None
+
+                if result_path and result_path.exists():
+                    zipf.write(result_path, unique_arcname(result_path.name, index, arcnames))
+                    result_path.unlink()
+                    success_count += 1
+                    status_messages.append(f"[OK] {input_path.name} ({mode})")
+                else:
+                    fail_count += 1
+                    status_messages.append(f"[FAIL] {input_path.name} ({mode}): {log.splitlines()[-1] if log else ''}")
+
+                progress(done / len(audio_files), desc=f"Processed {done}/{len(audio_files)}: {input_path.name}")
+
+        if success_count == 0:
+            return None, "\n".join(status_messages) + "\n\nNo files were processed successfully."
+
+        progress(1.0, desc="Complete!")
+
+        status_messages.append("-" * 40)
+        status_messages.append(f"Success: {success_count} / {len(audio_files)} files")
+        if fail_count > 0:
+            status_messages.append(f"Failed: {fail_count} files")
+        status_messages.append(f"\nOutput: {zip_filename}")
+        status_messages.append(f"Size: {zip_path.stat().st_size / 1024 / 1024:.2f} MB")
+
+        return str(zip_path), "\n".join(status_messages)
+
+    except Exception as e:
+        import traceback
+        return None, f"Error: {str(e)}\n\n{traceback.format_exc()}"
+
+
 # ===== Gradio Interface =====
 
 def get_features_status_html():
@@ -984,18 +2032,33 @@ def get_features_status_html():
     mossformer2_available = (SCRIPT_DIR / "scripts" / "run_mossformer2.py").exists()
     
     features = [
-        ("Facebook Denoiser", denoiser_available, "Meta AI Research"),
-        ("VoiceFixer", voicefixer_available, "haoheliu"),
-        ("Demucs", demucs_available, "Meta AI Research"),
-        ("Resemble Enhance", resemble_available, "Resemble AI"),
-        ("Spleeter", spleeter_available, "Deezer Research"),
-        ("MP-SENet", mp_senet_available, "INTERSPEECH 2023"),
-        ("MossFormer2", mossformer2_available, "Alibaba DAMO"),
+        ("Facebook Denoiser", denoiser_available, "Meta AI Research", "denoiser"),
+        ("VoiceFixer", voicefixer_available, "haoheliu", "voicefixer"),
+        ("Demucs", demucs_available, "Meta AI Research", "demucs"),
+        ("Resemble Enhance", resemble_available, "Resemble AI", "resemble_enhance"),
+        ("Spleeter", spleeter_available, "Deezer Research", "spleeter"),
+        ("MP-SENet", mp_senet_available, "INTERSPEECH 2023", "mp_senet"),
+        ("MossFormer2", mossformer2_available, "Alibaba DAMO", "mossformer2"),
     ]
     
     html = '<div style="display: flex; flex-wrap: wrap; gap: 8px;">'
-    for name, available, source in features:
-        if available:
+    for name, available, source, backend in features:
+        warmup = get_warmup_state(backend) if available else None
+        if warmup is None:
+            readiness = ""
+        elif warmup["status"] == "ready":
+            readiness = f" &middot; warm ({warmup['load_time']:.1f}s load)"
+        elif warmup["status"] == "failed":
+            readiness = " &middot; warm-up failed"
+        else:
+            readiness = " &middot; loading..."
+        
+        if warmup is not None and warmup["status"] in ("pending", "loading"):
+            bg_color = "#fff8e1"
+            border_color = "#FFB300"
+            icon_color = "#ff8f00"
+            icon = "hourglass_top"
+        elif available:
             bg_color = "#e8f5e9"
             border_color = "#4CAF50"
             icon_color = "#2e7d32"
@@ -1012,7 +2075,7 @@ def get_features_status_html():
             <span class="material-icons" style="font-size: 16px; color: {icon_color}; margin-right: 6px;">{icon}</span>
             <div>
                 <div style="font-size: 12px; font-weight: 600; color: #333333;">{name}</div>
-                <div style="font-size: 10px; color: #666666;">{source}</div>
+                <div style="font-size: 10px; color: #666666;">{source}{readiness}</div>
             </div>
         </div>
         """
@@ -1020,6 +2083,11 @@ def get_features_status_html():
     return html
 
 
+def refresh_features_status():
+    """Re-render the features status; the refresh timer stops once warm-up has finished"""
+    return get_features_status_html(), gr.Timer(active=warmup_in_progress())
+
+
 def create_interface():
     """Create Gradio interface"""
     
@@ -1127,7 +2195,9 @@ def create_interface():
                             <span style="color: #333333;">Available AI Models</span>
                         </div>
                         """)
-                        gr.HTML(get_features_status_html())
+                        features_status = gr.HTML(get_features_status_html())
+                        # Refresh the chips while models warm up in the background
+                        features_timer = gr.Timer(2.0, active=warmup_in_progress())
                     
                     # Right Column - Output
                     with gr.Column(scale=1):
@@ -1546,6 +2616,94 @@ def create_interface():
                                     interactive=False,
                                     placeholder="Batch processing status will appear here..."
                                 )
+            
+            # ===== Tab 3: Batch Enhancement =====
+            with gr.TabItem("Batch Enhancement"):
+                with gr.Row():
+                    # Left Column - Input & Modes
+                    with gr.Column(scale=1):
+                        gr.HTML("""
+                        <div class="section-title">
+                            <span class="material-icons" style="color: #667eea;">folder_open</span>
+                            <span style="color: #333333;">Input Audio Files (Multiple)</span>
+                        </div>
+                        """)
+                        batch_enhance_input = gr.Files(
+                            label="Upload Multiple Audio Files",
+                            file_types=["audio"],
+                            file_count="multiple"
+                        )
+                        
+                        gr.HTML("""
+                        <div class="section-title" style="margin-top: 20px;">
+                            <span class="material-icons" style="color: #667eea;">tune</span>
+                            <span style="color: #333333;">Processing Modes</span>
+                        </div>
+                        """)
+                        batch_default_mode_select = gr.Dropdown(
+                            choices=list(MODE_NAME_MAP.keys()),
+                            value="Resemble Denoise (SE/Noise removal)",
+                            label="Default Mode",
+                            info="Applied to files without a mode in the table below"
+                        )
+                        batch_mode_table = gr.Dataframe(
+                            headers=["File", "Mode"],
+                            datatype=["str", "str"],
+                            type="array",
+                            interactive=True,
+                            label="Per-File Modes (edit the Mode column to override)"
+                        )
+                        
+                        batch_enhance_process_btn = gr.Button(
+                            "Process All Files",
+                            variant="primary",
+                            size="lg"
+                        )
+                        
+                        # Info box
+                        gr.HTML("""
+                        <div style="background: #fff3e0; border: 1px solid #ff9800; border-radius: 8px;
+                                    padding: 12px; margin-top: 16px;">
+                            <div style="display: flex; align-items: flex-start; gap: 8px;">
+                                <span class="material-icons" style="color: #f57c00; font-size: 20px;">hub</span>
+                                <div>
+                                    <div style="font-weight: 600; color: #f57c00; font-size: 13px;">Model-Affinity Scheduling</div>
+                                    <ul style="margin: 8px 0 0 0; padding-left: 16px; font-size: 13px; color: #333333;">
+                                        <li>Files are grouped by the AI models their mode uses</li>
+                                        <li>Each group runs back to back on one warm model</li>
+                                        <li>Independent groups run in parallel within the CPU budget</li>
+                                        <li>Output is a ZIP archive containing all processed files</li>
+                                    </ul>
+                                </div>
+                            </div>
+                        </div>
+                        """)
+                    
+                    # Right Column - Output
+                    with gr.Column(scale=1):
+                        gr.HTML("""
+                        <div class="section-title">
+                            <span class="material-icons" style="color: #667eea;">folder_zip</span>
+                            <span style="color: #333333;">Output (ZIP Archive)</span>
+                        </div>
+                        """)
+                        batch_enhance_output_file = gr.File(
+                            label="Download Processed Files (ZIP)"
+                        )
+                        
+                        gr.HTML("""
+                        <div class="section-title" style="margin-top: 20px;">
+                            <span class="material-icons" style="color: #667eea;">terminal</span>
+                            <span style="color: #333333;">Processing Log</span>
+                        </div>
+                        """)
+                        batch_enhance_status_output = gr.Textbox(
+                            label="",
+                            lines=12,
+                            max_lines=18,
+                            interactive=False,
+                            placeholder="Batch enhancement status will appear here..."
+                        )
         
         # Event handlers
         # Update mode info when mode is selected (Tab 1)
@@ -1555,6 +2713,10 @@ def create_interface():
             outputs=[mode_info_display]
         )
         
+        # Show model readiness on page load and while warm-up is running (Tab 1)
+        demo.load(fn=refresh_features_status, outputs=[features_status, features_timer])
+        features_timer.tick(fn=refresh_features_status, outputs=[features_status, features_timer])
+        
         # Process audio enhancement (Tab 1)
         process_btn.click(
             fn=process_audio,
@@ -1578,6 +2740,22 @@ def create_interface():
             outputs=[batch_output_file, batch_status_output],
             show_progress=True
         )
+
+        # Fill the per-file mode table on upload (Tab 3)
+        batch_enhance_input.change(
+            fn=build_batch_mode_table,
+            inputs=[batch_enhance_input, batch_default_mode_select],
+            outputs=[batch_mode_table]
+        )
+
+        # Process batch enhancement (Tab 3)
+        batch_enhance_process_btn.click(
+            fn=process_audio_batch,
+            inputs=[batch_enhance_input, batch_mode_table, batch_default_mode_select],
+            outputs=[batch_enhance_output_file, batch_enhance_status_output],
+            show_progress=True,
+            api_name="process_batch"
+        )
     
     return demo
 
@@ -1591,6 +2769,7 @@ if __name__ == "__main__":
     parser.add_argument("--port", type=int, default=7860, help="Port to run on")
     parser.add_argument("--share", action="store_true", help="Create public link")
     parser.add_argument("--server-name", default="127.0.0.1", help="Server name")
+    parser.add_argument("--no-warmup", action="store_true", help="Do not preload models at launch")
     args = parser.parse_args()
     
     print("=" * 50)
@@ -1601,8 +2780,12 @@ if __name__ == "__main__":
     print(f"Spleeter venv: {SPLEETER_VENV}")
     print(f"VoiceFixer: {VOICEFIXER_DIR}")
     print(f"ClearSound: {CLEARSOUND_DIR}")
+    print(f"Warm-up: {'disabled' if args.no_warmup else ', '.join(WARMUP_BACKENDS) or 'none'}")
     print("=" * 50)
     
+    if not args.no_warmup:
+        start_warmup()
+    
     demo = create_interface()
     demo.launch(
         server_name=args.server_name,
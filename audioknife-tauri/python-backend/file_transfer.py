@@ -0,0 +1,159 @@
+"""
+File Transfer
+Streaming uploads into the backend's upload directory and ranged downloads of results
+"""
+
+import os
+import re
+import struct
+import tempfile
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+UPLOAD_DIR = Path(os.environ.get("AUDIOKNIFE_UPLOAD_DIR", Path(tempfile.gettempdir()) / "audioknife_uploads"))
+MAX_UPLOAD_BYTES = int(os.environ.get("AUDIOKNIFE_MAX_UPLOAD_MB", "2048")) * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+# Raw PCM sample formats accepted by the raw upload endpoint: (bytes per sample, WAV format tag)
+PCM_FORMATS = {
+    "s16le": (2, 1),
+    "s24le": (3, 1),
+    "s32le": (4, 1),
+    "f32le": (4, 3),
+}
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES"""
+
+
+def new_upload_path(filename: Optional[str]) -> Tuple[str, Path]:
+    """Allocate a file id and a path in the upload directory, keeping the original extension"""
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    file_id = uuid.uuid4().hex
+    suffix = Path(filename or "").suffix.lower() or ".wav"
+    return file_id, UPLOAD_DIR / f"{file_id}{suffix}"
+
+
+def find_upload(file_id: str) -> Optional[Path]:
+    """Path of a previously uploaded file (None if the id is unknown or malformed)"""
+    if not re.fullmatch(r"[0-9a-f]{32}", file_id or ""):
+        return None
+    for path in UPLOAD_DIR.glob(f"{file_id}.*"):
+        return path
+    return None
+
+
+def result_path_for(input_path: Path) -> Path:
+    """Output path for a job whose input was uploaded"""
+    return input_path.with_name(f"{input_path.stem}_processed.wav")
+
+
+def wav_header(sample_rate: int, channels: int, sample_format: str, data_bytes: int) -> bytes:
+    """44-byte RIFF/WAVE header for interleaved PCM data"""
+    sample_bytes, format_tag = PCM_FORMATS[sample_format]
+    block_align = channels * sample_bytes
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, format_tag, channels, sample_rate, sample_rate * block_align, block_align, sample_bytes * 8,
+        b"data", data_bytes
+    )
+
+
+async def save_stream(chunks: AsyncIterator[bytes], path: Path, pcm: Optional[Tuple[int, int, str]] = None) -> int:
+    """
+    Write an async stream of byte chunks to disk as it arrives
+
+    Args:
+        chunks: Request body chunks
+        path: Destination file
+        pcm: (sample_rate, channels, sample_format) to wrap raw PCM in a WAV header
+
+    Returns:
+        Number of body bytes received
+
+    Raises:
+        UploadTooLarge: The body exceeded MAX_UPLOAD_BYTES (the partial file is removed)
+    """
+    received = 0
+    try:
+        with open(path, "wb") as f:
+            if pcm is not None:
+                # Sizes are patched in once the stream ends
+                f.write(wav_header(*pcm, data_bytes=0))
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > MAX_UPLOAD_BYTES:
+                    raise UploadTooLarge(f"Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+                f.write(chunk)
+
+            if pcm is not None:
+                sample_bytes, _ = PCM_FORMATS[pcm[2]]
+                data_bytes = received - received % (pcm[1] * sample_bytes)
+                f.truncate(44 + data_bytes)
+                f.seek(0)
+                f.write(wav_header(*pcm, data_bytes=data_bytes))
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return received
+
+
+async def iter_upload_file(upload) -> AsyncIterator[bytes]:
+    """Read a multipart UploadFile in chunks (Starlette spools large parts to disk)"""
+    while True:
+        chunk = await upload.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "Range: bytes=start-end" header
+
+    Returns:
+        (start, end) inclusive, or None to send the whole file
+
+    Raises:
+        ValueError: The range cannot be satisfied
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        # Multiple ranges or other units: fall back to the full body
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return start, end
+
+
+def iter_file_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    """Yield bytes start..end (inclusive) of a file in chunks"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
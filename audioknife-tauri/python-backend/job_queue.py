@@ -0,0 +1,279 @@
+"""
+Job Queue
+Priority scheduler with bounded concurrency and cancellation for processing jobs
+"""
+
+import asyncio
+import json
+import os
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from job_store import FINAL_STATUSES, LIVE_FIELDS, JobStore
+from processors.progress import JobCancelled, ProgressCallback
+
+
+class QueueFull(Exception):
+    """Raised when the queue already holds its maximum number of pending jobs"""
+
+
+class JobScheduler:
+    """
+    Runs queued jobs on a fixed number of asyncio workers, highest priority first
+
+    The queue lives in a JobStore shared by every server process: workers claim
+    rows from it, so several processes can serve one queue and report each
+    other's jobs. Jobs are pydantic status models (job_id, status, progress,
+    message, ...) built from store rows with make_job; while a job runs here its
+    live object is kept in the `jobs` dict and its progress is written back to
+    the store with each heartbeat. The runner returns a pydantic result with
+    `success` and `message`, which is stored with the job.
+
+    Cancelling a running job frees its slot immediately. The model call in the
+    executor thread is stopped cooperatively: progress callbacks wrapped with
+    `guard_progress` raise JobCancelled at its next chunk. Cancelling a job that
+    runs in another process flags it in the store; its worker picks that up at
+    the next heartbeat.
+
+    Jobs with a `coalesce_key` attribute are deduplicated: submitting one while
+    a job with the same key is pending or running attaches it to that job.
+
+    Store calls made by the workers run in the default executor, so a busy
+    database never blocks the event loop. submit() may be called from any
+    thread, which lets the server run it off the loop as well.
+    """
+
+    def __init__(self, store: JobStore, jobs: Dict[str, Any], make_job: Callable[[dict], Any],
+                 max_concurrent: int = 1, max_pending: int = 32, history: int = 200,
+                 on_finish: Optional[Callable[[Any, Any], None]] = None,
+                 poll_interval: float = 0.5, heartbeat_interval: float = 1.0, stale_after: float = 30.0):
+        self.store = store
+        self.jobs = jobs
+        self.make_job = make_job
+        self.on_finish = on_finish
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_pending = max_pending
+        self.history = history
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._run: Optional[Callable[[Any], Awaitable[Any]]] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancel_flags: Dict[str, threading.Event] = {}
+        self._stopping = False
+        self._workers: List[asyncio.Task] = []
+
+    def start(self, run: Callable[[Any], Awaitable[Any]]):
+        """
+        Start the worker tasks (call from the running event loop)
+
+        Args:
+            run: Coroutine function called with each job this process claims
+        """
+        if self._workers:
+            return
+        self._run = run
+        self._stopping = False
+        self._loop = asyncio.get_event_loop()
+        self._wake = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.max_concurrent)]
+        if self.stale_after:
+            self._workers.append(asyncio.ensure_future(self._reaper()))
+
+    async def stop(self):
+        """Stop the workers; jobs running here go back to the queue for other processes"""
+        self._stopping = True
+        for job_id, task in list(self._running.items()):
+            self._cancel_flags[job_id].set()
+            task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def pending_count(self) -> int:
+        return self.store.count("pending")
+
+    @property
+    def running_count(self) -> int:
+        return self.store.count("processing")
+
+    def submit(self, job, priority: int = 0) -> str:
+        """
+        Queue a job
+
+        Args:
+            job: Job status model; stored as a pending row under job.job_id
+            priority: Higher runs first; equal priorities run in submission order
+
+        Returns:
+            The id of the job that will produce the result: job.job_id, or the
+            in-flight job it was coalesced with
+
+        Raises:
+            QueueFull: If max_pending jobs are already waiting
+            JobExists: If the store already holds a job with this job_id
+        """
+        # Attaching to an in-flight job adds no work, so it is allowed on a full queue
+        if self.store.find_inflight(getattr(job, "coalesce_key", None)) is None:
+            pending = self.store.count("pending")
+            if self.max_pending and pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs already queued")
+
+        job.status = "pending"
+        job.priority = priority
+        leader_id = self.store.insert(job.model_dump())
+        if leader_id is not None:
+            return leader_id
+        if self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return job.job_id
+
+    def get(self, job_id: str):
+        """Current status of a job, whichever process runs it (None if unknown)"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            # Running here: the live object is fresher than the last heartbeat
+            return job
+        row = self.store.get(job_id)
+        return self.make_job(row) if row else None
+
+    async def wait(self, job_id: str, poll_interval: float = 0.25):
+        """Wait for a job to finish and return its stored result (None if cancelled or crashed)"""
+        while True:
+            row = await self._in_thread(self.store.get, job_id)
+            if row is None:
+                return None
+            if row["status"] in FINAL_STATUSES:
+                return json.loads(row["result"]) if row["result"] else None
+            await asyncio.sleep(poll_interval)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a pending or running job; returns False if it already finished"""
+        previous = self.store.request_cancel(job_id)
+        if previous == "detached":
+            # Other clients still wait for this job
+            return True
+        if previous == "pending":
+            if self.on_finish is not None:
+                self.on_finish(self.make_job(self.store.get(job_id)), None)
+            return True
+        if previous != "processing":
+            return False
+
+        task = self._running.get(job_id)
+        if task is not None:
+            self._cancel_flags[job_id].set()
+            task.cancel()
+        return True
+
+    def is_cancelled(self, job_id: str) -> bool:
+        flag = self._cancel_flags.get(job_id)
+        return flag is not None and flag.is_set()
+
+    def guard_progress(self, job_id: str, callback: Optional[ProgressCallback]) -> ProgressCallback:
+        """Wrap a progress callback so it stops the job once it is cancelled"""
+        # Hold on to the flag itself: the job's record is dropped once its task is cancelled,
+        # but the executor thread keeps reporting until it reaches this check
+        cancelled = self._cancel_flags.get(job_id) or threading.Event()
+
+        def on_progress(info: dict):
+            if cancelled.is_set():
+                raise JobCancelled(job_id)
+            if callback is not None:
+                callback(info)
+        return on_progress
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position among pending jobs, in the order they will start"""
+        return self.store.queue_position(job_id)
+
+    async def _worker(self):
+        # Checked as well as cancellation: wait_for can swallow a cancel that races a wake-up
+        while not self._stopping:
+            row = await self._in_thread(self.store.claim, self.worker_id)
+            if row is None:
+                # Idle: wake on a local submit, or poll for jobs queued by other processes
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(self.make_job(row))
+
+    async def _execute(self, job):
+        job_id = job.job_id
+        self.jobs[job_id] = job
+        self._cancel_flags[job_id] = threading.Event()
+        task = asyncio.ensure_future(self._run(job))
+        self._running[job_id] = task
+        try:
+            # Heartbeat while the job runs: persist progress and pick up cancel requests
+            while not task.done():
+                await asyncio.wait({task}, timeout=self.heartbeat_interval)
+                if not task.done() and await self._in_thread(self._heartbeat, job):
+                    self._cancel_flags[job_id].set()
+                    task.cancel()
+            result = await task
+        except (asyncio.CancelledError, JobCancelled):
+            if self._stopping:
+                # The server is shutting down; let another process pick the job up
+                await self._in_thread(self.store.release, job_id, self.worker_id)
+                raise
+            else:
+                await self._finish(job, None, "cancelled", "Cancelled")
+        except Exception as e:
+            await self._finish(job, None, "failed", f"{type(e).__name__}: {e}")
+        else:
+            if self.is_cancelled(job_id):
+                await self._finish(job, None, "cancelled", "Cancelled")
+            else:
+                await self._finish(job, result, "completed" if result.success else "failed", result.message)
+        finally:
+            self._running.pop(job_id, None)
+            self._cancel_flags.pop(job_id, None)
+            self.jobs.pop(job_id, None)
+
+    def _heartbeat(self, job) -> bool:
+        fields = {name: getattr(job, name, None) for name in LIVE_FIELDS}
+        try:
+            return self.store.update_live(job.job_id, self.worker_id, fields)
+        except Exception as e:
+            # A busy database only delays this heartbeat; the next one catches up
+            print(f"[JobScheduler] Heartbeat failed for {job.job_id}: {e}")
+            return False
+
+    async def _reaper(self):
+        """Requeue jobs whose process died without finishing them"""
+        while True:
+            await asyncio.sleep(self.stale_after / 2)
+            try:
+                if await self._in_thread(self.store.requeue_stale, self.stale_after):
+                    self._wake.set()
+            except Exception as e:
+                print(f"[JobScheduler] Stale job check failed: {e}")
+
+    async def _finish(self, job, result, status: str, message: str):
+        job.status = status
+        job.message = message
+        if status == "completed":
+            job.progress = 1.0
+        fields = {name: getattr(job, name, None) for name in LIVE_FIELDS + ("processing_time",)}
+        await self._in_thread(self.store.finish, job.job_id, self.worker_id, status, message,
+                              result.model_dump() if result is not None else None, fields)
+        if self.on_finish is not None:
+            self.on_finish(job, result)
+
+        # Keep the store bounded: forget the oldest finished jobs
+        await self._in_thread(self.store.prune, self.history)
+
+    @staticmethod
+    async def _in_thread(fn, *args):
+        """Run a blocking store call in the default executor"""
+        return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
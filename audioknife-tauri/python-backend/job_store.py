@@ -0,0 +1,322 @@
+"""
+Job Store
+SQLite-backed job and result table shared by every server process
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Columns a claimed job may update while it runs
+LIVE_FIELDS = ("progress", "message", "processed_seconds", "total_seconds", "rtf", "eta")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    audio_seconds REAL,
+    estimated_seconds REAL,
+    processing_time REAL,
+    processed_seconds REAL,
+    total_seconds REAL,
+    rtf REAL,
+    eta REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_id TEXT,
+    heartbeat REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    coalesce_key TEXT,
+    followers INTEGER NOT NULL DEFAULT 0,
+    options TEXT
+);
+"""
+
+# Columns added after the first release, added to older databases on open
+MIGRATIONS = {
+    "coalesce_key": "TEXT",
+    "followers": "INTEGER NOT NULL DEFAULT 0",
+    "options": "TEXT",
+}
+
+# Columns holding JSON-encoded dicts
+JSON_COLUMNS = ("options",)
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_coalesce ON jobs (coalesce_key, status);
+"""
+
+
+class JobExists(Exception):
+    """Raised when a job is inserted under an id the store already holds"""
+
+
+class JobStore:
+    """
+    Job table in a local SQLite database (WAL mode), safe to share between processes
+
+    Workers take jobs with `claim`, which moves the best pending row to
+    "processing" inside an IMMEDIATE transaction, so each job is claimed by
+    exactly one worker. Running jobs heartbeat; jobs whose worker stops
+    heartbeating are put back in the queue by `requeue_stale`.
+
+    Jobs inserted with a coalesce_key attach to a pending or running job with
+    the same key instead of queueing a second copy of the work.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        for column, definition in MIGRATIONS.items():
+            if column not in self._columns():
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+                self._column_names.add(column)
+        conn.executescript(INDEXES)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections must stay on their thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def insert(self, job: Dict[str, Any]) -> Optional[str]:
+        """
+        Add a pending job, or attach it to an in-flight job with the same coalesce_key
+
+        Returns:
+            The in-flight job's id if the job was coalesced, otherwise None
+
+        Raises:
+            JobExists: If a job with this job_id is already stored, whatever its status
+        """
+        job = dict(job, status="pending", created_at=job.get("created_at") or time.time())
+        for column in JSON_COLUMNS:
+            if job.get(column) is not None:
+                job[column] = json.dumps(job[column], sort_keys=True)
+        columns = [column for column in job if column in self._columns()]
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM jobs WHERE job_id = ?", (job["job_id"],)).fetchone():
+                raise JobExists(f"Job {job['job_id']} already exists")
+            leader = self._find_inflight(conn, job.get("coalesce_key"))
+            if leader is not None:
+                # A follower with a higher priority moves the shared job up the queue
+                conn.execute(
+                    "UPDATE jobs SET followers = followers + 1, priority = MAX(priority, ?) WHERE job_id = ?",
+                    (job.get("priority", 0), leader["job_id"])
+                )
+            else:
+                conn.execute(
+                    f"INSERT INTO jobs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [job[column] for column in columns]
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return leader["job_id"] if leader is not None else None
+
+    def find_inflight(self, coalesce_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The pending or running job with this coalesce_key, if any"""
+        return self._decode(self._find_inflight(self._connect(), coalesce_key))
+
+    @staticmethod
+    def _find_inflight(conn: sqlite3.Connection, coalesce_key: Optional[str]):
+        if not coalesce_key:
+            return None
+        return conn.execute(
+            "SELECT * FROM jobs WHERE coalesce_key = ? AND status IN ('pending', 'processing') LIMIT 1",
+            (coalesce_key,)
+        ).fetchone()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._decode(row)
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Move the highest-priority pending job to processing for this worker"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'pending' ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'processing', worker_id = ?, started_at = ?, heartbeat = ?, "
+                "attempts = attempts + 1 WHERE job_id = ?",
+                (worker_id, now, now, row["job_id"])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["job_id"])
+
+    def update_live(self, job_id: str, worker_id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Persist a running job's progress and heartbeat
+
+        Returns:
+            True if cancellation has been requested for the job
+        """
+        values = {name: fields.get(name) for name in LIVE_FIELDS if name in fields}
+        assignments = "".join(f", {name} = ?" for name in values)
+        conn = self._connect()
+        conn.execute(
+            f"UPDATE jobs SET heartbeat = ?{assignments} WHERE job_id = ? AND worker_id = ?",
+            [time.time(), *values.values(), job_id, worker_id]
+        )
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def finish(self, job_id: str, worker_id: str, status: str, message: str, result: Optional[dict] = None,
+               fields: Optional[Dict[str, Any]] = None):
+        """Record a job's final status and result (ignored if the job was requeued away from this worker)"""
+        values = {name: value for name, value in (fields or {}).items() if name in self._columns()}
+        values.update(status=status, message=message, finished_at=time.time(), cancel_requested=0,
+                      result=json.dumps(result) if result is not None else None)
+        if status == "completed":
+            values["progress"] = 1.0
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        self._connect().execute(
+            f"UPDATE jobs SET {assignments} WHERE job_id = ? AND worker_id = ? AND status = 'processing'",
+            [*values.values(), job_id, worker_id]
+        )
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """
+        Cancel a pending job outright, or flag a running one for its worker
+
+        A job that coalesced requests from several clients is only cancelled by
+        the last of them; earlier requests just detach one follower.
+
+        Returns:
+            The job's status before the request, "detached" if a follower was
+            detached instead (None if the job does not exist)
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT status, followers FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = row["status"]
+            if status in ("pending", "processing") and row["followers"] > 0:
+                status = "detached"
+                conn.execute("UPDATE jobs SET followers = followers - 1 WHERE job_id = ?", (job_id,))
+            elif status == "pending":
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', message = 'Cancelled before start', finished_at = ? "
+                    "WHERE job_id = ?",
+                    (time.time(), job_id)
+                )
+            elif status == "processing":
+                conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return status
+
+    def release(self, job_id: str, worker_id: str):
+        """Put a job this worker claimed back in the queue without counting the attempt"""
+        self._connect().execute(
+            "UPDATE jobs SET status = 'pending', worker_id = NULL, attempts = MAX(attempts - 1, 0), "
+            "message = 'Requeued' WHERE job_id = ? AND worker_id = ? AND status = 'processing'",
+            (job_id, worker_id)
+        )
+
+    def requeue_stale(self, timeout: float) -> int:
+        """Return jobs whose worker stopped heartbeating to the queue (or fail them after max_attempts)"""
+        cutoff = time.time() - timeout
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', message = 'Worker stopped responding', finished_at = ? "
+                "WHERE status = 'processing' AND heartbeat < ? AND attempts >= ?",
+                (time.time(), cutoff, self.max_attempts)
+            )
+            requeued = conn.execute(
+                "UPDATE jobs SET status = 'pending', worker_id = NULL, message = 'Requeued after worker loss' "
+                "WHERE status = 'processing' AND heartbeat < ?",
+                (cutoff,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return requeued
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """1-based position among pending jobs"""
+        row = self._connect().execute(
+            "SELECT 1 + (SELECT COUNT(*) FROM jobs AS other WHERE other.status = 'pending' AND "
+            "(other.priority > job.priority OR (other.priority = job.priority AND other.created_at < job.created_at))) "
+            "AS position FROM jobs AS job WHERE job.job_id = ? AND job.status = 'pending'",
+            (job_id,)
+        ).fetchone()
+        return row["position"] if row else None
+
+    def count(self, status: str) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def active_jobs(self) -> List[Dict[str, Any]]:
+        """Pending and processing jobs"""
+        rows = self._connect().execute("SELECT * FROM jobs WHERE status IN ('pending', 'processing')").fetchall()
+        return [self._decode(row) for row in rows]
+
+    def prune(self, keep: int):
+        """Forget all but the newest `keep` finished jobs"""
+        self._connect().execute(
+            f"DELETE FROM jobs WHERE status IN {FINAL_STATUSES} AND job_id NOT IN "
+            f"(SELECT job_id FROM jobs WHERE status IN {FINAL_STATUSES} ORDER BY finished_at DESC LIMIT ?)",
+            (keep,)
+        )
+
+    @staticmethod
+    def _decode(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        for column in JSON_COLUMNS:
+            job[column] = json.loads(job[column]) if job.get(column) else {}
+        return job
+
+    def _columns(self):
+        columns = getattr(self, "_column_names", None)
+        if columns is None:
+            columns = self._column_names = {
+                row["name"] for row in self._connect().execute("PRAGMA table_info(jobs)").fetchall()
+            }
+        return columns
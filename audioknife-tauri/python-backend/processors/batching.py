@@ -0,0 +1,77 @@
+"""
+Micro-Batching
+Groups concurrent requests for the same model into one batched forward pass
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Tuple
+
+from .metrics import Histogram
+
+BATCH_SIZE = Histogram("audioknife_batch_size", "Requests per micro-batch", buckets=(1, 2, 4, 8, 16, 32))
+
+
+class MicroBatcher:
+    """
+    Collects items submitted within a short window (or until max_items arrive)
+    and runs them through run_batch in one call on the given executor.
+
+    run_batch receives the list of items and must return one result per item,
+    in order. An exception fails every request in that batch.
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], executor: Optional[Executor] = None,
+                 max_items: int = 8, window: float = 0.02):
+        self.run_batch = run_batch
+        self.executor = executor
+        self.max_items = max(max_items, 1)
+        self.window = window
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item) -> Any:
+        """Queue one item and wait for its result"""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_items:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return await future
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Requests cancelled while waiting are dropped from the batch
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        BATCH_SIZE.observe(len(batch))
+        items = [item for item, _ in batch]
+        try:
+            results = await asyncio.get_event_loop().run_in_executor(self.executor, self.run_batch, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,200 @@
+"""
+Content Cache
+Input content digests and a size-bounded cache of separated stems
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+CHUNK_SIZE = 1024 * 1024
+
+# Content digests of recently hashed files, keyed by (path, size, mtime)
+_DIGEST_CACHE_SIZE = 256
+_digests: "OrderedDict[tuple, str]" = OrderedDict()
+_digest_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, read in chunks; repeat calls for an unchanged file are cached"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        digest = _digests.get(key)
+        if digest is not None:
+            _digests.move_to_end(key)
+            return digest
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _digest_lock:
+        _digests[key] = digest
+        while len(_digests) > _DIGEST_CACHE_SIZE:
+            _digests.popitem(last=False)
+    return digest
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.glob("*.wav"))
+
+
+class StemCache:
+    """
+    Separated stems on disk, one directory of WAV files per (input content, model, parameters)
+
+    Separators write every stem of a pass into the cache, so a later request for
+    another stem of the same input is a file copy. Least-recently-used entries are
+    evicted over max_bytes; the entry just stored is always kept.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: Optional["OrderedDict[Path, int]"] = None  # entry dir -> bytes, LRU order
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        if self._entries is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            dirs = [p for p in self.cache_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+            dirs.sort(key=lambda p: p.stat().st_mtime)
+            self._entries = OrderedDict((p, _dir_size(p)) for p in dirs)
+
+    def key(self, input_path: str, model: str, **params) -> str:
+        """Cache key for an input separated by a model with the given parameters"""
+        sha = hashlib.sha256(file_digest(input_path).encode())
+        sha.update(json.dumps({"model": model, "params": params}, sort_keys=True).encode())
+        return sha.hexdigest()
+
+    def get(self, key: str, dest_dir: str) -> Dict[str, Path]:
+        """
+        Link (or copy) a cached separation's stems into dest_dir
+
+        The files are taken under the cache lock, so a concurrent put() cannot
+        evict them half-way; the caller owns the returned files.
+
+        Returns:
+            Stem name -> WAV path in dest_dir, or an empty dict on a miss
+        """
+        with self._lock:
+            self._load_index()
+            entry = self.cache_dir / key
+            cached = sorted(entry.glob("*.wav")) if entry in self._entries else []
+            stems = {}
+            try:
+                if cached:
+                    os.utime(entry)
+                    Path(dest_dir).mkdir(parents=True, exist_ok=True)
+                for path in cached:
+                    stems[path.stem] = Path(dest_dir) / path.name
+                    try:
+                        os.link(path, stems[path.stem])
+                    except OSError:
+                        shutil.copy(path, stems[path.stem])
+            except FileNotFoundError:
+                # Removed from the cache directory behind our back
+                stems = {}
+            if not stems:
+                self._entries.pop(entry, None)
+                self.misses += 1
+                return {}
+            self._entries.move_to_end(entry)
+            self.hits += 1
+        return stems
+
+    def put(self, key: str, stems: Dict[str, Path]) -> bool:
+        """
+        Store a separation's stems
+
+        Args:
+            stems: Stem name -> WAV file written by the separator (copied into the cache)
+
+        Returns:
+            True if the stems were stored
+        """
+        with self._lock:
+            self._load_index()
+            entry = self.cache_dir / key
+            tmp = self.cache_dir / f".{key}.tmp"
+            try:
+                shutil.rmtree(tmp, ignore_errors=True)
+                tmp.mkdir()
+                for name, path in stems.items():
+                    shutil.copy(path, tmp / f"{name}.wav")
+                shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp, entry)
+            except OSError as e:
+                # A full or read-only cache disk must not fail the separation itself
+                print(f"[StemCache] Could not store {key}: {e}")
+                shutil.rmtree(tmp, ignore_errors=True)
+                return False
+            self._entries[entry] = _dir_size(entry)
+            self._entries.move_to_end(entry)
+
+            total = sum(self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                victim, size = self._entries.popitem(last=False)
+                shutil.rmtree(victim, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._load_index()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": sum(self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+
+def export_stem(stems: Dict[str, Path], stem: str, output_path: str) -> str:
+    """
+    Write one stem to output_path. "no_<stem>" (e.g. no_vocals) is the mix of every other stem.
+
+    Raises:
+        ValueError: If the stem is not among the separated stems
+    """
+    if stem in stems:
+        shutil.copy(stems[stem], output_path)
+        return output_path
+
+    excluded = stem[3:] if stem.startswith("no_") else None
+    if excluded not in stems:
+        raise ValueError(f"{stem} not found. Available: {', '.join(sorted(stems))}")
+
+    import numpy as np
+    import soundfile as sf
+    mix, sample_rate = None, None
+    for name, path in stems.items():
+        if name == excluded:
+            continue
+        audio, sample_rate = sf.read(str(path), dtype="float32", always_2d=True)
+        mix = audio if mix is None else mix + audio
+    # Rescale rather than clip, like demucs.separate's default
+    peak = float(np.abs(mix).max()) if mix.size else 0.0
+    if peak > 0.99:
+        mix *= 0.99 / peak
+    sf.write(output_path, mix, sample_rate, subtype="PCM_16")
+    return output_path
+
+
+STEM_CACHE_DIR = Path(os.environ.get("AUDIOKNIFE_STEM_CACHE_DIR", Path(tempfile.gettempdir()) / "audioknife_stems"))
+STEM_CACHE_MAX_MB = int(os.environ.get("AUDIOKNIFE_STEM_CACHE_MAX_MB", "4096"))
+STEM_CACHE = StemCache(STEM_CACHE_DIR, STEM_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,77 @@
+"""
+Cost Model
+Estimates job processing time from audio duration and per-mode real-time factors
+"""
+
+import threading
+from typing import Dict, Optional
+
+# Starting real-time factors (processing seconds per audio second), refined online
+DEFAULT_RTF = {
+    "resemble_denoise": 0.5,
+    "resemble_enhance": 2.0,
+    "demucs": 0.5,
+    "denoiser": 0.1,
+    "spleeter_2stems": 0.2,
+    "spleeter_4stems": 0.3,
+    "spleeter_5stems": 0.35,
+}
+
+
+def audio_duration(path: str) -> Optional[float]:
+    """Duration in seconds read from the file header (None if it cannot be read)"""
+    try:
+        import soundfile as sf
+        return sf.info(path).duration
+    except Exception:
+        pass
+    try:
+        import torchaudio
+        info = torchaudio.info(path)
+        return info.num_frames / info.sample_rate if info.sample_rate else None
+    except Exception:
+        return None
+
+
+class CostModel:
+    """
+    Per-mode real-time factors, updated with an exponential moving average
+    of the factors measured on finished jobs
+    """
+
+    def __init__(self, initial_rtf: Optional[Dict[str, float]] = None, smoothing: float = 0.2,
+                 fallback_rtf: float = 1.0):
+        self._rtf = dict(initial_rtf or DEFAULT_RTF)
+        self._samples: Dict[str, int] = {}
+        self.smoothing = smoothing
+        self.fallback_rtf = fallback_rtf
+        self._lock = threading.Lock()
+
+    def rtf(self, mode: str) -> float:
+        with self._lock:
+            return self._rtf.get(mode, self.fallback_rtf)
+
+    def estimate(self, mode: str, audio_seconds: Optional[float]) -> Optional[float]:
+        """Estimated processing seconds (None when the duration is unknown)"""
+        if audio_seconds is None:
+            return None
+        return audio_seconds * self.rtf(mode)
+
+    def update(self, mode: str, processing_seconds: float, audio_seconds: float):
+        """Fold a finished job's measured real-time factor into the estimate"""
+        if not audio_seconds or processing_seconds <= 0:
+            return
+        measured = processing_seconds / audio_seconds
+        with self._lock:
+            # The built-in guess seeds the average, so one outlier cannot replace it
+            current = self._rtf.get(mode, measured)
+            self._rtf[mode] = current + self.smoothing * (measured - current)
+            self._samples[mode] = self._samples.get(mode, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Current factors and how many jobs informed each, as reported on /status"""
+        with self._lock:
+            return {
+                mode: {"rtf": round(rtf, 4), "samples": self._samples.get(mode, 0)}
+                for mode, rtf in self._rtf.items()
+            }
@@ -0,0 +1,264 @@
+"""
+Demucs Engine
+Keeps a Demucs model resident and separates audio through the demucs Python API
+
+Imported by DemucsProcessor when demucs is installed in the server's environment,
+or run as a script with the Demucs venv's Python, serving jobs as JSON lines:
+
+  ready     -> {"ready": true, "load_time": s, "memory_bytes": n, "samplerate": sr, "sources": [...]}
+  failed    -> {"ready": false, "error": "..."}
+  job       <- {"id": "...", "input": "...", "output_dir": "...", "options": {...}}
+  progress  -> {"id": "...", "progress": fraction}
+  result    -> {"id": "...", "ok": true/false, "error": "...", "stems": {name: path}, "elapsed": s,
+                "audio_seconds": s}
+  shutdown  <- {"command": "shutdown"}
+
+This file has no imports from the processors package so the venv can run it directly.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+# Per-request parameters and their demucs.separate defaults
+DEFAULT_OVERLAP = 0.25
+DEFAULT_SHIFTS = 1
+MAX_SHIFTS = 20
+
+
+def check_options(segment: Optional[float] = None, overlap: Optional[float] = None,
+                  shifts: Optional[int] = None) -> dict:
+    """
+    Validate separation parameters
+
+    Args:
+        segment: Seconds of audio per model call (None = the model's trained length)
+        overlap: Fraction of overlap between consecutive segments, in [0, 1)
+        shifts: Random time-shift passes averaged together (more = better, slower)
+
+    Raises:
+        ValueError: If a parameter is out of range
+    """
+    if segment is not None and segment <= 0:
+        raise ValueError("segment must be positive")
+    if overlap is not None and not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    if shifts is not None and not 0 <= shifts <= MAX_SHIFTS:
+        raise ValueError(f"shifts must be between 0 and {MAX_SHIFTS}")
+    return {
+        "segment": segment,
+        "overlap": DEFAULT_OVERLAP if overlap is None else overlap,
+        "shifts": DEFAULT_SHIFTS if shifts is None else int(shifts),
+    }
+
+
+class DemucsEngine:
+    """A loaded Demucs model (htdemucs by default) that separates waveforms into stem tensors"""
+
+    def __init__(self, model: str = "htdemucs", device: str = "cpu"):
+        self.model_name = model
+        self.device = device
+        self._model = None
+        # apply_model's progress hook is module-global, so separations take turns
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the model weights once"""
+        if self._model is None:
+            from demucs.pretrained import get_model
+            model = get_model(self.model_name)
+            model.eval()
+            self._model = model.to(self.device)
+        return self._model
+
+    @property
+    def samplerate(self) -> int:
+        return self.load().samplerate
+
+    @property
+    def sources(self):
+        return list(self.load().sources)
+
+    @property
+    def max_segment(self) -> Optional[float]:
+        """Longest segment the model's transformers were trained on (None if unbounded)"""
+        from demucs.htdemucs import HTDemucs
+        models = getattr(self.load(), "models", [self._model])
+        limits = [float(m.segment) for m in models if isinstance(m, HTDemucs)]
+        return min(limits) if limits else None
+
+    def memory_bytes(self) -> int:
+        if self._model is None:
+            return 0
+        tensors = list(self._model.parameters()) + list(self._model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def unload(self):
+        self._model = None
+        if self.device == "cuda":
+            import torch
+            torch.cuda.empty_cache()
+        elif self.device == "mps":
+            import torch
+            torch.mps.empty_cache()
+
+    def separate(self, waveform, sample_rate: int, segment: Optional[float] = None,
+                 overlap: float = DEFAULT_OVERLAP, shifts: int = DEFAULT_SHIFTS,
+                 on_progress: Optional[Callable[[float], None]] = None) -> Dict[str, "torch.Tensor"]:
+        """
+        Separate a waveform into stems
+
+        Args:
+            waveform: Tensor of shape (channels, frames)
+            sample_rate: Sample rate of waveform (converted to the model's rate)
+            segment, overlap, shifts: See check_options
+            on_progress: Called with the completed fraction after each segment
+
+        Returns:
+            Stem name -> tensor of shape (channels, frames) at self.samplerate, on the CPU
+        """
+        import torch
+        from demucs.apply import apply_model
+        from demucs.audio import convert_audio
+
+        model = self.load()
+        max_segment = self.max_segment
+        if segment is not None and max_segment is not None and segment > max_segment:
+            raise ValueError(f"segment {segment}s is longer than {self.model_name} supports ({max_segment:.1f}s)")
+
+        wav = convert_audio(waveform, sample_rate, model.samplerate, model.audio_channels)
+        # Same normalization as demucs.separate
+        ref = wav.mean(0)
+        mean, std = ref.mean(), ref.std()
+        wav = (wav - mean) / (std + 1e-8)
+
+        passes = len(getattr(model, "models", [model])) * max(shifts, 1)
+        with self._lock, self._report_segments(on_progress, passes), torch.no_grad():
+            sources = apply_model(
+                model, wav[None], shifts=shifts, split=True, overlap=overlap,
+                progress=on_progress is not None, device=self.device, segment=segment
+            )[0]
+        sources = sources * (std + 1e-8) + mean
+        return {name: source.cpu() for name, source in zip(model.sources, sources)}
+
+    def separate_file(self, input_path: str, output_dir: str,
+                      on_progress: Optional[Callable[[float], None]] = None, **options) -> Tuple[Dict[str, str], float]:
+        """
+        Separate a file and write every stem to output_dir as <stem>.wav
+
+        Returns:
+            (stem name -> WAV path, duration of the input in seconds)
+        """
+        import torchaudio
+        from demucs.audio import save_audio
+
+        waveform, sample_rate = torchaudio.load(input_path)
+        separated = self.separate(waveform, sample_rate, on_progress=on_progress, **check_options(**options))
+        paths = {}
+        for name, source in separated.items():
+            paths[name] = os.path.join(output_dir, f"{name}.wav")
+            # Same encoding as demucs.separate's default output: 16-bit WAV, rescaled to avoid clipping
+            save_audio(source, paths[name], samplerate=self.samplerate)
+        return paths, waveform.shape[-1] / sample_rate
+
+    @contextmanager
+    def _report_segments(self, on_progress: Optional[Callable[[float], None]], passes: int):
+        """Swap apply_model's tqdm for a hook reporting the fraction of segments done"""
+        if on_progress is None:
+            yield
+            return
+        import demucs.apply as apply_module
+        state = {"pass": 0}
+
+        def reporting_tqdm(iterable, **kwargs):
+            items = list(iterable)
+            for i, item in enumerate(items):
+                yield item
+                on_progress(min((state["pass"] + (i + 1) / len(items)) / passes, 1.0))
+            state["pass"] += 1
+
+        original = apply_module.tqdm
+        apply_module.tqdm = types.SimpleNamespace(tqdm=reporting_tqdm)
+        try:
+            yield
+        finally:
+            apply_module.tqdm = original
+
+
+# ===== Worker =====
+
+def serve(engine: DemucsEngine, channel) -> int:
+    """Load the model, then separate the jobs read from stdin until shutdown"""
+
+    def send(message):
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+    start = time.time()
+    try:
+        engine.load()
+    except Exception as e:
+        send({"ready": False, "error": f"{type(e).__name__}: {e}"})
+        return 1
+    send({
+        "ready": True,
+        "load_time": round(time.time() - start, 3),
+        "memory_bytes": engine.memory_bytes(),
+        "samplerate": engine.samplerate,
+        "sources": engine.sources,
+    })
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError:
+            send({"id": None, "ok": False, "error": "Invalid JSON request"})
+            continue
+        if request.get("command") == "shutdown":
+            break
+
+        job_id = request.get("id")
+        job_start = time.time()
+        try:
+            stems, audio_seconds = engine.separate_file(
+                request["input"], request["output_dir"],
+                on_progress=lambda fraction: send({"id": job_id, "progress": round(fraction, 4)}),
+                **(request.get("options") or {})
+            )
+            send({"id": job_id, "ok": True, "stems": stems, "elapsed": round(time.time() - job_start, 3),
+                  "audio_seconds": round(audio_seconds, 3)})
+        except Exception as e:
+            send({"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}",
+                  "elapsed": round(time.time() - job_start, 3)})
+    return 0
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resident Demucs separation engine")
+    parser.add_argument("--model", default="htdemucs", help="Pretrained Demucs model name")
+    parser.add_argument("--device", default="cpu", help="Torch device (cpu, mps, cuda)")
+    args = parser.parse_args()
+
+    # stdout carries the protocol; anything the libraries print goes to stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1, encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    sys.exit(serve(DemucsEngine(args.model, args.device), channel))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(0)
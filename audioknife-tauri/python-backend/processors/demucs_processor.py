@@ -4,18 +4,128 @@ Wraps the Demucs model for music source separation / BGM removal
 """
 
 import asyncio
-import subprocess
+import collections
+import importlib.util
+import json
+import os
 import shutil
+import subprocess
+import tempfile
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+from .cache import STEM_CACHE, export_stem
+from .demucs_engine import check_options
+from .executors import EXECUTORS
+from .metrics import INFERENCE_SECONDS, MODEL_LOAD_SECONDS
+from .progress import ProgressCallback, ProgressTracker, run_with_tqdm_progress
+
+ENGINE_SCRIPT = Path(__file__).resolve().parent / "demucs_engine.py"
+
+# "resident" keeps the model loaded (in this process if demucs is importable here,
+# otherwise in a worker process on the Demucs venv); "cli" runs demucs.separate per job
+DEMUCS_ENGINE = os.environ.get("AUDIOKNIFE_DEMUCS_ENGINE", "resident")
+
+
+class _EngineProcess:
+    """demucs_engine.py running on the Demucs venv's Python, with the model resident"""
+
+    def __init__(self, python_path: Path, model: str, device: str):
+        self.python_path = python_path
+        self.model = model
+        self.device = device
+        self.memory_bytes = 0
+        self._process = None
+        self._stderr_tail = collections.deque(maxlen=50)
+        self._counter = 0
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _drain_stderr(self, stream):
+        # Keep the pipe drained so the engine never blocks on its own logging
+        for line in stream:
+            self._stderr_tail.append(line)
+
+    def start(self):
+        self._stderr_tail.clear()
+        with MODEL_LOAD_SECONDS.time(processor="demucs"):
+            self._process = subprocess.Popen(
+                [str(self.python_path), str(ENGINE_SCRIPT), "--model", self.model, "--device", self.device],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+                env=EXECUTORS.env("demucs")
+            )
+            threading.Thread(target=self._drain_stderr, args=(self._process.stderr,), daemon=True).start()
+            message = self._read_message()
+        if message is None or not message.get("ready"):
+            error = (message or {}).get("error") or "".join(self._stderr_tail)[-300:]
+            self.stop()
+            raise RuntimeError(f"Demucs engine failed to start: {error}")
+        self.memory_bytes = message.get("memory_bytes", 0)
+
+    def _read_message(self) -> Optional[dict]:
+        line = self._process.stdout.readline()
+        return json.loads(line) if line else None
+
+    def separate(self, input_path: str, output_dir: str, options: dict,
+                 tracker: ProgressTracker) -> Dict[str, str]:
+        if not self.is_alive():
+            self.start()
+        self._counter += 1
+        request = {"id": str(self._counter), "input": input_path, "output_dir": output_dir, "options": options}
+        try:
+            self._process.stdin.write(json.dumps(request) + "\n")
+            self._process.stdin.flush()
+            message = self._read_message()
+            # Progress reports arrive before the result
+            while message is not None and "progress" in message:
+                tracker.update_fraction(message["progress"])
+                message = self._read_message()
+        except BaseException:
+            # Cancelled (or the pipe broke) mid-job: the engine is still busy with it,
+            # so drop it; the next job starts a fresh one
+            self.stop(kill=True)
+            raise
+        if message is None:
+            self.stop(kill=True)
+            raise RuntimeError(f"Demucs engine exited unexpectedly: {''.join(self._stderr_tail)[-300:]}")
+        if not message.get("ok"):
+            raise RuntimeError(message.get("error") or "Demucs engine failed")
+        return message["stems"]
+
+    def stop(self, kill: bool = False):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            if kill or process.poll() is not None:
+                process.kill()
+            else:
+                process.stdin.write(json.dumps({"command": "shutdown"}) + "\n")
+                process.stdin.flush()
+                process.wait(timeout=5)
+        except Exception:
+            process.kill()
+
 
 class DemucsProcessor:
     """Processor for Demucs audio source separation"""
-    
-    def __init__(self, model: str = "htdemucs"):
+
+    def __init__(self, model: str = "htdemucs", device: Optional[str] = None):
         self.model = model
+        self.device = device or ("mps" if self._check_mps() else "cpu")
         self._venv_path = self._find_venv()
-    
+        self._engine = None
+        self._engine_process = None
+        # One separation at a time on the resident model
+        self._lock = threading.Lock()
+
     def _find_venv(self) -> Optional[Path]:
         """Find Demucs virtual environment"""
         search_paths = [
@@ -23,73 +133,163 @@ class DemucsProcessor:
             Path.home() / "demucs_venv",
             Path.home() / ".demucs",
         ]
-        
+
         for path in search_paths:
             if (path / "bin" / "python").exists():
                 return path
         return None
-    
+
+    def memory_bytes(self) -> int:
+        """Size of the resident model (held in the engine process when one is running)"""
+        if self._engine is not None:
+            return self._engine.memory_bytes()
+        if self._engine_process is not None and self._engine_process.is_alive():
+            return self._engine_process.memory_bytes
+        return 0
+
+    def unload(self):
+        """Release the resident model"""
+        with self._lock:
+            if self._engine is not None:
+                self._engine.unload()
+                self._engine = None
+            if self._engine_process is not None:
+                self._engine_process.stop()
+                self._engine_process = None
+
     async def separate(
-        self, 
-        input_path: str, 
+        self,
+        input_path: str,
         output_path: str,
-        stems: str = "vocals"
+        stems: str = "vocals",
+        on_progress: Optional[ProgressCallback] = None,
+        segment: Optional[float] = None,
+        overlap: Optional[float] = None,
+        shifts: Optional[int] = None
     ) -> str:
         """
         Separate audio sources using Demucs
-        
+
         Args:
             input_path: Path to input audio file
             output_path: Path to output audio file
-            stems: Which stem to extract (vocals, drums, bass, other)
-            
+            stems: Which stem to extract (vocals, drums, bass, other, or no_vocals for the accompaniment)
+            on_progress: Called with processed seconds, RTF and ETA as demucs advances
+            segment: Seconds per model call (default: the model's trained length)
+            overlap: Overlap between segments, in [0, 1) (default 0.25)
+            shifts: Random-shift passes to average; more is better and proportionally slower (default 1)
+
         Returns:
             Path to extracted stem
+
+        Every stem of the pass is kept in the stem cache, so asking for another stem
+        of the same input with the same parameters does not run the model again.
         """
+        options = check_options(segment, overlap, shifts)
         return await asyncio.get_event_loop().run_in_executor(
-            None, self._separate_sync, input_path, output_path, stems
+            EXECUTORS.get("demucs"), self._separate_sync, input_path, output_path, stems, options, on_progress
         )
-    
-    def _separate_sync(self, input_path: str, output_path: str, stems: str) -> str:
+
+    def _separate_sync(self, input_path: str, output_path: str, stems: str, options: dict,
+                       on_progress: Optional[ProgressCallback] = None) -> str:
         """Synchronous separation implementation"""
-        import tempfile
-        
+        tracker = ProgressTracker("demucs", self._duration(input_path), on_progress)
+        key = STEM_CACHE.key(input_path, f"demucs:{self.model}", **options)
+        # Held across the cache check so concurrent requests for one input separate it once
+        with self._lock, tempfile.TemporaryDirectory() as temp_dir:
+            cached = STEM_CACHE.get(key, os.path.join(temp_dir, "cached"))
+            if cached:
+                tracker.update_fraction(1.0)
+                return export_stem(cached, stems, output_path)
+
+            if DEMUCS_ENGINE == "cli":
+                separated = self._separate_cli(input_path, temp_dir, options, on_progress)
+            else:
+                separated = self._separate_resident(input_path, temp_dir, options, tracker)
+            separated = {name: Path(path) for name, path in separated.items()}
+            STEM_CACHE.put(key, separated)
+            export_stem(separated, stems, output_path)
+
+        tracker.update_fraction(1.0)
+        return output_path
+
+    def _separate_resident(self, input_path: str, output_dir: str, options: dict,
+                           tracker: ProgressTracker) -> Dict[str, str]:
+        """Separate every stem into output_dir on the resident model (call with self._lock held)"""
+        if importlib.util.find_spec("demucs") is not None:
+            if self._engine is None:
+                from .demucs_engine import DemucsEngine
+                self._engine = DemucsEngine(self.model, self.device)
+                with MODEL_LOAD_SECONDS.time(processor="demucs"):
+                    self._engine.load()
+            with INFERENCE_SECONDS.time(processor="demucs"):
+                separated, _ = self._engine.separate_file(input_path, output_dir, tracker.update_fraction, **options)
+            return separated
+
+        if self._venv_path is None:
+            raise RuntimeError("Demucs virtual environment not found")
+        if self._engine_process is None:
+            self._engine_process = _EngineProcess(self._venv_path / "bin" / "python", self.model, self.device)
+        if not self._engine_process.is_alive():
+            self._engine_process.start()
+        with INFERENCE_SECONDS.time(processor="demucs"):
+            return self._engine_process.separate(input_path, output_dir, options, tracker)
+
+    def _separate_cli(self, input_path: str, output_dir: str, options: dict,
+                      on_progress: Optional[ProgressCallback] = None) -> Dict[str, str]:
+        """Run demucs.separate in a fresh process (loads the model on every call)"""
         if self._venv_path is None:
             raise RuntimeError("Demucs virtual environment not found")
-        
+
         python_path = self._venv_path / "bin" / "python"
-        
+
         # Create temp output directory
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
-            
-            # Run demucs
+
+            # Run demucs (all stems, no --two-stems)
             cmd = [
                 str(python_path), "-m", "demucs.separate",
                 "-n", self.model,
-                "--two-stems=vocals",
-                "-d", "mps" if self._check_mps() else "cpu",
+                "-d", self.device,
+                "--overlap", str(options["overlap"]),
+                "--shifts", str(options["shifts"]),
                 "-o", str(temp_path),
                 input_path
             ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                raise RuntimeError(f"Demucs failed: {result.stderr}")
-            
-            # Find output file
+            if options["segment"] is not None:
+                cmd[-1:-1] = ["--segment", str(options["segment"])]
+
+            # The subprocess loads the model on every run, so this includes load time
+            with INFERENCE_SECONDS.time(processor="demucs"):
+                returncode, stderr = run_with_tqdm_progress(
+                    cmd, ProgressTracker("demucs", 0.0, on_progress), env=EXECUTORS.env("demucs")
+                )
+
+            if returncode != 0:
+                raise RuntimeError(f"Demucs failed: {stderr}")
+
+            # Find output files
             input_name = Path(input_path).stem
-            vocals_path = temp_path / self.model / input_name / f"{stems}.wav"
-            
-            if not vocals_path.exists():
-                raise RuntimeError(f"Output not found: {vocals_path}")
-            
-            # Copy to output path
-            shutil.copy(vocals_path, output_path)
-        
-        return output_path
-    
+            stem_dir = temp_path / self.model / input_name
+            stem_files = list(stem_dir.glob("*.wav"))
+
+            if not stem_files:
+                raise RuntimeError(f"Output not found: {stem_dir}")
+
+            # Move out of the demucs output tree before it is removed
+            separated = {}
+            for stem_file in stem_files:
+                separated[stem_file.stem] = shutil.move(str(stem_file), os.path.join(output_dir, stem_file.name))
+
+        return separated
+
+    @staticmethod
+    def _duration(input_path: str) -> float:
+        """Input duration for progress reports (0 if the header cannot be read)"""
+        from .cost import audio_duration
+        return audio_duration(input_path) or 0.0
+
     def _check_mps(self) -> bool:
         """Check if MPS is available"""
         try:
@@ -0,0 +1,219 @@
+"""
+Denoiser Streaming Processor
+Wraps Facebook Denoiser's DemucsStreamer for real-time denoising of PCM streams
+"""
+
+import copy
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import torch
+
+from .metrics import INFERENCE_SECONDS, IO_SECONDS, MODEL_LOAD_SECONDS
+from .registry import module_memory_bytes
+
+# The bundled denoiser package lives at <repo>/denoiser/denoiser
+DENOISER_DIR = Path(__file__).resolve().parents[3] / "denoiser"
+
+# Causal pre-trained models (the only ones DemucsStreamer can run frame by frame)
+STREAMING_MODELS = ("dns48", "dns64", "master64")
+
+# PCM sample formats accepted on the wire: numpy dtype and scale to [-1, 1]
+SAMPLE_FORMATS = {
+    "s16le": ("<i2", 32768.0),
+    "f32le": ("<f4", 1.0),
+}
+
+
+class DenoiserProcessor:
+    """Holds one causal Demucs denoiser model, shared by all streaming sessions"""
+
+    def __init__(self, model: str = "dns64", device: str = "cpu"):
+        if model not in STREAMING_MODELS:
+            raise ValueError(f"Model {model} cannot stream; choose one of {', '.join(STREAMING_MODELS)}")
+        self.model_name = model
+        self.device = device
+        self._model = None
+
+    def _load_model(self):
+        """Lazy load the model"""
+        if self._model is None:
+            # Prefer the bundled copy; the repo root on sys.path would otherwise
+            # resolve "denoiser" to its outer directory
+            if (DENOISER_DIR / "denoiser" / "__init__.py").exists() and str(DENOISER_DIR) not in sys.path:
+                sys.path.insert(0, str(DENOISER_DIR))
+            try:
+                from denoiser import pretrained
+            except ImportError:
+                raise ImportError("denoiser not found. Run: pip install denoiser")
+            with MODEL_LOAD_SECONDS.time(processor="denoiser"):
+                model = getattr(pretrained, self.model_name)()
+                self._model = model.to(self.device).eval()
+        return self._model
+
+    @property
+    def sample_rate(self) -> int:
+        return self._load_model().sample_rate
+
+    def memory_bytes(self) -> int:
+        """Size of the loaded model weights"""
+        return module_memory_bytes(self._model)
+
+    def unload(self):
+        """Release the model weights"""
+        self._model = None
+
+    def load_input(self, input_path: str) -> torch.Tensor:
+        """Load a file as a mono (1, frames) tensor at the model's sample rate"""
+        import torchaudio
+        
+        with IO_SECONDS.time(processor="denoiser", op="read"):
+            audio, sr = torchaudio.load(input_path)
+            audio = audio.mean(dim=0, keepdim=True)
+            if sr != self.sample_rate:
+                audio = torchaudio.functional.resample(audio, sr, self.sample_rate)
+        return audio
+    
+    def save_output(self, output_path: str, audio: torch.Tensor):
+        """Save a (1, frames) tensor at the model's sample rate"""
+        import torchaudio
+        
+        with IO_SECONDS.time(processor="denoiser", op="write"):
+            torchaudio.save(output_path, audio.clamp(-1.0, 1.0).cpu(), self.sample_rate)
+    
+    def denoise_batch(self, waveforms: List[torch.Tensor], dry: float = 0.0) -> List[torch.Tensor]:
+        """
+        Denoise several (1, frames) clips in one forward pass
+        
+        Each clip is normalized over its own length (as Demucs.forward does for
+        a single clip), zero padded to the model's valid length for the longest
+        clip, and cropped back afterwards. The models are causal, so the extra
+        padding does not leak into earlier samples and results match one-by-one
+        inference.
+        """
+        model = self._load_model()
+        # Shares the weights; normalization is done per clip below instead
+        batch_model = copy.copy(model)
+        batch_model.normalize = False
+        
+        lengths = [wav.shape[-1] for wav in waveforms]
+        padded_length = model.valid_length(max(lengths))
+        batch = torch.zeros(len(waveforms), model.chin, padded_length, device=self.device)
+        stds = []
+        for i, wav in enumerate(waveforms):
+            wav = wav.to(self.device)
+            std = 1.0
+            if model.normalize:
+                std = wav.mean(dim=0).std()
+                wav = wav / (model.floor + std)
+            batch[i, :, :wav.shape[-1]] = wav
+            stds.append(std)
+        
+        with torch.no_grad(), INFERENCE_SECONDS.time(processor="denoiser"):
+            estimates = batch_model(batch)
+        
+        results = []
+        for i, (wav, length) in enumerate(zip(waveforms, lengths)):
+            estimate = estimates[i, :, :length] * stds[i]
+            results.append((1 - dry) * estimate.cpu() + dry * wav.cpu())
+        return results
+    
+    def session(self, dry: float = 0.0, num_frames: int = 1, channels: int = 1,
+                sample_format: str = "f32le") -> "DenoiseSession":
+        """Start a streaming session with its own DemucsStreamer state"""
+        return DenoiseSession(self._load_model(), self.device, dry, num_frames, channels, sample_format)
+
+
+class DenoiseSession:
+    """
+    One connection's streaming state: PCM bytes in, enhanced mono PCM bytes out
+
+    Input is interleaved PCM at the model's sample rate; multichannel input is
+    downmixed to mono. Output uses the same sample format as the input.
+    """
+
+    def __init__(self, model, device: str, dry: float, num_frames: int, channels: int, sample_format: str):
+        from denoiser.demucs import DemucsStreamer
+
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        self.device = device
+        self.channels = channels
+        self.dtype, self.scale = SAMPLE_FORMATS[sample_format]
+        self.frame_bytes = np.dtype(self.dtype).itemsize * channels
+        self.sample_rate = model.sample_rate
+        self._new_streamer = lambda: DemucsStreamer(model, dry=dry, num_frames=num_frames)
+        self.streamer = self._new_streamer()
+        self._remainder = b""
+        # Frames and model time of streamers retired by flush
+        self._past_frames = 0
+        self._past_time = 0.0
+
+        self.started = time.time()
+        self.samples_in = 0
+        self.samples_out = 0
+        self.compute_time = 0.0
+
+    @property
+    def algorithmic_latency_ms(self) -> float:
+        """Delay introduced by the model's window and lookahead"""
+        return self.streamer.total_length / self.sample_rate * 1000
+
+    @property
+    def stride_ms(self) -> float:
+        return self.streamer.stride / self.sample_rate * 1000
+
+    def feed(self, data: bytes) -> bytes:
+        """Denoise a chunk of PCM; returns as much output as is ready"""
+        data = self._remainder + data
+        usable = len(data) - len(data) % self.frame_bytes
+        self._remainder = data[usable:]
+        if not usable:
+            return b""
+
+        pcm = np.frombuffer(data[:usable], dtype=self.dtype).reshape(-1, self.channels)
+        mono = pcm.astype(np.float32).mean(axis=1) / self.scale
+        self.samples_in += len(mono)
+        return self._run(lambda: self.streamer.feed(torch.from_numpy(mono).to(self.device)[None]))
+
+    def flush(self) -> bytes:
+        """Return the remaining output and reset the model state for a new utterance"""
+        self._remainder = b""
+        out = self._run(self.streamer.flush)
+        # A flushed DemucsStreamer cannot take more input, so the next utterance gets a fresh one
+        self._past_frames += self.streamer.frames
+        self._past_time += self.streamer.total_time
+        self.streamer = self._new_streamer()
+        return out
+
+    def _run(self, step) -> bytes:
+        begin = time.time()
+        with torch.no_grad():
+            out = step()[0].cpu().numpy()
+        self.compute_time += time.time() - begin
+        self.samples_out += len(out)
+
+        if self.scale != 1.0:
+            out = np.clip(out * self.scale, -self.scale, self.scale - 1)
+        return out.astype(self.dtype).tobytes()
+
+    def stats(self) -> dict:
+        """Latency and real-time factor for this connection"""
+        audio_seconds = self.samples_in / self.sample_rate
+        frames = self._past_frames + self.streamer.frames
+        total_time = self._past_time + self.streamer.total_time
+        time_per_frame_ms = total_time / frames * 1000 if frames else None
+        return {
+            "type": "stats",
+            "processed_seconds": round(audio_seconds, 3),
+            "output_seconds": round(self.samples_out / self.sample_rate, 3),
+            "algorithmic_latency_ms": round(self.algorithmic_latency_ms, 1),
+            # Audio received but not yet returned, including the model's lookahead
+            "buffered_ms": round((self.samples_in - self.samples_out) / self.sample_rate * 1000, 1),
+            "time_per_frame_ms": round(time_per_frame_ms, 2) if time_per_frame_ms is not None else None,
+            "rtf": round(self.compute_time / audio_seconds, 3) if audio_seconds else None,
+            "connected_seconds": round(time.time() - self.started, 1),
+        }
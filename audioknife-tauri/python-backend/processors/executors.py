@@ -0,0 +1,149 @@
+"""
+Processor Executors
+Dedicated thread pools per processor with an explicit CPU thread budget
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+# Concurrent jobs per processor; override with e.g. AUDIOKNIFE_EXECUTORS="resemble=2,demucs=1"
+DEFAULT_EXECUTOR_WORKERS = {
+    "resemble": 1,
+    "demucs": 1,
+    "spleeter": 1,
+    "denoiser": 1,
+    "denoiser_stream": 1,
+}
+
+# Executors serving live streams rather than queued jobs. They are left out of the
+# job count the cores are divided by, and each of their threads gets
+# STREAM_THREADS intra-op threads: a streaming frame is too small to spread wider.
+STREAM_EXECUTORS = {"denoiser_stream"}
+STREAM_THREADS = 1
+
+
+def physical_cores() -> int:
+    """Physical core count (falls back to logical cores without psutil)"""
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    except ImportError:
+        pass
+    return os.cpu_count() or 1
+
+
+def parse_workers(spec: str) -> Dict[str, int]:
+    """Parse "name=count,name=count" into a dict"""
+    workers = {}
+    for item in spec.split(","):
+        name, _, count = item.partition("=")
+        if name.strip() and count.strip():
+            workers[name.strip()] = max(int(count), 1)
+    return workers
+
+
+class ExecutorPool:
+    """
+    One ThreadPoolExecutor per processor, sized so that all concurrent jobs
+    together use the physical cores once: each job gets cores // total_jobs
+    intra-op threads (stream executors run outside this budget). In-process torch work picks this up through
+    torch.set_num_threads in each executor thread; subprocess backends get it
+    through OMP/MKL environment variables.
+    """
+
+    def __init__(self, workers: Dict[str, int], cores: Optional[int] = None,
+                 interop_threads: int = 1):
+        self.workers = dict(workers)
+        self.cores = cores or physical_cores()
+        self.interop_threads = interop_threads
+        self.threads_per_job = max(self.cores // max(self.total_workers, 1), 1)
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+        self._interop_set = False
+
+    @classmethod
+    def from_env(cls) -> "ExecutorPool":
+        workers = dict(DEFAULT_EXECUTOR_WORKERS)
+        workers.update(parse_workers(os.environ.get("AUDIOKNIFE_EXECUTORS", "")))
+        cores = int(os.environ.get("AUDIOKNIFE_CPU_CORES", "0")) or None
+        interop = int(os.environ.get("AUDIOKNIFE_INTEROP_THREADS", "1"))
+        return cls(workers, cores, interop)
+
+    @property
+    def total_workers(self) -> int:
+        """Jobs that can run at once across the job executors"""
+        return sum(count for name, count in self.workers.items() if name not in STREAM_EXECUTORS)
+
+    def threads(self, name: str) -> int:
+        """Intra-op threads for one task on a processor's executor"""
+        return STREAM_THREADS if name in STREAM_EXECUTORS else self.threads_per_job
+
+    def get(self, name: str) -> ThreadPoolExecutor:
+        """Executor for a processor (created on first use)"""
+        with self._lock:
+            executor = self._executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.workers.get(name, 1),
+                    thread_name_prefix=f"{name}-executor",
+                    initializer=self._init_thread,
+                    initargs=(self.threads(name),)
+                )
+                self._executors[name] = executor
+            return executor
+
+    def env(self, name: str) -> Dict[str, str]:
+        """Environment for a processor's subprocess backend, limited to one job's thread budget"""
+        threads = str(self.threads(name))
+        env = dict(os.environ)
+        env.update({
+            "OMP_NUM_THREADS": threads,
+            "MKL_NUM_THREADS": threads,
+            "OPENBLAS_NUM_THREADS": threads,
+            "VECLIB_MAXIMUM_THREADS": threads,
+            "NUMEXPR_NUM_THREADS": threads,
+        })
+        return env
+
+    def allocation(self) -> Dict[str, object]:
+        """Thread allocation as reported on /status"""
+        return {
+            "physical_cores": self.cores,
+            "concurrent_jobs": self.total_workers,
+            "interop_threads": self.interop_threads,
+            "processors": {
+                name: {"workers": count, "intra_op_threads": self.threads(name)}
+                for name, count in self.workers.items()
+            },
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=False)
+
+    def _init_thread(self, threads: int):
+        try:
+            import torch
+        except ImportError:
+            return
+
+        # Inter-op threads can only be set once per process, before any parallel work
+        with self._lock:
+            if not self._interop_set:
+                self._interop_set = True
+                try:
+                    torch.set_num_interop_threads(self.interop_threads)
+                except RuntimeError:
+                    pass
+        # With OpenMP builds this applies to parallel regions started from this thread
+        torch.set_num_threads(threads)
+
+
+EXECUTORS = ExecutorPool.from_env()
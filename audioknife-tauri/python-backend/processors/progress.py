@@ -0,0 +1,143 @@
+"""
+Progress Reporting
+Chunk-level progress, real-time factor and ETA for processing backends
+"""
+
+import re
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, List, Tuple
+
+ProgressCallback = Callable[[dict], None]
+
+
+class JobCancelled(Exception):
+    """Raised from a progress callback to stop a job at its next chunk"""
+
+# tqdm progress lines, e.g. " 45%|####      | 15.2/35.1 [00:05<00:06, 2.95seconds/s]"
+TQDM_PROGRESS_RE = re.compile(r"(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?) \[")
+
+
+class ProgressTracker:
+    """Turns processed audio seconds into progress reports with RTF and ETA"""
+
+    def __init__(self, stage: str, total_seconds: float = 0.0, callback: Optional[ProgressCallback] = None):
+        self.stage = stage
+        self.total_seconds = total_seconds
+        self.callback = callback
+        self.start = time.time()
+
+    def update(self, processed_seconds: float):
+        """Report how many seconds of audio have been processed so far"""
+        if self.callback is None:
+            return
+
+        elapsed = time.time() - self.start
+        fraction = min(processed_seconds / self.total_seconds, 1.0) if self.total_seconds else 0.0
+        self.callback({
+            "stage": self.stage,
+            "processed_seconds": processed_seconds,
+            "total_seconds": self.total_seconds,
+            "rtf": elapsed / processed_seconds if processed_seconds > 0 else None,
+            "eta": elapsed * (1.0 - fraction) / fraction if fraction > 0 else None,
+        })
+
+    def update_fraction(self, fraction: float):
+        """Report progress as a fraction of the whole job"""
+        self.update(min(max(fraction, 0.0), 1.0) * self.total_seconds)
+
+
+def run_with_tqdm_progress(cmd: List[str], tracker: Optional[ProgressTracker] = None,
+                           env: Optional[dict] = None) -> Tuple[int, str]:
+    """
+    Run a command whose stderr carries a tqdm bar counted in audio seconds
+    (e.g. demucs.separate), forwarding each update to the tracker
+
+    Returns:
+        (returncode, stderr text)
+    """
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        text=True, errors="replace", env=env
+    )
+    stderr_parts = []
+    buffer = ""
+    try:
+        while True:
+            data = process.stderr.read(256)
+            if not data:
+                break
+            stderr_parts.append(data)
+            buffer += data
+            # tqdm redraws with carriage returns; handle each complete segment
+            *segments, buffer = re.split(r"[\r\n]", buffer)
+            for segment in segments:
+                match = TQDM_PROGRESS_RE.search(segment)
+                if match and tracker is not None:
+                    tracker.total_seconds = float(match.group(2))
+                    tracker.update(float(match.group(1)))
+    except BaseException:
+        # The callback cancelled the job (or the caller is shutting down)
+        process.kill()
+        process.wait()
+        raise
+    process.wait()
+    return process.returncode, "".join(stderr_parts)
+
+
+# ===== Resemble Enhance chunk progress =====
+# resemble_enhance.inference iterates over its chunks with tqdm's trange. The loop is
+# replaced once with a reporting version; the tracker for the current job is looked up
+# per thread, so concurrent jobs report independently. The NFE solver itself has no
+# hook, so progress is reported per inference chunk.
+
+_resemble_state = threading.local()
+_resemble_lock = threading.Lock()
+_resemble_installed = False
+
+
+def _install_resemble_hook():
+    global _resemble_installed
+    with _resemble_lock:
+        if _resemble_installed:
+            return
+        _resemble_installed = True
+
+        try:
+            import resemble_enhance.inference as re_inference
+        except ImportError:
+            return
+        if not hasattr(re_inference, "trange"):
+            return
+
+        def reporting_trange(*args, **kwargs):
+            starts = range(*args)
+            for i, start in enumerate(starts):
+                yield start
+                tracker = getattr(_resemble_state, "tracker", None)
+                if tracker is not None:
+                    tracker.update_fraction((_resemble_state.pass_index + (i + 1) / len(starts)) / _resemble_state.passes)
+            _resemble_state.pass_index = getattr(_resemble_state, "pass_index", 0) + 1
+
+        re_inference.trange = reporting_trange
+
+
+@contextmanager
+def resemble_progress(tracker: Optional[ProgressTracker], passes: int = 1):
+    """
+    Route Resemble Enhance chunk progress to a tracker for the duration of a job
+
+    Args:
+        tracker: Progress tracker for the current job (None disables reporting)
+        passes: Number of inference passes the job runs (e.g. 2 for denoise + enhance)
+    """
+    _install_resemble_hook()
+    _resemble_state.tracker = tracker
+    _resemble_state.pass_index = 0
+    _resemble_state.passes = max(passes, 1)
+    try:
+        yield tracker
+    finally:
+        _resemble_state.tracker = None
@@ -0,0 +1,152 @@
+"""
+Model Registry
+Keeps loaded processors resident across requests, keyed by (processor, model, device)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Tuple
+
+ModelKey = Tuple[str, str, str]
+
+
+def module_memory_bytes(*modules) -> int:
+    """Bytes held by the parameters and buffers of torch modules (None entries are skipped)"""
+    total = 0
+    for module in modules:
+        if module is None:
+            continue
+        for tensor in list(module.parameters()) + list(module.buffers()):
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class _Entry:
+    def __init__(self, instance):
+        self.instance = instance
+        self.memory_bytes = 0
+        self.in_use = 0
+        self.last_used = time.time()
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """
+    LRU registry of loaded processors with a memory budget and an idle TTL
+
+    Processors may implement `memory_bytes()` (resident model size, re-measured
+    after each use since most load lazily) and `unload()` (release weights and
+    device caches). Processors that are in use are never evicted.
+    """
+
+    def __init__(self, memory_budget_bytes: int = 0, idle_ttl: float = 0):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_ttl = idle_ttl
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def use(self, key: ModelKey, factory: Callable[[], Any]):
+        """
+        Borrow the processor for a key, creating it with factory() if needed
+
+        Example:
+            with registry.use(("resemble", "enhancer", "mps"), ResembleProcessor) as processor:
+                await processor.denoise(input_path, output_path)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                entry = _Entry(factory())
+                self._entries[key] = entry
+            else:
+                self.hits += 1
+            self._entries.move_to_end(key)
+            entry.in_use += 1
+
+        try:
+            yield entry.instance
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+                entry.memory_bytes = self._measure(entry.instance)
+            self.enforce_budget()
+
+    def enforce_budget(self):
+        """Evict least-recently-used idle processors until the registry fits its budget"""
+        if not self.memory_budget_bytes:
+            return
+        with self._lock:
+            total = sum(entry.memory_bytes for entry in self._entries.values())
+            victims = []
+            for key, entry in self._entries.items():
+                if total <= self.memory_budget_bytes:
+                    break
+                if entry.in_use:
+                    continue
+                victims.append(key)
+                total -= entry.memory_bytes
+            evicted = [self._entries.pop(key) for key in victims]
+            self.evictions += len(evicted)
+        for entry in evicted:
+            self._unload(entry.instance)
+
+    def evict_idle(self) -> int:
+        """Unload processors that have not been used for idle_ttl seconds"""
+        if not self.idle_ttl:
+            return 0
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            victims = [key for key, entry in self._entries.items() if not entry.in_use and entry.last_used < cutoff]
+            evicted = [self._entries.pop(key) for key in victims]
+            self.evictions += len(evicted)
+        for entry in evicted:
+            self._unload(entry.instance)
+        return len(evicted)
+
+    def clear(self):
+        """Unload every idle processor"""
+        with self._lock:
+            victims = [key for key, entry in self._entries.items() if not entry.in_use]
+            evicted = [self._entries.pop(key) for key in victims]
+        for entry in evicted:
+            self._unload(entry.instance)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Loaded processors, most recently used last"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "processor": key[0],
+                    "model": key[1],
+                    "device": key[2],
+                    "memory_mb": round(entry.memory_bytes / (1024 * 1024), 1),
+                    "memory_bytes": entry.memory_bytes,
+                    "in_use": entry.in_use,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                }
+                for key, entry in self._entries.items()
+            ]
+
+    @staticmethod
+    def _measure(instance) -> int:
+        try:
+            return int(instance.memory_bytes()) if hasattr(instance, "memory_bytes") else 0
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _unload(instance):
+        if hasattr(instance, "unload"):
+            try:
+                instance.unload()
+            except Exception as e:
+                print(f"[Registry] Failed to unload {type(instance).__name__}: {e}")
@@ -4,17 +4,119 @@ Wraps the Resemble Enhance model for audio denoising and enhancement
 """
 
 import asyncio
+import importlib.util
+import math
+import os
+import tempfile
+import threading
 import torch
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, Tuple
+
+from .executors import EXECUTORS
+from .metrics import INFERENCE_SECONDS, IO_SECONDS, MODEL_LOAD_SECONDS
+from .progress import ProgressCallback, ProgressTracker, resemble_progress
+from .registry import module_memory_bytes
+
+# Recordings are processed in windows of CHUNK_SECONDS (0 = the whole file at once),
+# crossfaded over OVERLAP_SECONDS and written as each window finishes, so peak memory
+# follows the window size rather than the recording length
+CHUNK_SECONDS = float(os.environ.get("AUDIOKNIFE_RESEMBLE_CHUNK_SECONDS", "60"))
+OVERLAP_SECONDS = float(os.environ.get("AUDIOKNIFE_RESEMBLE_OVERLAP_SECONDS", "1"))
+
+# Run all channels of multichannel audio through the model as one batch
+# (falls back to one channel at a time if the batched call fails)
+BATCH_CHANNELS = os.environ.get("AUDIOKNIFE_RESEMBLE_BATCH_CHANNELS", "1") != "0"
+
+# scripts/ of the AudioKnife checkout; the batched-channel inference is shared with the GUI
+SCRIPTS_DIR = Path(__file__).resolve().parents[3] / "scripts"
+_inference_channels = None
+
+
+def _inference_batch(model, wavs: torch.Tensor, sr: int, device: str) -> Tuple[torch.Tensor, int]:
+    """
+    resemble_enhance.inference.inference over a (channels, frames) tensor:
+    each inference chunk runs every channel in one forward pass
+    (inference_channels from scripts/run_resemble_enhance.py)
+    """
+    global _inference_channels
+    
+    if _inference_channels is None:
+        spec = importlib.util.spec_from_file_location(
+            "run_resemble_enhance", str(SCRIPTS_DIR / "run_resemble_enhance.py")
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _inference_channels = module.inference_channels
+    return _inference_channels(model, wavs, sr, device)
+
+
+class _CrossfadeWriter:
+    """
+    Streams overlapping (channels, frames) chunks to a file, crossfading each overlap
+
+    Formats libsndfile cannot write (such as .m4a) are streamed to a temporary
+    WAV next to the output and converted with torchaudio.save on close.
+    """
+    
+    def __init__(self, path: str, sample_rate: int, channels: int, overlap: int):
+        import soundfile as sf
+        
+        self.path = path
+        self.overlap = overlap
+        self._tail: Optional[torch.Tensor] = None
+        self._temp_path: Optional[str] = None
+        if Path(path).suffix[1:].upper() not in sf.available_formats():
+            fd, self._temp_path = tempfile.mkstemp(suffix=".wav", dir=Path(path).parent)
+            os.close(fd)
+        target = self._temp_path or path
+        # Same sample format torchaudio.save used for the float tensors
+        subtype = "FLOAT" if Path(target).suffix.lower() == ".wav" else None
+        self._file = sf.SoundFile(target, "w", samplerate=sample_rate, channels=channels, subtype=subtype)
+    
+    def write(self, chunk: torch.Tensor):
+        """Write a chunk whose start overlaps the end of the previous one"""
+        if self._tail is not None:
+            n = min(self._tail.shape[-1], chunk.shape[-1])
+            fade = torch.linspace(0.0, 1.0, n)
+            chunk = chunk.clone()
+            chunk[:, :n] = self._tail[:, :n] * (1.0 - fade) + chunk[:, :n] * fade
+        # Hold back the end until the next chunk fades in over it
+        keep = min(self.overlap, chunk.shape[-1])
+        self._file.write(chunk[:, :chunk.shape[-1] - keep].T.numpy())
+        self._tail = chunk[:, chunk.shape[-1] - keep:]
+    
+    def close(self):
+        if self._tail is not None:
+            self._file.write(self._tail.T.numpy())
+            self._tail = None
+        self._file.close()
+        if self._temp_path is not None:
+            import torchaudio
+            
+            try:
+                audio, sr = torchaudio.load(self._temp_path)
+                torchaudio.save(self.path, audio, sr)
+            finally:
+                os.remove(self._temp_path)
+                self._temp_path = None
+
 
 class ResembleProcessor:
     """Processor for Resemble Enhance audio processing"""
     
-    def __init__(self):
-        self.device = self._get_device()
+    def __init__(self, device: Optional[str] = None, chunk_seconds: float = CHUNK_SECONDS,
+                 overlap_seconds: float = OVERLAP_SECONDS):
+        if chunk_seconds and not 0 <= overlap_seconds < chunk_seconds:
+            raise ValueError("overlap_seconds must be in [0, chunk_seconds)")
+        self.device = device or self._get_device()
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds if chunk_seconds else 0.0
+        self.batch_channels = BATCH_CHANNELS
         self._model = None
         self._enhancer = None
+        # enhance() reconfigures the shared model (nfe, lambd), so runs take turns
+        self._lock = threading.Lock()
     
     def _get_device(self) -> str:
         """Get the best available device"""
@@ -25,98 +127,192 @@ class ResembleProcessor:
         return "cpu"
     
     def _load_model(self):
-        """Lazy load the model"""
+        """Lazy load the model and keep it resident until unload()"""
         if self._model is None:
             try:
                 from resemble_enhance.enhancer import enhance
+                from resemble_enhance.enhancer.inference import load_enhancer
                 self._enhancer = enhance
             except ImportError:
                 raise ImportError("resemble-enhance not installed. Run: pip install resemble-enhance")
+            # enhance() looks the model up through the same cached loader
+            with MODEL_LOAD_SECONDS.time(processor="resemble"):
+                self._model = load_enhancer(None, self.device)
+    
+    def memory_bytes(self) -> int:
+        """Size of the loaded model weights"""
+        return module_memory_bytes(self._model)
+    
+    def unload(self):
+        """Release the model weights and cached device memory"""
+        if self._model is None:
+            return
+        from resemble_enhance.enhancer.inference import load_enhancer
+        load_enhancer.cache_clear()
+        self._model = None
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+        elif self.device == "mps":
+            torch.mps.empty_cache()
     
-    async def denoise(self, input_path: str, output_path: str) -> str:
+    async def denoise(self, input_path: str, output_path: str, on_progress: Optional[ProgressCallback] = None) -> str:
         """
         Denoise audio using Resemble Enhance
         
         Args:
             input_path: Path to input audio file
             output_path: Path to output audio file
+            on_progress: Called with processed seconds, RTF and ETA per inference chunk
             
         Returns:
             Path to processed file
         """
         return await asyncio.get_event_loop().run_in_executor(
-            None, self._denoise_sync, input_path, output_path
+            EXECUTORS.get("resemble"), self._denoise_sync, input_path, output_path, on_progress
         )
     
-    def _denoise_sync(self, input_path: str, output_path: str) -> str:
+    def _denoise_sync(self, input_path: str, output_path: str, on_progress: Optional[ProgressCallback] = None) -> str:
         """Synchronous denoise implementation"""
-        import torchaudio
-        
-        self._load_model()
-        
-        # Load audio
-        audio, sr = torchaudio.load(input_path)
-        
-        # Move to device
-        audio = audio.to(self.device)
-        
-        # Process with denoise only
-        from resemble_enhance.enhancer import enhance
-        enhanced, new_sr = enhance(
-            audio.squeeze(0),
-            sr,
-            self.device,
+        return self._process_file(
+            input_path, output_path, "resemble_denoise", on_progress,
             nfe=32,
             solver="midpoint",
             lambd=0.9,  # Higher = more denoising
             tau=0.5
         )
-        
-        # Save output
-        torchaudio.save(output_path, enhanced.unsqueeze(0).cpu(), new_sr)
-        
-        return output_path
     
-    async def enhance(self, input_path: str, output_path: str) -> str:
+    async def enhance(self, input_path: str, output_path: str, on_progress: Optional[ProgressCallback] = None) -> str:
         """
         Enhance audio using Resemble Enhance (denoise + quality boost)
         
         Args:
             input_path: Path to input audio file
             output_path: Path to output audio file
+            on_progress: Called with processed seconds, RTF and ETA per inference chunk
             
         Returns:
             Path to processed file
         """
         return await asyncio.get_event_loop().run_in_executor(
-            None, self._enhance_sync, input_path, output_path
+            EXECUTORS.get("resemble"), self._enhance_sync, input_path, output_path, on_progress
         )
     
-    def _enhance_sync(self, input_path: str, output_path: str) -> str:
+    def _enhance_sync(self, input_path: str, output_path: str, on_progress: Optional[ProgressCallback] = None) -> str:
         """Synchronous enhance implementation"""
-        import torchaudio
-        
-        self._load_model()
-        
-        # Load audio
-        audio, sr = torchaudio.load(input_path)
-        
-        # Move to device
-        audio = audio.to(self.device)
-        
-        # Process with full enhancement
-        from resemble_enhance.enhancer import enhance
-        enhanced, new_sr = enhance(
-            audio.squeeze(0),
-            sr,
-            self.device,
+        return self._process_file(
+            input_path, output_path, "resemble_enhance", on_progress,
             nfe=64,
             solver="midpoint",
             lambd=0.1,  # Lower = more enhancement
             tau=0.5
         )
+    
+    def _process_file(self, input_path: str, output_path: str, stage: str,
+                      on_progress: Optional[ProgressCallback] = None, **params) -> str:
+        """
+        Run enhance() over the input one window at a time, crossfading window
+        boundaries and streaming finished audio to the output file
+        """
+        self._load_model()
+        
+        sr, frames, channels, windows = self._read_windows(input_path)
+        window = int(self.chunk_seconds * sr) if self.chunk_seconds else frames
+        hop = window - int(self.overlap_seconds * sr)
+        n_windows = 1 if frames <= window else 1 + math.ceil((frames - window) / hop)
         
-        # Save output
-        torchaudio.save(output_path, enhanced.unsqueeze(0).cpu(), new_sr)
+        tracker = ProgressTracker(stage, frames / sr, on_progress)
+        writer = None
+        try:
+            # One inference pass per window, or per channel of each window when unbatched
+            passes = n_windows * (1 if self.batch_channels else channels)
+            with self._lock, resemble_progress(tracker, passes=passes):
+                for audio in windows:
+                    with INFERENCE_SECONDS.time(processor="resemble"):
+                        enhanced, new_sr = self._enhance_channels(audio, sr, **params)
+                    with IO_SECONDS.time(processor="resemble", op="write"):
+                        if writer is None:
+                            overlap = round(self.overlap_seconds * new_sr) if n_windows > 1 else 0
+                            writer = _CrossfadeWriter(output_path, new_sr, channels, overlap)
+                        writer.write(enhanced)
+        finally:
+            if writer is not None:
+                writer.close()
         
         return output_path
+    
+    def _enhance_channels(self, audio: torch.Tensor, sr: int, nfe: int, solver: str,
+                          lambd: float, tau: float) -> Tuple[torch.Tensor, int]:
+        """
+        Run enhance() on every channel of a (channels, frames) window
+        
+        Multichannel windows run as one batch, so stereo costs about one channel's
+        wall time; if the batched call fails, channels run one at a time from then on.
+        """
+        from resemble_enhance.enhancer import enhance
+        
+        if audio.shape[0] > 1 and self.batch_channels:
+            try:
+                self._model.configurate_(nfe=nfe, solver=solver, lambd=lambd, tau=tau)
+                with torch.inference_mode():
+                    return _inference_batch(self._model, audio, sr, self.device)
+            except (AttributeError, RuntimeError, OSError) as e:
+                print(f"[ResembleProcessor] Batched channels failed, processing them one at a time: {e}")
+                self.batch_channels = False
+        
+        outputs = []
+        for channel in audio:
+            enhanced, new_sr = enhance(channel.to(self.device), sr, self.device,
+                                       nfe=nfe, solver=solver, lambd=lambd, tau=tau)
+            outputs.append(enhanced.cpu())
+        length = min(output.shape[-1] for output in outputs)
+        return torch.stack([output[:length] for output in outputs]), new_sr
+    
+    def _read_windows(self, input_path: str) -> Tuple[int, int, int, Iterator[torch.Tensor]]:
+        """
+        Open the input for windowed reading
+        
+        Returns:
+            (sample rate, frames, channels, iterator of (channels, frames) windows
+            overlapping by overlap_seconds)
+        """
+        import soundfile as sf
+        
+        try:
+            info = sf.info(input_path)
+        except RuntimeError:
+            # Formats libsndfile cannot read are decoded whole, then windowed
+            return self._read_windows_whole(input_path)
+        
+        sr, frames = info.samplerate, info.frames
+        window = int(self.chunk_seconds * sr) if self.chunk_seconds else frames
+        overlap = int(self.overlap_seconds * sr)
+        
+        def windows():
+            blocks = sf.blocks(input_path, blocksize=max(window, 1), overlap=overlap, dtype="float32", always_2d=True)
+            while True:
+                with IO_SECONDS.time(processor="resemble", op="read"):
+                    block = next(blocks, None)
+                if block is None:
+                    return
+                yield torch.from_numpy(block.T.copy())
+        
+        return sr, frames, info.channels, windows()
+    
+    def _read_windows_whole(self, input_path: str) -> Tuple[int, int, int, Iterator[torch.Tensor]]:
+        import torchaudio
+        
+        with IO_SECONDS.time(processor="resemble", op="read"):
+            audio, sr = torchaudio.load(input_path)
+        frames = audio.shape[-1]
+        window = int(self.chunk_seconds * sr) if self.chunk_seconds else frames
+        hop = window - int(self.overlap_seconds * sr)
+        
+        def windows():
+            start = 0
+            while True:
+                yield audio[:, start:start + window]
+                if start + window >= frames:
+                    return
+                start += hop
+        
+        return sr, frames, audio.shape[0], windows()
@@ -0,0 +1,93 @@
+"""
+Spleeter Engine
+Separates many files through one loaded Spleeter separator
+
+Run as a script with the Spleeter venv's Python. The batch separation itself
+is scripts/run_spleeter.py's separate_batch (shared with the GUI's model
+worker): the TensorFlow graph and checkpoint are loaded once for the whole
+batch, and decoding the next inputs and encoding finished stems run on thread
+pools while the model works. This file adds the JSON-lines protocol the
+backend speaks:
+
+  jobs     <- one line: [{"input": "...", "output_dir": "..."}, ...]
+  result   -> {"index": i, "ok": true/false, "error": "...", "stems": {name: path}, "elapsed": s}
+  done     -> {"done": true, "elapsed": s}
+
+This file has no imports from the processors package so the venv can run it directly.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# scripts/ of the AudioKnife checkout this backend lives in
+SCRIPTS_DIR = Path(os.environ.get(
+    "AUDIOKNIFE_SCRIPTS_DIR", Path(__file__).resolve().parents[3] / "scripts"
+))
+
+DEFAULT_DECODE_THREADS = 2
+DEFAULT_ENCODE_THREADS = 2
+
+
+def load_run_spleeter():
+    """scripts/run_spleeter.py as a module"""
+    path = SCRIPTS_DIR / "run_spleeter.py"
+    spec = importlib.util.spec_from_file_location("run_spleeter", str(path))
+    if spec is None:
+        raise ImportError(f"Spleeter script not found: {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batch Spleeter separation")
+    parser.add_argument("--model", default="2stems", help="Pretrained model: 2stems, 4stems or 5stems")
+    parser.add_argument("--decode-threads", type=int, default=DEFAULT_DECODE_THREADS, help="Parallel input decoders")
+    parser.add_argument("--encode-threads", type=int, default=DEFAULT_ENCODE_THREADS, help="Parallel stem writers")
+    args = parser.parse_args()
+
+    # stdout carries the protocol; anything the libraries print goes to stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1, encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            channel.write(json.dumps(message) + "\n")
+            channel.flush()
+
+    start = time.time()
+    jobs = json.loads(sys.stdin.readline() or "[]")
+    run_spleeter = load_run_spleeter()
+
+    def on_result(index, ok, error):
+        message = {"index": index, "ok": ok, "elapsed": round(time.time() - start, 3)}
+        if ok:
+            # separate_batch writes <output_dir>/<stem>.wav for every stem of the model
+            output_dir = Path(jobs[index]["output_dir"])
+            message["stems"] = {path.stem: str(path) for path in sorted(output_dir.glob("*.wav"))}
+        else:
+            message["error"] = error
+        send(message)
+
+    separator = run_spleeter.setup_separator(args.model)
+    run_spleeter.separate_batch(
+        separator, [(job["input"], job["output_dir"]) for job in jobs],
+        args.decode_threads, args.encode_threads, on_result=on_result
+    )
+    send({"done": True, "elapsed": round(time.time() - start, 3)})
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(0)
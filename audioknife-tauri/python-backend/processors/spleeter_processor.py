@@ -4,16 +4,30 @@ Wraps the Spleeter model for vocal/music separation
 """
 
 import asyncio
+import json
+import os
 import subprocess
-import shutil
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, Union
+
+from .cache import STEM_CACHE, export_stem
+from .executors import EXECUTORS
+from .metrics import INFERENCE_SECONDS
+
+ENGINE_SCRIPT = Path(__file__).resolve().parent / "spleeter_engine.py"
+
+# Threads decoding inputs ahead of the separator, and writing its stems, in each Spleeter run
+DECODE_THREADS = int(os.environ.get("AUDIOKNIFE_SPLEETER_DECODE_THREADS", "2"))
+ENCODE_THREADS = int(os.environ.get("AUDIOKNIFE_SPLEETER_ENCODE_THREADS", "2"))
 
 class SpleeterProcessor:
     """Processor for Spleeter audio source separation"""
     
-    def __init__(self):
+    def __init__(self, decode_threads: int = DECODE_THREADS, encode_threads: int = ENCODE_THREADS):
         self._venv_path = self._find_venv()
+        self.decode_threads = decode_threads
+        self.encode_threads = encode_threads
     
     def _find_venv(self) -> Optional[Path]:
         """Find Spleeter virtual environment"""
@@ -42,13 +56,17 @@ class SpleeterProcessor:
             input_path: Path to input audio file
             output_path: Path to output audio file
             stems: Model type - 2stems, 4stems, or 5stems
-            extract_stem: Which stem to extract (vocals, drums, bass, piano, other)
+            extract_stem: Which stem to extract (vocals, drums, bass, piano, other,
+                or no_<stem> for the mix of the others)
             
         Returns:
             Path to extracted stem
+
+        Every stem of the model is kept in the stem cache, so extracting another
+        stem of the same input does not run Spleeter again.
         """
         return await asyncio.get_event_loop().run_in_executor(
-            None, self._separate_sync, input_path, output_path, stems, extract_stem
+            EXECUTORS.get("spleeter"), self._separate_sync, input_path, output_path, stems, extract_stem
         )
     
     def _separate_sync(
@@ -59,43 +77,94 @@ class SpleeterProcessor:
         extract_stem: str
     ) -> str:
         """Synchronous separation implementation"""
-        import tempfile
+        result = self.separate_batch([(input_path, output_path, extract_stem)], stems)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def separate_batch(
+        self,
+        jobs: List[Tuple[str, str, str]],
+        stems: str = "2stems"
+    ) -> List[Union[str, Exception]]:
+        """
+        Extract stems from many files, separating all uncached inputs in one Spleeter run
+        so the model graph and checkpoint are loaded once per batch
         
+        Args:
+            jobs: (input_path, output_path, extract_stem) per file
+            stems: Model type - 2stems, 4stems, or 5stems
+            
+        Returns:
+            Per job, in order: path to the extracted stem, or the exception that failed it
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # A job whose input cannot be read fails on its own
+            keys = []
+            separated = {}
+            for i, (input_path, _, _) in enumerate(jobs):
+                try:
+                    key = STEM_CACHE.key(input_path, f"spleeter:{stems}")
+                except OSError as e:
+                    key = ("error", i)
+                    separated[key] = RuntimeError(f"Cannot read input: {e}")
+                keys.append(key)
+                if key not in separated:
+                    separated[key] = STEM_CACHE.get(key, os.path.join(temp_dir, "cached", str(i)))
+            # One separation per distinct input, however many of its stems were asked for
+            missing = {key: input_path for key, (input_path, _, _) in zip(keys, jobs) if not separated[key]}
+            
+            if missing:
+                engine_jobs = [(input_path, os.path.join(temp_dir, str(i))) for i, input_path in enumerate(missing.values())]
+                try:
+                    outcomes = self._run_engine(engine_jobs, stems)
+                except RuntimeError as e:
+                    outcomes = [e] * len(engine_jobs)
+                for key, outcome in zip(missing, outcomes):
+                    if isinstance(outcome, Exception):
+                        separated[key] = outcome
+                    else:
+                        separated[key] = {name: Path(path) for name, path in outcome.items()}
+                        STEM_CACHE.put(key, separated[key])
+            
+            # Copy (or mix) each requested stem to its output path
+            results = []
+            for (input_path, output_path, extract_stem), key in zip(jobs, keys):
+                if isinstance(separated[key], Exception):
+                    results.append(separated[key])
+                    continue
+                try:
+                    results.append(export_stem(separated[key], extract_stem, output_path))
+                except (OSError, ValueError) as e:
+                    results.append(RuntimeError(str(e)))
+        return results
+    
+    def _run_engine(self, jobs: List[Tuple[str, str]], stems: str) -> List[Union[Dict[str, str], Exception]]:
+        """Separate (input_path, output_dir) jobs in one spleeter_engine.py run on the Spleeter venv"""
         if self._venv_path is None:
             raise RuntimeError("Spleeter virtual environment not found")
         
-        spleeter_cmd = self._venv_path / "bin" / "spleeter"
+        cmd = [
+            str(self._venv_path / "bin" / "python"), str(ENGINE_SCRIPT),
+            "--model", stems,
+            "--decode-threads", str(self.decode_threads),
+            "--encode-threads", str(self.encode_threads)
+        ]
+        request = json.dumps([{"input": input_path, "output_dir": output_dir} for input_path, output_dir in jobs])
         
-        # Create temp output directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # Run spleeter
-            cmd = [
-                str(spleeter_cmd), "separate",
-                "-p", f"spleeter:{stems}",
-                "-o", str(temp_path),
-                input_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                raise RuntimeError(f"Spleeter failed: {result.stderr}")
-            
-            # Find output file
-            input_name = Path(input_path).stem
-            stem_path = temp_path / input_name / f"{extract_stem}.wav"
-            
-            if not stem_path.exists():
-                # Try to find what was created
-                created_dir = temp_path / input_name
-                if created_dir.exists():
-                    available = [f.name for f in created_dir.glob("*.wav")]
-                    raise RuntimeError(f"{extract_stem} not found. Available: {available}")
-                raise RuntimeError(f"Output not found: {stem_path}")
-            
-            # Copy to output path
-            shutil.copy(stem_path, output_path)
+        # The subprocess loads the model once per batch, so this includes load time
+        with INFERENCE_SECONDS.time(processor="spleeter"):
+            result = subprocess.run(cmd, input=request + "\n", capture_output=True, text=True,
+                                    env=EXECUTORS.env("spleeter"))
         
-        return output_path
+        # Jobs without a result line were lost when the engine died
+        outcomes = [RuntimeError(f"Spleeter failed: {result.stderr[-300:]}")] * len(jobs)
+        for line in result.stdout.splitlines():
+            message = json.loads(line)
+            if "index" not in message:
+                continue
+            if message["ok"]:
+                outcomes[message["index"]] = message["stems"]
+            else:
+                outcomes[message["index"]] = RuntimeError(f"Spleeter failed: {message['error']}")
+        return outcomes
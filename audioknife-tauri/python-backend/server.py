@@ -9,13 +9,17 @@ import os
 import sys
 import asyncio
 import tempfile
+import functools
+import math
 import shutil
+import time
+import uuid
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -25,6 +29,17 @@ SCRIPT_DIR = Path(__file__).parent.resolve()
 PARENT_DIR = SCRIPT_DIR.parent.parent
 sys.path.insert(0, str(PARENT_DIR))
 
+import file_transfer
+from job_queue import JobScheduler, QueueFull
+from job_store import JobExists, JobStore
+from processors.batching import MicroBatcher
+from processors.cache import STEM_CACHE, file_digest
+from processors.cost import CostModel, audio_duration
+from processors.demucs_engine import check_options as check_demucs_options
+from processors import metrics
+from processors.executors import EXECUTORS
+from processors.registry import ModelRegistry
+
 # ===== App Configuration =====
 app = FastAPI(
     title="AudioKnife AI Backend",
@@ -44,30 +59,143 @@ app.add_middleware(
 # ===== Request/Response Models =====
 
 class ProcessRequest(BaseModel):
-    input_path: str
+    input_path: Optional[str] = None
+    file_id: Optional[str] = None  # Alternative to input_path for files sent to /upload
     output_path: Optional[str] = None
     mode: str = "resemble_denoise"
+    options: Dict[str, Any] = {}  # Mode parameters, see MODE_OPTIONS
+    job_id: Optional[str] = None  # Poll /job/{job_id} for live progress (see ProcessResponse.coalesced)
+    priority: int = 0  # Higher runs first
+    wait: bool = False  # Block until the job finishes instead of returning once queued
 
 class ProcessResponse(BaseModel):
     success: bool
     output_path: Optional[str] = None
     message: str
     processing_time: Optional[float] = None
+    job_id: Optional[str] = None
+    estimated_seconds: Optional[float] = None  # Estimated processing time of this job
+    estimated_completion: Optional[str] = None  # ISO time the job is expected to finish
+    coalesced: bool = False  # Attached to an identical in-flight job; job_id and output_path are that job's
+
+class UploadResponse(BaseModel):
+    file_id: str
+    size: int
+    job: Optional[ProcessResponse] = None  # Set when the upload was queued for processing
 
 class StatusResponse(BaseModel):
     status: str
     available_modes: List[str]
     mps_available: bool
     cuda_available: bool
+    loaded_models: List[dict] = []
+    realtime_factors: dict = {}
+    thread_allocation: dict = {}
+    stem_cache: dict = {}
 
 class JobStatus(BaseModel):
     job_id: str
-    status: str  # pending, processing, completed, failed
+    status: str  # pending, processing, completed, failed, cancelled
     progress: float
     message: str
+    mode: Optional[str] = None
+    options: Dict[str, Any] = {}
+    priority: int = 0
+    queue_position: Optional[int] = None  # 1-based while pending
+    input_path: Optional[str] = None
+    output_path: Optional[str] = None
+    processing_time: Optional[float] = None
+    audio_seconds: Optional[float] = None  # Input duration from the file header
+    estimated_seconds: Optional[float] = None
+    started_at: Optional[float] = None
+    processed_seconds: Optional[float] = None  # Seconds of audio processed so far
+    total_seconds: Optional[float] = None
+    rtf: Optional[float] = None  # Real-time factor: wall time / audio time
+    eta: Optional[float] = None  # Estimated seconds remaining
+    coalesce_key: Optional[str] = None
+    followers: int = 0  # Identical requests attached to this job
+    model_load_seconds: float = 0.0  # Part of processing_time spent loading models
 
 # ===== Global State =====
-jobs = {}
+jobs = {}  # Jobs running in this process; the shared queue lives in the job store
+
+# ===== Metrics =====
+REQUESTS_TOTAL = metrics.Counter("audioknife_requests_total", "Processing requests accepted", ["mode"])
+COALESCED_TOTAL = metrics.Counter(
+    "audioknife_requests_coalesced_total", "Requests attached to an identical in-flight job", ["mode"]
+)
+JOBS_FINISHED = metrics.Counter("audioknife_jobs_finished_total", "Finished jobs by outcome", ["mode", "status"])
+REALTIME_FACTOR = metrics.Histogram(
+    "audioknife_realtime_factor", "Processing time divided by audio duration", ["mode"], buckets=metrics.RTF_BUCKETS
+)
+QUEUE_DEPTH = metrics.Gauge("audioknife_queue_depth", "Jobs waiting in the queue")
+JOBS_RUNNING = metrics.Gauge("audioknife_jobs_running", "Jobs currently running")
+PROCESS_RSS = metrics.Gauge("audioknife_process_resident_memory_bytes", "Resident memory of the server process")
+REGISTRY_HITS = metrics.Counter("audioknife_registry_hits_total", "Model registry lookups served by a loaded model")
+REGISTRY_MISSES = metrics.Counter("audioknife_registry_misses_total", "Model registry lookups that created a processor")
+REGISTRY_EVICTIONS = metrics.Counter("audioknife_registry_evictions_total", "Processors evicted from the model registry")
+REGISTRY_MODELS = metrics.Gauge("audioknife_registry_loaded_models", "Processors held by the model registry")
+REGISTRY_MEMORY = metrics.Gauge("audioknife_registry_memory_bytes", "Model memory held by the model registry")
+
+# ===== Admission Control =====
+# Jobs are costed as audio duration x the mode's measured real-time factor.
+# A job costing more than MAX_JOB_COST seconds is rejected; a job that would push the
+# queued work past MAX_BACKLOG_COST seconds is rejected with Retry-After (0 = no limit).
+MAX_JOB_COST = float(os.environ.get("AUDIOKNIFE_MAX_JOB_COST", "3600"))
+MAX_BACKLOG_COST = float(os.environ.get("AUDIOKNIFE_MAX_BACKLOG_COST", "7200"))
+cost_model = CostModel()
+
+def work_factor(mode: str, options: Dict[str, Any]) -> float:
+    """How many times a default run of the mode a job's options cost (Demucs shifts repeat the inference)"""
+    if mode == "demucs":
+        return max(int(options.get("shifts") or 1), 1)
+    return 1.0
+
+def record_job_finished(job, result):
+    """Count finished jobs and feed their real-time factor back into the cost model"""
+    JOBS_FINISHED.inc(mode=job.mode, status=job.status)
+    audio_seconds = job.audio_seconds or job.total_seconds
+    if job.status == "completed" and job.processing_time and audio_seconds:
+        REALTIME_FACTOR.observe(job.processing_time / audio_seconds, mode=job.mode)
+        # The cost model tracks warm, default-option runs: a lazy model load is a one-off
+        processing_seconds = job.processing_time - (job.model_load_seconds or 0.0)
+        cost_model.update(job.mode, processing_seconds / work_factor(job.mode, job.options), audio_seconds)
+
+# Jobs run on a bounded number of workers; the rest wait in a priority queue.
+# By default as many jobs run at once as the job executors have slots (stream executors excluded).
+# The queue and job results live in a SQLite database, so every server process
+# (uvicorn --workers N, or several servers on one machine) shares one queue and
+# queued jobs survive a crash. Jobs whose process stops heartbeating for
+# JOB_STALE_SECONDS are requeued.
+MAX_CONCURRENT_JOBS = int(os.environ.get("AUDIOKNIFE_MAX_CONCURRENT_JOBS", "0")) or EXECUTORS.total_workers
+MAX_QUEUED_JOBS = int(os.environ.get("AUDIOKNIFE_MAX_QUEUED_JOBS", "32"))
+JOB_DB = os.environ.get("AUDIOKNIFE_JOB_DB", str(Path(tempfile.gettempdir()) / "audioknife_jobs.sqlite3"))
+JOB_STALE_SECONDS = float(os.environ.get("AUDIOKNIFE_JOB_STALE_SECONDS", "30"))
+job_store = JobStore(JOB_DB)
+scheduler = JobScheduler(job_store, jobs, lambda row: JobStatus(**row), max_concurrent=MAX_CONCURRENT_JOBS,
+                         max_pending=MAX_QUEUED_JOBS, on_finish=record_job_finished,
+                         stale_after=JOB_STALE_SECONDS)
+
+# Requests for the same input content, mode and parameters while an identical job
+# is pending or running attach to that job instead of running the inference again
+COALESCE_JOBS = os.environ.get("AUDIOKNIFE_COALESCE_JOBS", "1") != "0"
+
+# Loaded processors stay resident between requests, within a RAM budget (0 = unlimited)
+# and until they have been idle for the TTL (0 = never)
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get("AUDIOKNIFE_MODEL_MEMORY_MB", "4096"))
+MODEL_IDLE_TTL = float(os.environ.get("AUDIOKNIFE_MODEL_IDLE_TTL", "600"))
+registry = ModelRegistry(MODEL_MEMORY_BUDGET_MB * 1024 * 1024, MODEL_IDLE_TTL)
+
+# Denoiser requests arriving within the batch window run as one forward pass.
+# Clips longer than BATCH_MAX_SECONDS run on their own to bound padding and memory.
+BATCH_WINDOW_MS = float(os.environ.get("AUDIOKNIFE_BATCH_WINDOW_MS", "20"))
+BATCH_MAX_ITEMS = int(os.environ.get("AUDIOKNIFE_BATCH_MAX_ITEMS", "8"))
+BATCH_MAX_SECONDS = float(os.environ.get("AUDIOKNIFE_BATCH_MAX_SECONDS", "30"))
+# Spleeter jobs arriving within their window are separated in one run that loads the
+# model graph once; decode/encode threads per run: AUDIOKNIFE_SPLEETER_{DECODE,ENCODE}_THREADS
+SPLEETER_BATCH_WINDOW_MS = float(os.environ.get("AUDIOKNIFE_SPLEETER_BATCH_WINDOW_MS", "200"))
+SPLEETER_BATCH_MAX_ITEMS = int(os.environ.get("AUDIOKNIFE_SPLEETER_BATCH_MAX_ITEMS", "16"))
+batchers = {}
 
 # ===== Helper Functions =====
 
@@ -96,14 +224,37 @@ def get_device():
     else:
         return "cpu"
 
+def make_progress_callback(job: JobStatus):
+    """Create a callback that copies backend progress reports onto a job"""
+    def on_progress(info: dict):
+        total = info["total_seconds"]
+        processed = info["processed_seconds"]
+        job.processed_seconds = processed
+        job.total_seconds = total or None
+        job.rtf = info["rtf"]
+        job.eta = info["eta"]
+
+        if total:
+            job.progress = min(processed / total, 1.0)
+            message = f"{info['stage']}: {processed:.1f}/{total:.1f}s audio"
+        else:
+            message = f"{info['stage']}: {processed:.1f}s audio"
+        if info["rtf"] is not None:
+            message += f", RTF {info['rtf']:.2f}"
+        if info["eta"] is not None:
+            message += f", ETA {info['eta']:.0f}s"
+        job.message = message
+    return on_progress
+
 # ===== Processing Functions =====
 
-async def process_resemble_denoise(input_path: str, output_path: str) -> ProcessResponse:
+async def process_resemble_denoise(input_path: str, output_path: str, on_progress=None) -> ProcessResponse:
     """Process with Resemble Enhance - Denoise only"""
     try:
         from processors.resemble_processor import ResembleProcessor
-        processor = ResembleProcessor()
-        result = await processor.denoise(input_path, output_path)
+        device = get_device()
+        with registry.use(("resemble", "enhancer", device), lambda: ResembleProcessor(device)) as processor:
+            result = await processor.denoise(input_path, output_path, on_progress=on_progress)
         return ProcessResponse(
             success=True,
             output_path=result,
@@ -115,12 +266,13 @@ async def process_resemble_denoise(input_path: str, output_path: str) -> Process
             message=f"Resemble Denoise failed: {str(e)}"
         )
 
-async def process_resemble_enhance(input_path: str, output_path: str) -> ProcessResponse:
+async def process_resemble_enhance(input_path: str, output_path: str, on_progress=None) -> ProcessResponse:
     """Process with Resemble Enhance - Denoise + Enhance"""
     try:
         from processors.resemble_processor import ResembleProcessor
-        processor = ResembleProcessor()
-        result = await processor.enhance(input_path, output_path)
+        device = get_device()
+        with registry.use(("resemble", "enhancer", device), lambda: ResembleProcessor(device)) as processor:
+            result = await processor.enhance(input_path, output_path, on_progress=on_progress)
         return ProcessResponse(
             success=True,
             output_path=result,
@@ -132,12 +284,16 @@ async def process_resemble_enhance(input_path: str, output_path: str) -> Process
             message=f"Resemble Enhance failed: {str(e)}"
         )
 
-async def process_demucs(input_path: str, output_path: str) -> ProcessResponse:
-    """Process with Demucs for BGM removal"""
+async def process_demucs(input_path: str, output_path: str, on_progress=None, stem: Optional[str] = None,
+                         segment: Optional[float] = None, overlap: Optional[float] = None,
+                         shifts: Optional[int] = None) -> ProcessResponse:
+    """Process with Demucs for BGM removal (or any other stem)"""
     try:
         from processors.demucs_processor import DemucsProcessor
-        processor = DemucsProcessor()
-        result = await processor.separate(input_path, output_path)
+        device = get_device()
+        with registry.use(("demucs", "htdemucs", device), lambda: DemucsProcessor("htdemucs", device)) as processor:
+            result = await processor.separate(input_path, output_path, stem or "vocals", on_progress=on_progress,
+                                              segment=segment, overlap=overlap, shifts=shifts)
         return ProcessResponse(
             success=True,
             output_path=result,
@@ -149,12 +305,75 @@ async def process_demucs(input_path: str, output_path: str) -> ProcessResponse:
             message=f"Demucs failed: {str(e)}"
         )
 
-async def process_spleeter(input_path: str, output_path: str, stems: str = "2stems") -> ProcessResponse:
-    """Process with Spleeter for vocal extraction"""
+def get_denoise_batcher(model: str, device: str) -> MicroBatcher:
+    """Batcher for one denoiser model; batches run on the denoiser executor"""
+    key = ("denoiser", model, device)
+    if key not in batchers:
+        from processors.denoiser_processor import DenoiserProcessor
+        
+        def run_batch(waveforms):
+            with registry.use(key, lambda: DenoiserProcessor(model, device)) as processor:
+                return processor.denoise_batch(waveforms)
+        
+        batchers[key] = MicroBatcher(
+            run_batch, EXECUTORS.get("denoiser"), max_items=BATCH_MAX_ITEMS, window=BATCH_WINDOW_MS / 1000
+        )
+    return batchers[key]
+
+async def process_denoiser(input_path: str, output_path: str, on_progress=None, model: str = "dns64") -> ProcessResponse:
+    """Process with Facebook Denoiser, batched with concurrent requests"""
     try:
+        from processors.denoiser_processor import DenoiserProcessor
+        from processors.progress import ProgressTracker
+        device = get_device()
+        key = ("denoiser", model, device)
+        executor = EXECUTORS.get("denoiser")
+        loop = asyncio.get_event_loop()
+        
+        with registry.use(key, lambda: DenoiserProcessor(model, device)) as processor:
+            audio = await loop.run_in_executor(executor, processor.load_input, input_path)
+            duration = audio.shape[-1] / processor.sample_rate
+            if duration <= BATCH_MAX_SECONDS:
+                enhanced = await get_denoise_batcher(model, device).submit(audio)
+            else:
+                enhanced = (await loop.run_in_executor(executor, processor.denoise_batch, [audio]))[0]
+            await loop.run_in_executor(executor, processor.save_output, output_path, enhanced)
+        
+        ProgressTracker("denoiser", duration, on_progress).update(duration)
+        return ProcessResponse(
+            success=True,
+            output_path=output_path,
+            message="Denoiser completed successfully"
+        )
+    except Exception as e:
+        return ProcessResponse(
+            success=False,
+            message=f"Denoiser failed: {str(e)}"
+        )
+
+def get_spleeter_batcher(stems: str) -> MicroBatcher:
+    """Batcher for one Spleeter model; batches run on the spleeter executor"""
+    key = ("spleeter", stems, "cpu")
+    if key not in batchers:
         from processors.spleeter_processor import SpleeterProcessor
-        processor = SpleeterProcessor()
-        result = await processor.separate(input_path, output_path, stems)
+        
+        def run_batch(jobs):
+            with registry.use(key, SpleeterProcessor) as processor:
+                return processor.separate_batch(jobs, stems)
+        
+        batchers[key] = MicroBatcher(
+            run_batch, EXECUTORS.get("spleeter"), max_items=SPLEETER_BATCH_MAX_ITEMS,
+            window=SPLEETER_BATCH_WINDOW_MS / 1000
+        )
+    return batchers[key]
+
+async def process_spleeter(input_path: str, output_path: str, stems: str = "2stems",
+                           stem: Optional[str] = None) -> ProcessResponse:
+    """Process with Spleeter for vocal extraction (or any other stem), batched with concurrent requests"""
+    try:
+        result = await get_spleeter_batcher(stems).submit((input_path, output_path, stem or "vocals"))
+        if isinstance(result, Exception):
+            raise result
         return ProcessResponse(
             success=True,
             output_path=result,
@@ -166,8 +385,100 @@ async def process_spleeter(input_path: str, output_path: str, stems: str = "2ste
             message=f"Spleeter failed: {str(e)}"
         )
 
+# Stems each separation mode produces. Every stem of a run is kept in the stem
+# cache, so asking for another stem of the same input is a file copy.
+SEPARATION_STEMS = {
+    "demucs": ("vocals", "drums", "bass", "other"),
+    "spleeter_2stems": ("vocals", "accompaniment"),
+    "spleeter_4stems": ("vocals", "drums", "bass", "other"),
+    "spleeter_5stems": ("vocals", "drums", "bass", "piano", "other"),
+}
+
+def check_separation_options(mode: str, stem: Optional[str] = None, **params) -> dict:
+    """
+    Validate a separation mode's options: the stem to return (a stem name, or
+    no_<stem> for the mix of the others), plus Demucs' segment, overlap and shifts
+    """
+    if stem is not None:
+        name = stem[3:] if stem.startswith("no_") else stem
+        if name not in SEPARATION_STEMS[mode]:
+            raise ValueError(f"{mode} has no stem {stem!r}; choose from {', '.join(SEPARATION_STEMS[mode])}")
+    if mode == "demucs":
+        return dict(check_demucs_options(**params), stem=stem)
+    if params:
+        raise TypeError(f"unexpected options {', '.join(sorted(params))}")
+    return {"stem": stem}
+
+# Per-request parameters each mode accepts, with their validators
+MODE_OPTIONS = {
+    # stem; for demucs also segment (seconds), overlap (0-1), shifts
+    mode: functools.partial(check_separation_options, mode) for mode in SEPARATION_STEMS
+}
+
+# Processor label each mode's model loads are recorded under in MODEL_LOAD_SECONDS
+# (Spleeter loads its model in a subprocess on every run, which is part of its cost)
+MODEL_LOAD_PROCESSORS = {
+    "resemble_denoise": "resemble",
+    "resemble_enhance": "resemble",
+    "demucs": "demucs",
+    "denoiser": "denoiser",
+}
+
+PROCESS_MODES = ["resemble_denoise", "resemble_enhance", "demucs", "denoiser", "spleeter_2stems", "spleeter_4stems", "spleeter_5stems"]
+
+async def run_mode(mode: str, input_path: str, output_path: str, on_progress=None,
+                   options: Optional[Dict[str, Any]] = None) -> ProcessResponse:
+    """Dispatch a job to the processing function for its mode"""
+    options = options or {}
+    if mode == "resemble_denoise":
+        return await process_resemble_denoise(input_path, output_path, on_progress)
+    elif mode == "resemble_enhance":
+        return await process_resemble_enhance(input_path, output_path, on_progress)
+    elif mode == "demucs":
+        return await process_demucs(input_path, output_path, on_progress, **options)
+    elif mode == "denoiser":
+        return await process_denoiser(input_path, output_path, on_progress)
+    else:
+        stems = mode.replace("spleeter_", "")
+        return await process_spleeter(input_path, output_path, stems, **options)
+
+async def run_job(job: JobStatus) -> ProcessResponse:
+    """Run a job claimed from the queue, reporting progress onto it"""
+    start_time = datetime.now()
+    job.started_at = time.time()
+    job.message = f"{job.mode}: starting"
+    on_progress = scheduler.guard_progress(job.job_id, make_progress_callback(job))
+    load_processor = MODEL_LOAD_PROCESSORS.get(job.mode)
+    loaded_before = metrics.MODEL_LOAD_SECONDS.total(processor=load_processor) if load_processor else 0.0
+    result = await run_mode(job.mode, job.input_path, job.output_path, on_progress, job.options)
+    result.processing_time = job.processing_time = (datetime.now() - start_time).total_seconds()
+    if load_processor:
+        # Jobs waiting on the same load share it, so they all leave it out of their cost
+        loaded = metrics.MODEL_LOAD_SECONDS.total(processor=load_processor) - loaded_before
+        job.model_load_seconds = min(loaded, job.processing_time)
+    result.job_id = job.job_id
+    return result
+
 # ===== API Endpoints =====
 
+async def evict_idle_models():
+    """Periodically unload models that have been idle longer than the TTL"""
+    while True:
+        await asyncio.sleep(max(min(MODEL_IDLE_TTL / 4, 60), 1))
+        registry.evict_idle()
+
+@app.on_event("startup")
+async def start_scheduler():
+    scheduler.start(run_job)
+    if MODEL_IDLE_TTL:
+        asyncio.ensure_future(evict_idle_models())
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
+    registry.clear()
+    EXECUTORS.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint with API info"""
@@ -186,6 +497,7 @@ async def get_status():
             "resemble_denoise",
             "resemble_enhance",
             "demucs",
+            "denoiser",
             "spleeter_2stems",
             "spleeter_4stems",
             "spleeter_5stems",
@@ -193,51 +505,373 @@ async def get_status():
             "mossformer2"
         ],
         mps_available=check_mps_available(),
-        cuda_available=check_cuda_available()
+        cuda_available=check_cuda_available(),
+        loaded_models=registry.stats(),
+        realtime_factors=cost_model.snapshot(),
+        thread_allocation=EXECUTORS.allocation(),
+        stem_cache=STEM_CACHE.stats()
     )
 
+async def in_thread(fn, *args):
+    """Run a blocking call (job store, file reads) in the default executor, off the event loop"""
+    return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
+
+async def job_coalesce_key(input_path: str, mode: str, output_path: Optional[str] = None, **params) -> str:
+    """
+    Key identifying identical work: input content hash, mode and processing parameters.
+    An explicitly requested output path is part of the key, since the result must land there.
+    """
+    digest = await in_thread(file_digest, input_path)
+    parts = [digest, mode] + [f"{name}={params[name]}" for name in sorted(params)]
+    if output_path:
+        parts.append(f"output={os.path.abspath(output_path)}")
+    return ":".join(parts)
+
+async def enqueue_job(input_path: str, output_path: str, mode: str, priority: int = 0,
+                      job_id: Optional[str] = None, wait: bool = False,
+                      output_requested: bool = False, options: Optional[Dict[str, Any]] = None) -> ProcessResponse:
+    """
+    Queue a validated job; returns at once, or when it finishes if wait is set.
+    Identical to an in-flight job, it attaches to that job instead (see COALESCE_JOBS).
+    """
+    job_id = job_id or uuid.uuid4().hex
+    # Checked again when the job is stored; failing here skips hashing the input
+    if await in_thread(job_store.get, job_id) is not None:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already exists")
+    
+    options = options or {}
+    key = None
+    if COALESCE_JOBS:
+        key = await job_coalesce_key(input_path, mode, output_path if output_requested else None, **options)
+    leader = await in_thread(job_store.find_inflight, key)
+    if leader is None:
+        audio_seconds = await in_thread(audio_duration, input_path)
+        estimated_seconds = await in_thread(admit_job, mode, audio_seconds, work_factor(mode, options))
+    else:
+        # No new work, so nothing to admit
+        audio_seconds, estimated_seconds = leader["audio_seconds"], leader["estimated_seconds"]
+    
+    job = JobStatus(
+        job_id=job_id, status="pending", progress=0.0, message="Queued",
+        mode=mode, options=options, priority=priority, input_path=input_path, output_path=output_path,
+        audio_seconds=audio_seconds, estimated_seconds=estimated_seconds, coalesce_key=key
+    )
+    # Work queued ahead of this job, spread over the concurrent job slots
+    wait_seconds = await in_thread(backlog_seconds) / scheduler.max_concurrent
+    try:
+        job_id = await in_thread(scheduler.submit, job, priority)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {e}")
+    except JobExists as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    REQUESTS_TOTAL.inc(mode=mode)
+    
+    coalesced = job_id != job.job_id
+    if coalesced:
+        COALESCED_TOTAL.inc(mode=mode)
+        leader = await in_thread(job_store.get, job_id)
+        output_path = leader["output_path"] if leader else output_path
+    
+    if wait:
+        result = await scheduler.wait(job_id)
+        if result is None:
+            finished = await in_thread(scheduler.get, job_id)
+            return ProcessResponse(success=False, message=finished.message if finished else "Job lost",
+                                   job_id=job_id, coalesced=coalesced)
+        return ProcessResponse(**dict(result, coalesced=coalesced))
+    
+    position = await in_thread(scheduler.queue_position, job_id)
+    if coalesced:
+        message = f"Attached to in-flight job {job_id}" + (f" (position {position})" if position else "")
+    else:
+        message = f"Job queued (position {position})"
+    response = ProcessResponse(
+        success=True,
+        output_path=output_path,
+        message=message,
+        job_id=job_id,
+        estimated_seconds=estimated_seconds,
+        coalesced=coalesced
+    )
+    if estimated_seconds is not None:
+        completion = datetime.now().timestamp() + wait_seconds + estimated_seconds
+        response.estimated_completion = datetime.fromtimestamp(completion).isoformat(timespec="seconds")
+    return response
+
+def backlog_seconds() -> float:
+    """Estimated processing seconds left across pending and running jobs"""
+    total = 0.0
+    now = time.time()
+    for job in job_store.active_jobs():
+        if job["status"] == "pending":
+            total += job["estimated_seconds"] or 0.0
+        elif job["eta"] is not None:
+            total += job["eta"]
+        elif job["estimated_seconds"] is not None:
+            total += max(job["estimated_seconds"] - (now - (job["started_at"] or now)), 0.0)
+    return total
+
+def admit_job(mode: str, audio_seconds: Optional[float], factor: float = 1.0) -> Optional[float]:
+    """
+    Estimate a job's cost and reject it with 429 if it exceeds the budgets
+    
+    Returns:
+        Estimated processing seconds (None when the duration is unknown)
+    """
+    estimated = cost_model.estimate(mode, audio_seconds)
+    if estimated is None:
+        return None
+    estimated *= factor
+    
+    if MAX_JOB_COST and estimated > MAX_JOB_COST:
+        raise HTTPException(status_code=429, detail={
+            "message": f"Estimated processing time {estimated:.0f}s exceeds the per-job budget of {MAX_JOB_COST:.0f}s",
+            "estimated_seconds": round(estimated, 1),
+        })
+    
+    backlog = backlog_seconds()
+    if MAX_BACKLOG_COST and backlog > 0 and backlog + estimated > MAX_BACKLOG_COST:
+        retry_after = math.ceil((backlog + estimated - MAX_BACKLOG_COST) / scheduler.max_concurrent)
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "message": f"Server busy: {backlog:.0f}s of work queued",
+                "estimated_seconds": round(estimated, 1),
+                "retry_after": retry_after,
+            },
+            headers={"Retry-After": str(retry_after)}
+        )
+    return estimated
+
+def validate_mode(mode: Optional[str]) -> Optional[str]:
+    """Normalize a mode name, rejecting unknown modes with 400"""
+    if mode is None:
+        return None
+    mode = mode.lower()
+    if mode not in PROCESS_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown processing mode: {mode}")
+    return mode
+
+def validate_options(mode: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a request's mode parameters, rejecting unknown or out-of-range ones with 400"""
+    if not options:
+        return {}
+    validator = MODE_OPTIONS.get(mode)
+    if validator is None:
+        raise HTTPException(status_code=400, detail=f"Mode {mode} takes no options")
+    try:
+        validator(**options)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid options for {mode}: {e}")
+    return options
+
 @app.post("/process", response_model=ProcessResponse)
 async def process_audio(request: ProcessRequest):
-    """Process audio file with specified AI model"""
-    start_time = datetime.now()
-    
+    """Queue an audio file for processing; poll /job/{job_id} or pass wait=true"""
     # Validate input
-    if not os.path.exists(request.input_path):
-        raise HTTPException(status_code=404, detail="Input file not found")
+    if request.file_id:
+        input_path = file_transfer.find_upload(request.file_id)
+        if input_path is None:
+            raise HTTPException(status_code=404, detail="Uploaded file not found")
+        input_path = str(input_path)
+    elif request.input_path:
+        input_path = request.input_path
+        if not os.path.exists(input_path):
+            raise HTTPException(status_code=404, detail="Input file not found")
+    else:
+        raise HTTPException(status_code=400, detail="Either input_path or file_id is required")
+    
+    mode = validate_mode(request.mode)
+    options = validate_options(mode, request.options)
     
     # Set output path if not provided
     output_path = request.output_path
     if not output_path:
-        input_p = Path(request.input_path)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_path = str(input_p.parent / f"{timestamp}_{input_p.stem}_processed.wav")
-    
-    # Process based on mode
-    mode = request.mode.lower()
-    
-    if mode == "resemble_denoise":
-        result = await process_resemble_denoise(request.input_path, output_path)
-    elif mode == "resemble_enhance":
-        result = await process_resemble_enhance(request.input_path, output_path)
-    elif mode == "demucs":
-        result = await process_demucs(request.input_path, output_path)
-    elif mode in ["spleeter_2stems", "spleeter_4stems", "spleeter_5stems"]:
-        stems = mode.replace("spleeter_", "")
-        result = await process_spleeter(request.input_path, output_path, stems)
-    else:
-        raise HTTPException(status_code=400, detail=f"Unknown processing mode: {mode}")
+        input_p = Path(input_path)
+        if request.file_id:
+            output_path = str(file_transfer.result_path_for(input_p))
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_path = str(input_p.parent / f"{timestamp}_{input_p.stem}_processed.wav")
     
-    # Add processing time
-    result.processing_time = (datetime.now() - start_time).total_seconds()
+    return await enqueue_job(input_path, output_path, mode, request.priority, request.job_id, request.wait,
+                             output_requested=bool(request.output_path), options=options)
+
+async def finish_upload(file_id: str, path: Path, size: int, mode: Optional[str],
+                        priority: int, wait: bool) -> UploadResponse:
+    """Optionally queue an upload for processing and build the response"""
+    job = None
+    if mode is not None:
+        job = await enqueue_job(str(path), str(file_transfer.result_path_for(path)), mode, priority, wait=wait)
+    return UploadResponse(file_id=file_id, size=size, job=job)
+
+@app.post("/upload", response_model=UploadResponse)
+async def upload_file(file: UploadFile = File(...), mode: Optional[str] = None,
+                      priority: int = 0, wait: bool = False):
+    """
+    Upload an audio file as multipart form data, copied to disk in chunks.
+    Pass mode to queue it for processing in the same request.
+    """
+    mode = validate_mode(mode)
+    file_id, path = file_transfer.new_upload_path(file.filename)
+    try:
+        size = await file_transfer.save_stream(file_transfer.iter_upload_file(file), path)
+    except file_transfer.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return await finish_upload(file_id, path, size, mode, priority, wait)
+
+@app.post("/upload/raw", response_model=UploadResponse)
+async def upload_raw(request: Request, filename: Optional[str] = None,
+                     sample_rate: Optional[int] = None, channels: int = 1, sample_format: str = "s16le",
+                     mode: Optional[str] = None, priority: int = 0, wait: bool = False):
+    """
+    Upload a file as the raw request body, written to disk as it arrives.
+    With sample_rate set, the body is interleaved PCM (sample_format: s16le, s24le,
+    s32le or f32le) and is stored as a WAV file.
+    """
+    mode = validate_mode(mode)
+    pcm = None
+    if sample_rate is not None:
+        if sample_format not in file_transfer.PCM_FORMATS or sample_rate <= 0 or channels <= 0:
+            raise HTTPException(status_code=400, detail="Invalid PCM format")
+        pcm = (sample_rate, channels, sample_format)
+        filename = "upload.wav"
     
-    return result
+    file_id, path = file_transfer.new_upload_path(filename)
+    try:
+        size = await file_transfer.save_stream(request.stream(), path, pcm)
+    except file_transfer.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return await finish_upload(file_id, path, size, mode, priority, wait)
 
 @app.get("/job/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str):
     """Get status of a processing job"""
-    if job_id not in jobs:
+    job = await in_thread(scheduler.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.queue_position = await in_thread(scheduler.queue_position, job_id)
+    return job
+
+@app.get("/job/{job_id}/result")
+async def download_result(job_id: str, request: Request):
+    """Download a finished job's output, honouring single HTTP Range requests"""
+    job = scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "completed" or not job.output_path or not os.path.exists(job.output_path):
+        raise HTTPException(status_code=409, detail=f"Job result not available (status: {job.status})")
+    
+    path = Path(job.output_path)
+    size = path.stat().st_size
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{path.name}"',
+    }
+    try:
+        byte_range = file_transfer.parse_range(request.headers.get("range"), size)
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    return StreamingResponse(
+        file_transfer.iter_file_range(path, start, end),
+        status_code=status_code,
+        media_type="audio/wav" if path.suffix.lower() == ".wav" else "application/octet-stream",
+        headers=headers
+    )
+
+@app.delete("/job/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a pending or running job"""
+    if scheduler.get(job_id) is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    return jobs[job_id]
+    if not scheduler.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {scheduler.get(job_id).status}")
+    return scheduler.get(job_id)
+
+@app.websocket("/ws/denoise")
+async def denoise_stream(websocket: WebSocket, model: str = "dns64", dry: float = 0.0, num_frames: int = 1,
+                         channels: int = 1, sample_format: str = "f32le", stats_interval: float = 1.0):
+    """
+    Real-time denoising over a WebSocket.
+
+    Binary messages carry interleaved PCM at the model's sample rate (16 kHz) in
+    sample_format (f32le or s16le); enhanced mono PCM in the same format is sent
+    back as soon as the streamer produces it. Text messages: "flush" returns the
+    remaining audio and resets the stream, "stats" requests a stats report.
+    JSON stats (latency, real-time factor) are also sent every stats_interval seconds.
+    """
+    from processors.denoiser_processor import DenoiserProcessor
+    
+    await websocket.accept()
+    device = get_device()
+    executor = EXECUTORS.get("denoiser_stream")
+    loop = asyncio.get_event_loop()
+    try:
+        with registry.use(("denoiser", model, device), lambda: DenoiserProcessor(model, device)) as processor:
+            session = await loop.run_in_executor(
+                executor, lambda: processor.session(dry, num_frames, channels, sample_format)
+            )
+            await websocket.send_json({
+                "type": "ready",
+                "sample_rate": session.sample_rate,
+                "sample_format": sample_format,
+                "algorithmic_latency_ms": round(session.algorithmic_latency_ms, 1),
+                "stride_ms": round(session.stride_ms, 1),
+            })
+            
+            last_stats = loop.time()
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                
+                if message.get("bytes") is not None:
+                    out = await loop.run_in_executor(executor, session.feed, message["bytes"])
+                    if out:
+                        await websocket.send_bytes(out)
+                elif message.get("text") == "flush":
+                    out = await loop.run_in_executor(executor, session.flush)
+                    if out:
+                        await websocket.send_bytes(out)
+                    await websocket.send_json(session.stats())
+                elif message.get("text") == "stats":
+                    await websocket.send_json(session.stats())
+                
+                if stats_interval and loop.time() - last_stats >= stats_interval:
+                    last_stats = loop.time()
+                    await websocket.send_json(session.stats())
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        # The client may already be gone; nothing more to report then
+        try:
+            await websocket.send_json({"type": "error", "message": f"{type(e).__name__}: {e}"})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics"""
+    QUEUE_DEPTH.set(await in_thread(job_store.count, "pending"))
+    JOBS_RUNNING.set(await in_thread(job_store.count, "processing"))
+    PROCESS_RSS.set(metrics.process_rss_bytes())
+    REGISTRY_HITS.set_total(registry.hits)
+    REGISTRY_MISSES.set_total(registry.misses)
+    REGISTRY_EVICTIONS.set_total(registry.evictions)
+    loaded = registry.stats()
+    REGISTRY_MODELS.set(len(loaded))
+    REGISTRY_MEMORY.set(sum(model["memory_bytes"] for model in loaded))
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
@@ -253,19 +887,29 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8765, help="Port to bind to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Server processes sharing the job queue (cores are split between them)")
     args = parser.parse_args()
     
+    if args.workers > 1 and "AUDIOKNIFE_CPU_CORES" not in os.environ:
+        # Worker processes import the server afresh and size their executors from this
+        os.environ["AUDIOKNIFE_CPU_CORES"] = str(max(EXECUTORS.cores // args.workers, 1))
+    
     print("=" * 50)
     print("AudioKnife AI Backend")
     print("=" * 50)
     print(f"Device: {get_device()}")
     print(f"MPS Available: {check_mps_available()}")
     print(f"CUDA Available: {check_cuda_available()}")
+    print(f"Threads: {EXECUTORS.total_workers} concurrent jobs x {EXECUTORS.threads_per_job} threads "
+          f"({EXECUTORS.cores} cores)")
+    print(f"Job store: {JOB_DB} ({args.workers} worker process{'es' if args.workers > 1 else ''})")
     print("=" * 50)
     
     uvicorn.run(
         "server:app",
         host=args.host,
         port=args.port,
-        reload=args.reload
+        reload=args.reload,
+        workers=None if args.reload else args.workers
     )
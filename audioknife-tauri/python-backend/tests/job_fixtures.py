@@ -0,0 +1,46 @@
+"""
+Stand-ins for server.JobStatus and ProcessResponse: the fields and model_dump()
+the job store and scheduler use, without the server's pydantic models
+"""
+
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class Job:
+    """The JobStatus fields the scheduler reads and writes"""
+    job_id: str
+    status: str = "pending"
+    progress: float = 0.0
+    message: str = ""
+    mode: str = "denoiser"
+    options: Dict[str, Any] = field(default_factory=dict)
+    priority: int = 0
+    input_path: str = "in.wav"
+    output_path: str = "out.wav"
+    processing_time: Optional[float] = None
+    coalesce_key: Optional[str] = None
+    followers: int = 0
+
+    def model_dump(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Job":
+        return cls(**{f.name: row[f.name] for f in fields(cls)})
+
+
+@dataclass
+class Result:
+    success: bool
+    message: str
+    output_path: Optional[str] = None
+
+    def model_dump(self) -> dict:
+        return asdict(self)
+
+
+def new_job(**kwargs) -> Job:
+    return Job(job_id=uuid.uuid4().hex, **kwargs)
@@ -0,0 +1,109 @@
+"""
+Audio header tests: in-process WAV/FLAC/Ogg parsers and get_audio_info memoization
+
+app_gui imports gradio at module level, so these tests are skipped where it is not installed.
+Run from python-backend/: python -m pytest tests
+"""
+
+import importlib.util
+import io
+import struct
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# app_gui.py lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+HAS_GRADIO = importlib.util.find_spec("gradio") is not None
+if HAS_GRADIO:
+    import app_gui
+
+
+def wav_bytes(sample_rate: int, channels: int, magic: bytes = b"RIFF", extra_chunk: bytes = b"") -> bytes:
+    fmt = struct.pack("<HHIIHH", 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16)
+    chunks = extra_chunk + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", 0)
+    return magic + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def flac_bytes(sample_rate: int, channels: int, id3: bytes = b"") -> bytes:
+    # STREAMINFO: 20-bit sample rate, 3-bit channels - 1, 5-bit bits per sample - 1, 36-bit total samples
+    info = bytearray(34)
+    packed = (sample_rate << 44) | ((channels - 1) << 41) | (15 << 36)
+    info[10:18] = packed.to_bytes(8, "big")
+    return id3 + b"fLaC" + bytes([0x80, 0, 0, 34]) + bytes(info)
+
+
+def ogg_bytes(packet: bytes) -> bytes:
+    header = b"OggS" + bytes(22) + bytes([1])
+    return header + bytes([len(packet)]) + packet
+
+
+@unittest.skipUnless(HAS_GRADIO, "app_gui needs gradio")
+class HeaderParserTests(unittest.TestCase):
+    def test_wav(self):
+        self.assertEqual(app_gui._read_wav_header(io.BytesIO(wav_bytes(48000, 2))), (48000, 2))
+
+    def test_wav_skips_chunks_before_fmt(self):
+        # Odd-sized chunk: the parser must honour the pad byte
+        extra = b"LIST" + struct.pack("<I", 3) + b"abc\x00"
+        self.assertEqual(app_gui._read_wav_header(io.BytesIO(wav_bytes(22050, 1, extra_chunk=extra))), (22050, 1))
+
+    def test_rf64(self):
+        self.assertEqual(app_gui._read_wav_header(io.BytesIO(wav_bytes(96000, 6, magic=b"RF64"))), (96000, 6))
+
+    def test_truncated_or_foreign_wav(self):
+        self.assertIsNone(app_gui._read_wav_header(io.BytesIO(wav_bytes(44100, 2)[:20])))
+        self.assertIsNone(app_gui._read_wav_header(io.BytesIO(b"ID3" + bytes(40))))
+
+    def test_flac(self):
+        self.assertEqual(app_gui._read_flac_header(io.BytesIO(flac_bytes(44100, 2))), (44100, 2))
+
+    def test_flac_after_id3_tag(self):
+        id3 = b"ID3\x04\x00\x00" + bytes([0, 0, 1, 0]) + bytes(128)
+        self.assertEqual(app_gui._read_flac_header(io.BytesIO(flac_bytes(88200, 1, id3=id3))), (88200, 1))
+
+    def test_ogg_vorbis(self):
+        packet = b"\x01vorbis" + struct.pack("<IBI", 0, 2, 32000) + bytes(15)
+        self.assertEqual(app_gui._read_ogg_header(io.BytesIO(ogg_bytes(packet))), (32000, 2))
+
+    def test_ogg_opus_decodes_at_48k(self):
+        packet = b"OpusHead" + bytes([1, 1]) + struct.pack("<HIhB", 312, 16000, 0, 0)
+        self.assertEqual(app_gui._read_ogg_header(io.BytesIO(ogg_bytes(packet))), (48000, 1))
+
+
+@unittest.skipUnless(HAS_GRADIO, "app_gui needs gradio")
+class GetAudioInfoTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+        app_gui._probe_audio_info.cache_clear()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_header_is_read_in_process_and_memoized(self):
+        path = self.dir / "speech.wav"
+        path.write_bytes(wav_bytes(16000, 1))
+        with mock.patch.object(app_gui, "_probe_with_ffprobe") as ffprobe:
+            self.assertEqual(app_gui.get_audio_info(path), (16000, 1))
+            self.assertEqual(app_gui.get_audio_info(path), (16000, 1))
+        ffprobe.assert_not_called()
+        self.assertEqual(app_gui._probe_audio_info.cache_info().hits, 1)
+
+    def test_failed_probe_falls_back_without_being_memoized(self):
+        path = self.dir / "speech.mp3"
+        path.write_bytes(b"not yet probeable")
+        with mock.patch.object(app_gui, "_probe_with_ffprobe", return_value=None):
+            self.assertEqual(app_gui.get_audio_info(path), (44100, 2))
+        with mock.patch.object(app_gui, "_probe_with_ffprobe", return_value=(24000, 1)):
+            self.assertEqual(app_gui.get_audio_info(path), (24000, 1))
+
+    def test_missing_file_falls_back(self):
+        self.assertEqual(app_gui.get_audio_info(self.dir / "missing.wav"), (44100, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
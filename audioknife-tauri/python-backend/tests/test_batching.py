@@ -0,0 +1,88 @@
+"""
+Micro-batcher tests: window and size triggers, result order, failures and cancellation
+
+Run from python-backend/: python -m pytest tests
+"""
+
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from processors.batching import MicroBatcher
+
+
+class MicroBatcherTests(unittest.TestCase):
+    def test_requests_within_the_window_share_one_batch(self):
+        batches = []
+
+        def run_batch(items):
+            batches.append(list(items))
+            return [item * 10 for item in items]
+
+        async def scenario():
+            batcher = MicroBatcher(run_batch, max_items=8, window=0.05)
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(3)))
+            return batcher, results
+
+        batcher, results = asyncio.run(scenario())
+        self.assertEqual(results, [0, 10, 20])
+        self.assertEqual(batches, [[0, 1, 2]])
+        self.assertEqual(batcher.average_batch_size, 3)
+
+    def test_max_items_dispatches_without_waiting_for_the_window(self):
+        batches = []
+
+        def run_batch(items):
+            batches.append(list(items))
+            return items
+
+        async def scenario():
+            # A window far longer than the test: only max_items can trigger the batches
+            batcher = MicroBatcher(run_batch, max_items=2, window=60)
+            return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(4))), 5)
+
+        self.assertEqual(asyncio.run(scenario()), [0, 1, 2, 3])
+        self.assertEqual(batches, [[0, 1], [2, 3]])
+
+    def test_single_request_runs_after_the_window(self):
+        async def scenario():
+            batcher = MicroBatcher(lambda items: ["done"], window=0.01)
+            return await asyncio.wait_for(batcher.submit("clip"), 5)
+
+        self.assertEqual(asyncio.run(scenario()), "done")
+
+    def test_exception_fails_every_request_in_the_batch(self):
+        def run_batch(items):
+            raise RuntimeError("out of memory")
+
+        async def scenario():
+            batcher = MicroBatcher(run_batch, window=0.01)
+            return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        self.assertEqual([type(result) for result in results], [RuntimeError, RuntimeError])
+
+    def test_cancelled_request_is_dropped_from_the_batch(self):
+        batches = []
+
+        def run_batch(items):
+            batches.append(list(items))
+            return items
+
+        async def scenario():
+            batcher = MicroBatcher(run_batch, window=0.05)
+            cancelled = asyncio.ensure_future(batcher.submit("gone"))
+            kept = asyncio.ensure_future(batcher.submit("kept"))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            return await kept
+
+        self.assertEqual(asyncio.run(scenario()), "kept")
+        self.assertEqual(batches, [["kept"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
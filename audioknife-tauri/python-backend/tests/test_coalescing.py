@@ -0,0 +1,87 @@
+"""
+Coalescing tests: identical in-flight requests share one job and its result
+
+Run from python-backend/: python -m pytest tests
+"""
+
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_fixtures import Job, Result, new_job
+from job_queue import JobScheduler
+from job_store import JobStore
+
+
+class CoalescingTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = JobStore(Path(self.temp_dir.name) / "jobs.sqlite3")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_follower_receives_leader_result(self):
+        runs = []
+
+        async def run(job):
+            runs.append(job.job_id)
+            await asyncio.sleep(0.05)
+            return Result(success=True, message="done", output_path=f"{job.job_id}.wav")
+
+        async def scenario():
+            scheduler = JobScheduler(self.store, {}, Job.from_row, poll_interval=0.05,
+                                     heartbeat_interval=0.05, stale_after=0)
+            leader = new_job(coalesce_key="same-input")
+            follower = new_job(coalesce_key="same-input")
+            leader_id = scheduler.submit(leader)
+            follower_id = scheduler.submit(follower)
+            scheduler.start(run)
+            try:
+                results = await asyncio.wait_for(
+                    asyncio.gather(scheduler.wait(leader_id, 0.02), scheduler.wait(follower_id, 0.02)), 5
+                )
+            finally:
+                await scheduler.stop()
+            return leader, leader_id, follower_id, results
+
+        leader, leader_id, follower_id, (leader_result, follower_result) = asyncio.run(scenario())
+        self.assertEqual(leader_id, leader.job_id)
+        self.assertEqual(follower_id, leader.job_id)
+        self.assertEqual(runs, [leader.job_id])
+        self.assertEqual(follower_result, leader_result)
+        self.assertEqual(leader_result["output_path"], f"{leader.job_id}.wav")
+        self.assertEqual(self.store.get(leader.job_id)["followers"], 1)
+
+    def test_follower_attaches_on_a_full_queue(self):
+        scheduler = JobScheduler(self.store, {}, Job.from_row, max_pending=1)
+        leader = new_job(coalesce_key="same-input")
+        scheduler.submit(leader)
+
+        self.assertEqual(scheduler.submit(new_job(coalesce_key="same-input")), leader.job_id)
+
+    def test_cancel_by_follower_detaches_without_stopping_leader(self):
+        leader = new_job(coalesce_key="same-input")
+        self.assertIsNone(self.store.insert(leader.model_dump()))
+        self.assertEqual(self.store.insert(new_job(coalesce_key="same-input").model_dump()), leader.job_id)
+
+        self.assertEqual(self.store.request_cancel(leader.job_id), "detached")
+        self.assertEqual(self.store.get(leader.job_id)["status"], "pending")
+        self.assertEqual(self.store.request_cancel(leader.job_id), "pending")
+        self.assertEqual(self.store.get(leader.job_id)["status"], "cancelled")
+
+    def test_finished_job_does_not_absorb_new_requests(self):
+        leader = new_job(coalesce_key="same-input")
+        self.store.insert(leader.model_dump())
+        self.store.claim("worker")
+        self.store.finish(leader.job_id, "worker", "completed", "done", {"success": True})
+
+        self.assertIsNone(self.store.insert(new_job(coalesce_key="same-input").model_dump()))
+
+
+if __name__ == "__main__":
+    unittest.main()
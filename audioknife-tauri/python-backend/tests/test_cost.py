@@ -0,0 +1,74 @@
+"""
+Cost model tests: real-time factor averaging and duration estimates
+
+Run from python-backend/: python -m pytest tests
+"""
+
+import sys
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from processors.cost import DEFAULT_RTF, CostModel, audio_duration
+from processors.metrics import Histogram
+
+
+class CostModelTests(unittest.TestCase):
+    def test_first_measurement_is_averaged_into_the_default(self):
+        model = CostModel(smoothing=0.2)
+        # A cold job ten times slower than the default moves the estimate only by the smoothing step
+        model.update("demucs", processing_seconds=50.0, audio_seconds=10.0)
+        self.assertAlmostEqual(model.rtf("demucs"), DEFAULT_RTF["demucs"] + 0.2 * (5.0 - DEFAULT_RTF["demucs"]))
+        self.assertEqual(model.snapshot()["demucs"]["samples"], 1)
+
+    def test_repeated_measurements_converge(self):
+        model = CostModel()
+        for _ in range(100):
+            model.update("denoiser", processing_seconds=3.0, audio_seconds=10.0)
+        self.assertAlmostEqual(model.rtf("denoiser"), 0.3, places=4)
+
+    def test_unknown_mode_starts_at_its_first_measurement(self):
+        model = CostModel()
+        self.assertEqual(model.rtf("new_mode"), model.fallback_rtf)
+        model.update("new_mode", processing_seconds=4.0, audio_seconds=2.0)
+        self.assertAlmostEqual(model.rtf("new_mode"), 2.0)
+
+    def test_unusable_measurements_are_ignored(self):
+        model = CostModel()
+        model.update("demucs", processing_seconds=5.0, audio_seconds=0.0)
+        model.update("demucs", processing_seconds=0.0, audio_seconds=5.0)
+        self.assertEqual(model.rtf("demucs"), DEFAULT_RTF["demucs"])
+        self.assertEqual(model.snapshot()["demucs"]["samples"], 0)
+
+    def test_estimate(self):
+        model = CostModel({"demucs": 0.5})
+        self.assertEqual(model.estimate("demucs", 60.0), 30.0)
+        self.assertIsNone(model.estimate("demucs", None))
+
+    def test_audio_duration_from_header(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "tone.wav"
+            with wave.open(str(path), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(8000)
+                wav.writeframes(b"\x00\x00" * 12000)
+            self.assertAlmostEqual(audio_duration(str(path)), 1.5)
+            self.assertIsNone(audio_duration(str(Path(temp_dir) / "missing.wav")))
+
+
+class HistogramTotalTests(unittest.TestCase):
+    def test_total_sums_observations_per_label(self):
+        histogram = Histogram("audioknife_test_load_seconds", "Test histogram", ["processor"])
+        self.assertEqual(histogram.total(processor="demucs"), 0.0)
+        histogram.observe(1.5, processor="demucs")
+        histogram.observe(2.0, processor="demucs")
+        histogram.observe(9.0, processor="resemble")
+        self.assertEqual(histogram.total(processor="demucs"), 3.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
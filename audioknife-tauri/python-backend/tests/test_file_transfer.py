@@ -0,0 +1,97 @@
+"""
+Upload and download helper tests: Range parsing, streamed uploads and raw PCM wrapping
+
+Run from python-backend/: python -m pytest tests
+"""
+
+import asyncio
+import sys
+import tempfile
+import unittest
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import file_transfer
+from file_transfer import UploadTooLarge, find_upload, iter_file_range, parse_range, save_stream
+
+
+async def chunks_of(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class ParseRangeTests(unittest.TestCase):
+    def test_no_header_sends_whole_file(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range("", 100))
+
+    def test_closed_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+
+    def test_open_ended_range(self):
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+
+    def test_end_is_clamped_to_size(self):
+        self.assertEqual(parse_range("bytes=50-1000", 100), (50, 99))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-500", 100), (0, 99))
+
+    def test_unsatisfiable_ranges_raise(self):
+        for header in ("bytes=100-", "bytes=20-10", "bytes=-0"):
+            with self.subTest(header=header), self.assertRaises(ValueError):
+                parse_range(header, 100)
+
+    def test_multiple_ranges_and_other_units_fall_back_to_whole_file(self):
+        self.assertIsNone(parse_range("bytes=0-9,20-29", 100))
+        self.assertIsNone(parse_range("items=0-9", 100))
+        self.assertIsNone(parse_range("bytes=-", 100))
+
+
+class TransferTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_iter_file_range_yields_inclusive_slice(self):
+        path = self.dir / "data.bin"
+        path.write_bytes(bytes(range(256)) * 10)
+        self.assertEqual(b"".join(iter_file_range(path, 10, 19)), bytes(range(10, 20)))
+
+    def test_raw_pcm_upload_is_wrapped_in_a_wav_header(self):
+        path = self.dir / "upload.wav"
+        # 5 stereo s16le frames plus a trailing partial frame, split across chunks
+        pcm = bytes(range(20)) + b"\x01\x02"
+        received = asyncio.run(save_stream(chunks_of(pcm[:7], pcm[7:]), path, pcm=(16000, 2, "s16le")))
+
+        self.assertEqual(received, len(pcm))
+        with wave.open(str(path)) as wav:
+            self.assertEqual(wav.getframerate(), 16000)
+            self.assertEqual(wav.getnchannels(), 2)
+            self.assertEqual(wav.getsampwidth(), 2)
+            self.assertEqual(wav.readframes(wav.getnframes()), pcm[:20])
+
+    def test_oversized_upload_is_removed(self):
+        path = self.dir / "big.bin"
+        limit = file_transfer.MAX_UPLOAD_BYTES
+        file_transfer.MAX_UPLOAD_BYTES = 8
+        try:
+            with self.assertRaises(UploadTooLarge):
+                asyncio.run(save_stream(chunks_of(b"12345", b"67890"), path))
+        finally:
+            file_transfer.MAX_UPLOAD_BYTES = limit
+        self.assertFalse(path.exists())
+
+    def test_find_upload_rejects_malformed_ids(self):
+        self.assertIsNone(find_upload("../../etc/passwd"))
+        self.assertIsNone(find_upload(""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+GUI stem cache tests: stems linked into the caller's directory, eviction and entries removed from disk
+
+app_gui imports gradio at module level, so these tests are skipped where it is not installed.
+Run from python-backend/: python -m pytest tests
+"""
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# app_gui.py lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+HAS_GRADIO = importlib.util.find_spec("gradio") is not None
+if HAS_GRADIO:
+    from app_gui import StemCache
+
+
+@unittest.skipUnless(HAS_GRADIO, "app_gui needs gradio")
+class StemCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def stems(self, name: str, size: int = 100) -> dict:
+        """A separator's output: vocals and accompaniment of `size` bytes each"""
+        out = self.dir / "separated" / name
+        out.mkdir(parents=True)
+        stems = {}
+        for stem in ("vocals", "accompaniment"):
+            stems[stem] = out / f"{stem}.wav"
+            stems[stem].write_bytes(stem[0].encode() * size)
+        return stems
+
+    def test_hit_links_stems_into_the_callers_directory(self):
+        cache = StemCache(self.dir / "cache", 10_000)
+        self.assertTrue(cache.put_stems("song", self.stems("song")))
+
+        got = cache.get_stems("song", self.dir / "job")
+        self.assertEqual(sorted(got), ["accompaniment", "vocals"])
+        self.assertEqual(got["vocals"].parent, self.dir / "job")
+        self.assertEqual(got["accompaniment"].read_bytes(), b"a" * 100)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_miss(self):
+        cache = StemCache(self.dir / "cache", 10_000)
+        self.assertEqual(cache.get_stems("unknown", self.dir / "job"), {})
+        self.assertEqual(cache.misses, 1)
+
+    def test_taken_stems_survive_eviction(self):
+        cache = StemCache(self.dir / "cache", 500)
+        cache.put_stems("a", self.stems("a"))
+        got = cache.get_stems("a", self.dir / "job")
+        cache.put_stems("b", self.stems("b"))
+        cache.put_stems("c", self.stems("c"))
+
+        self.assertEqual(cache.get_stems("a", self.dir / "job2"), {})
+        self.assertEqual(got["vocals"].read_bytes(), b"v" * 100)
+
+    def test_least_recently_used_entry_is_evicted_first(self):
+        cache = StemCache(self.dir / "cache", 450)
+        cache.put_stems("a", self.stems("a"))
+        cache.put_stems("b", self.stems("b"))
+        cache.get_stems("a", self.dir / "touch")
+        cache.put_stems("c", self.stems("c"))
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertTrue(cache.get_stems("a", self.dir / "a"))
+        self.assertFalse(cache.get_stems("b", self.dir / "b"))
+        self.assertTrue(cache.get_stems("c", self.dir / "c"))
+
+    def test_new_entry_is_kept_even_over_budget(self):
+        cache = StemCache(self.dir / "cache", 100)
+        cache.put_stems("big", self.stems("big"))
+        self.assertTrue(cache.get_stems("big", self.dir / "job"))
+
+    def test_entry_deleted_from_disk_is_a_miss(self):
+        cache = StemCache(self.dir / "cache", 10_000)
+        cache.put_stems("song", self.stems("song"))
+        for path in (self.dir / "cache" / "song").iterdir():
+            path.unlink()
+
+        self.assertEqual(cache.get_stems("song", self.dir / "job"), {})
+        self.assertEqual(cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+Job scheduler tests: priority order, bounded concurrency, queue limit, cancellation and off-loop submits
+
+Run from python-backend/: python -m pytest tests
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_fixtures import Job, Result, new_job
+from job_queue import JobScheduler, QueueFull
+from job_store import JobStore
+from processors.progress import JobCancelled
+
+
+class JobSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = JobStore(Path(self.temp_dir.name) / "jobs.sqlite3")
+        self.finished = []
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def scheduler(self, **kwargs) -> JobScheduler:
+        kwargs.setdefault("on_finish", lambda job, result: self.finished.append((job.job_id, job.status)))
+        return JobScheduler(self.store, {}, Job.from_row, poll_interval=0.02, heartbeat_interval=0.02,
+                            stale_after=0, **kwargs)
+
+    def run_until_done(self, scheduler, run, job_ids, timeout=5.0):
+        async def scenario():
+            scheduler.start(run)
+            try:
+                await asyncio.wait_for(asyncio.gather(*(scheduler.wait(job_id, 0.01) for job_id in job_ids)), timeout)
+            finally:
+                await scheduler.stop()
+        asyncio.run(scenario())
+
+    def test_jobs_run_by_priority_then_submission_order(self):
+        scheduler = self.scheduler()
+        jobs = [new_job(), new_job(), new_job(), new_job()]
+        for job, priority in zip(jobs, [0, 5, 0, 5]):
+            scheduler.submit(job, priority=priority)
+        order = []
+
+        async def run(job):
+            order.append(job.job_id)
+            return Result(success=True, message="done")
+
+        self.run_until_done(scheduler, run, [job.job_id for job in jobs])
+        self.assertEqual(order, [jobs[1].job_id, jobs[3].job_id, jobs[0].job_id, jobs[2].job_id])
+        self.assertEqual({status for _, status in self.finished}, {"completed"})
+
+    def test_running_jobs_never_exceed_max_concurrent(self):
+        scheduler = self.scheduler(max_concurrent=2)
+        jobs = [new_job() for _ in range(6)]
+        for job in jobs:
+            scheduler.submit(job)
+        running = {"now": 0, "peak": 0}
+
+        async def run(job):
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+            await asyncio.sleep(0.03)
+            running["now"] -= 1
+            return Result(success=True, message="done")
+
+        self.run_until_done(scheduler, run, [job.job_id for job in jobs])
+        self.assertEqual(running["peak"], 2)
+        self.assertEqual(len(self.finished), 6)
+
+    def test_submit_beyond_max_pending_raises(self):
+        scheduler = self.scheduler(max_pending=2)
+        scheduler.submit(new_job())
+        scheduler.submit(new_job())
+        with self.assertRaises(QueueFull):
+            scheduler.submit(new_job())
+
+    def test_cancel_pending_job(self):
+        scheduler = self.scheduler()
+        job = new_job()
+        scheduler.submit(job)
+
+        self.assertTrue(scheduler.cancel(job.job_id))
+        self.assertEqual(scheduler.get(job.job_id).status, "cancelled")
+        self.assertEqual(self.finished, [(job.job_id, "cancelled")])
+        self.assertFalse(scheduler.cancel(job.job_id))
+
+    def test_cancel_running_job_stops_its_executor_thread(self):
+        scheduler = self.scheduler()
+        job = new_job()
+        scheduler.submit(job)
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def work(on_progress):
+            started.set()
+            try:
+                for _ in range(500):
+                    on_progress({"processed_seconds": 0.0})
+                    threading.Event().wait(0.01)
+            except JobCancelled:
+                stopped.set()
+                raise
+            return Result(success=True, message="done")
+
+        async def run(job):
+            on_progress = scheduler.guard_progress(job.job_id, None)
+            return await asyncio.get_event_loop().run_in_executor(None, work, on_progress)
+
+        async def scenario():
+            scheduler.start(run)
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, started.wait, 5)
+                self.assertTrue(scheduler.cancel(job.job_id))
+                await asyncio.wait_for(scheduler.wait(job.job_id, 0.01), 5)
+            finally:
+                await scheduler.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(self.store.get(job.job_id)["status"], "cancelled")
+        self.assertTrue(stopped.wait(5))
+
+    def test_submit_from_another_thread_wakes_an_idle_worker(self):
+        # A poll interval far longer than the test: only the wake-up can start the job
+        scheduler = JobScheduler(self.store, {}, Job.from_row, poll_interval=60, heartbeat_interval=0.02,
+                                 stale_after=0)
+        job = new_job()
+
+        async def run(job):
+            return Result(success=True, message="done")
+
+        async def scenario():
+            scheduler.start(run)
+            try:
+                await asyncio.sleep(0.05)
+                await asyncio.get_event_loop().run_in_executor(None, scheduler.submit, job)
+                return await asyncio.wait_for(scheduler.wait(job.job_id, 0.01), 5)
+            finally:
+                await scheduler.stop()
+
+        self.assertEqual(asyncio.run(scenario()), {"success": True, "message": "done", "output_path": None})
+
+    def test_failing_job_records_the_error(self):
+        scheduler = self.scheduler()
+        job = new_job()
+        scheduler.submit(job)
+
+        async def run(job):
+            raise ValueError("bad input")
+
+        self.run_until_done(scheduler, run, [job.job_id])
+        row = self.store.get(job.job_id)
+        self.assertEqual(row["status"], "failed")
+        self.assertEqual(row["message"], "ValueError: bad input")
+
+
+if __name__ == "__main__":
+    unittest.main()
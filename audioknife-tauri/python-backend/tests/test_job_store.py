@@ -0,0 +1,107 @@
+"""
+Job store tests: concurrent claims, stale-job requeue and duplicate job ids
+
+Run from python-backend/: python -m pytest tests
+"""
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_fixtures import new_job
+from job_store import JobExists, JobStore
+
+
+class JobStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "jobs.sqlite3"
+        self.store = JobStore(self.path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_racing_claimers_take_each_job_once(self):
+        for _ in range(50):
+            self.store.insert(new_job().model_dump())
+        claimed = {"a": [], "b": []}
+        start = threading.Barrier(2)
+
+        def claimer(worker_id):
+            # A store per worker, as separate server processes would have
+            store = JobStore(self.path)
+            start.wait()
+            while True:
+                row = store.claim(worker_id)
+                if row is None:
+                    return
+                claimed[worker_id].append(row["job_id"])
+
+        threads = [threading.Thread(target=claimer, args=(worker_id,)) for worker_id in claimed]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        all_claims = claimed["a"] + claimed["b"]
+        self.assertEqual(len(all_claims), 50)
+        self.assertEqual(len(set(all_claims)), 50)
+        for worker_id, job_ids in claimed.items():
+            for job_id in job_ids:
+                row = self.store.get(job_id)
+                self.assertEqual(row["status"], "processing")
+                self.assertEqual(row["worker_id"], worker_id)
+                self.assertEqual(row["attempts"], 1)
+
+    def test_stale_job_is_requeued_and_old_worker_cannot_finish_it(self):
+        job = new_job()
+        self.store.insert(job.model_dump())
+        self.assertEqual(self.store.claim("lost")["job_id"], job.job_id)
+        self.store._connect().execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ?",
+                                      (time.time() - 60, job.job_id))
+
+        self.assertEqual(self.store.requeue_stale(30), 1)
+        row = self.store.get(job.job_id)
+        self.assertEqual(row["status"], "pending")
+        self.assertIsNone(row["worker_id"])
+
+        self.assertEqual(self.store.claim("rescuer")["attempts"], 2)
+        self.store.finish(job.job_id, "lost", "failed", "late result")
+        self.assertEqual(self.store.get(job.job_id)["status"], "processing")
+        self.store.finish(job.job_id, "rescuer", "completed", "done", {"success": True})
+        self.assertEqual(self.store.get(job.job_id)["status"], "completed")
+
+    def test_live_job_is_not_requeued(self):
+        self.store.insert(new_job().model_dump())
+        self.store.claim("alive")
+        self.assertEqual(self.store.requeue_stale(30), 0)
+
+    def test_stale_job_fails_after_max_attempts(self):
+        store = JobStore(self.path, max_attempts=1)
+        job = new_job()
+        store.insert(job.model_dump())
+        store.claim("lost")
+        store._connect().execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ?", (time.time() - 60, job.job_id))
+
+        self.assertEqual(store.requeue_stale(30), 0)
+        self.assertEqual(store.get(job.job_id)["status"], "failed")
+
+    def test_existing_job_id_is_not_overwritten(self):
+        job = new_job()
+        self.store.insert(job.model_dump())
+        self.store.claim("worker")
+        self.store.finish(job.job_id, "worker", "completed", "done", {"success": True})
+
+        with self.assertRaises(JobExists):
+            self.store.insert(dict(new_job(mode="demucs").model_dump(), job_id=job.job_id))
+        row = self.store.get(job.job_id)
+        self.assertEqual((row["status"], row["mode"]), ("completed", "denoiser"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Model worker tests: start-up timing and warm-up state
+
+The worker script is replaced by a stand-in that only answers the ready handshake.
+app_gui imports gradio at module level, so these tests are skipped where it is not installed.
+Run from python-backend/: python -m pytest tests
+"""
+
+import importlib.util
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# app_gui.py lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+HAS_GRADIO = importlib.util.find_spec("gradio") is not None
+if HAS_GRADIO:
+    import app_gui
+
+FAKE_WORKER = """
+import json, sys, time
+time.sleep(0.2)
+print(json.dumps({"ready": True, "backend": sys.argv[1], "load_time": 0.1}), flush=True)
+for line in sys.stdin:
+    if json.loads(line).get("command") == "shutdown":
+        break
+"""
+
+
+@unittest.skipUnless(HAS_GRADIO, "app_gui needs gradio")
+class ModelWorkerStartupTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        script = Path(self.temp_dir.name) / "fake_worker.py"
+        script.write_text(FAKE_WORKER)
+        patcher = mock.patch.object(app_gui, "WORKER_SCRIPT", script)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.worker = app_gui.ModelWorker("fake", sys.executable, self.temp_dir.name, self.temp_dir.name)
+        self.addCleanup(self.worker.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_start_records_handshake_time_and_reported_load_time(self):
+        self.worker.ensure_started()
+        self.assertEqual(self.worker.load_time, 0.1)
+        self.assertGreaterEqual(self.worker.startup_time, 0.2)
+        self.assertLess(self.worker.startup_time, 5.0)
+
+    def test_warm_up_time_excludes_waiting_for_a_running_job(self):
+        self.worker.ensure_started()
+        startup_time = self.worker.startup_time
+
+        def job():
+            # A job holds the worker for longer than its start-up took
+            with self.worker._lock:
+                time.sleep(1.0)
+
+        with mock.patch.dict(app_gui.WORKER_BACKENDS, {"fake": {"python": sys.executable}}), \
+                mock.patch.dict(app_gui.WORKER_POOL, {"fake": self.worker}), \
+                mock.patch.dict(app_gui.WARMUP_STATE):
+            thread = threading.Thread(target=job)
+            thread.start()
+            time.sleep(0.05)
+            app_gui.warm_up_workers(["fake"])
+            thread.join()
+            state = app_gui.get_warmup_state("fake")
+
+        self.assertEqual(state["status"], "ready")
+        self.assertEqual(state["load_time"], startup_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Resemble windowing tests: overlapping input windows and the crossfading output writer
+
+Needs torch and soundfile; skipped where they are not installed.
+Run from python-backend/: python -m pytest tests
+"""
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+HAS_TORCH = importlib.util.find_spec("torch") is not None and importlib.util.find_spec("soundfile") is not None
+if HAS_TORCH:
+    import numpy as np
+    import soundfile as sf
+    import torch
+
+    from processors.resemble_processor import ResembleProcessor, _CrossfadeWriter
+
+
+@unittest.skipUnless(HAS_TORCH, "needs torch and soundfile")
+class CrossfadeWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_overlaps_are_written_once(self):
+        path = str(self.dir / "out.wav")
+        writer = _CrossfadeWriter(path, 8000, 2, overlap=4)
+        for _ in range(3):
+            writer.write(torch.ones(2, 10))
+        writer.close()
+
+        audio, sample_rate = sf.read(path, always_2d=True)
+        self.assertEqual(sample_rate, 8000)
+        self.assertEqual(audio.shape, (3 * 10 - 2 * 4, 2))
+        # A constant signal stays constant through the crossfades
+        np.testing.assert_allclose(audio, 1.0, atol=1e-6)
+
+    def test_overlap_fades_from_previous_chunk_to_next(self):
+        path = str(self.dir / "out.wav")
+        writer = _CrossfadeWriter(path, 8000, 1, overlap=5)
+        writer.write(torch.zeros(1, 10))
+        writer.write(torch.ones(1, 10))
+        writer.close()
+
+        audio, _ = sf.read(path, always_2d=True)
+        self.assertEqual(len(audio), 15)
+        np.testing.assert_allclose(audio[5:10, 0], np.linspace(0.0, 1.0, 5), atol=1e-6)
+        np.testing.assert_allclose(audio[10:, 0], 1.0, atol=1e-6)
+
+    def test_without_overlap_chunks_are_concatenated(self):
+        path = str(self.dir / "out.wav")
+        writer = _CrossfadeWriter(path, 8000, 1, overlap=0)
+        writer.write(torch.full((1, 3), 0.5))
+        writer.write(torch.full((1, 4), -0.5))
+        writer.close()
+
+        audio, _ = sf.read(path, always_2d=True)
+        np.testing.assert_allclose(audio[:, 0], [0.5] * 3 + [-0.5] * 4, atol=1e-6)
+
+    @unittest.skipUnless(importlib.util.find_spec("torchaudio"), "needs torchaudio")
+    def test_unwritable_format_goes_through_a_temporary_wav(self):
+        path = str(self.dir / "out.m4a")
+        with mock.patch("torchaudio.save") as save:
+            writer = _CrossfadeWriter(path, 8000, 2, overlap=2)
+            writer.write(torch.ones(2, 6))
+            writer.write(torch.ones(2, 6))
+            writer.close()
+
+        saved_path, audio, sample_rate = save.call_args[0]
+        self.assertEqual(saved_path, path)
+        self.assertEqual(tuple(audio.shape), (2, 10))
+        self.assertEqual(sample_rate, 8000)
+        self.assertEqual(list(self.dir.glob("*.wav")), [])
+
+
+@unittest.skipUnless(HAS_TORCH, "needs torch and soundfile")
+class ReadWindowsTests(unittest.TestCase):
+    def test_windows_overlap_and_cover_the_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = str(Path(temp_dir) / "speech.wav")
+            samples = np.arange(2500, dtype=np.float32)[:, None].repeat(2, axis=1) / 2500
+            sf.write(path, samples, 1000, subtype="FLOAT")
+
+            processor = ResembleProcessor(device="cpu", chunk_seconds=1.0, overlap_seconds=0.25)
+            sr, frames, channels, windows = processor._read_windows(path)
+            windows = list(windows)
+
+        self.assertEqual((sr, frames, channels), (1000, 2500, 2))
+        # Hop of 750 frames: windows start at 0, 750 and 1500, as many as _process_file counts
+        self.assertEqual([tuple(w.shape) for w in windows], [(2, 1000)] * 3)
+        torch.testing.assert_close(windows[1][:, :250], windows[0][:, 750:])
+        self.assertAlmostEqual(float(windows[-1][0, -1]), 2499 / 2500, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Result cache tests: hits and misses, LRU eviction and entries removed from disk
+
+app_gui imports gradio at module level, so these tests are skipped where it is not installed.
+Run from python-backend/: python -m pytest tests
+"""
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# app_gui.py lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+HAS_GRADIO = importlib.util.find_spec("gradio") is not None
+if HAS_GRADIO:
+    from app_gui import ResultCache
+
+
+@unittest.skipUnless(HAS_GRADIO, "app_gui needs gradio")
+class ResultCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def result(self, name: str, size: int = 100) -> Path:
+        path = self.dir / f"{name}.out.wav"
+        path.write_bytes(name[0].encode() * size)
+        return path
+
+    def test_hit_copies_the_result_to_the_output_path(self):
+        cache = ResultCache(self.dir / "cache", 10_000)
+        cache.put("song", self.result("song"))
+
+        output = self.dir / "output.wav"
+        self.assertTrue(cache.get("song", output))
+        self.assertEqual(output.read_bytes(), b"s" * 100)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_miss(self):
+        cache = ResultCache(self.dir / "cache", 10_000)
+        self.assertFalse(cache.get("unknown", self.dir / "output.wav"))
+        self.assertEqual(cache.misses, 1)
+
+    def test_least_recently_used_entry_is_evicted_first(self):
+        cache = ResultCache(self.dir / "cache", 250)
+        cache.put("a", self.result("a"))
+        cache.put("b", self.result("b"))
+        cache.get("a", self.dir / "touch.wav")
+        cache.put("c", self.result("c"))
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertTrue(cache.get("a", self.dir / "a.wav"))
+        self.assertFalse(cache.get("b", self.dir / "b.wav"))
+        self.assertTrue(cache.get("c", self.dir / "c.wav"))
+
+    def test_result_larger_than_the_budget_is_not_stored(self):
+        cache = ResultCache(self.dir / "cache", 50)
+        cache.put("big", self.result("big"))
+        self.assertFalse(cache.get("big", self.dir / "output.wav"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_entry_deleted_from_disk_is_a_miss(self):
+        cache = ResultCache(self.dir / "cache", 10_000)
+        cache.put("song", self.result("song"))
+        (self.dir / "cache" / "song.wav").unlink()
+
+        self.assertFalse(cache.get("song", self.dir / "output.wav"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_key_follows_content_mode_and_parameters(self):
+        cache = ResultCache(self.dir / "cache", 10_000)
+        first, second = self.result("one"), self.dir / "copy.wav"
+        second.write_bytes(first.read_bytes())
+
+        key = cache.make_key(first, "Denoiser Only", {"denoiser": "dns64"})
+        self.assertEqual(key, cache.make_key(second, "Denoiser Only", {"denoiser": "dns64"}))
+        self.assertNotEqual(key, cache.make_key(first, "Denoiser Only", {"denoiser": "master64"}))
+        self.assertNotEqual(key, cache.make_key(first, "Severely Degraded", {"denoiser": "dns64"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Silence padding tests: native WAV/FLAC padding and ZIP names in batch padding
+
+app_gui imports gradio at module level, so these tests are skipped where it is not installed.
+Run from python-backend/: python -m pytest tests
+"""
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+# app_gui.py lives at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+HAS_GRADIO = importlib.util.find_spec("gradio") is not None
+HAS_SOUNDFILE = importlib.util.find_spec("soundfile") is not None
+if HAS_GRADIO:
+    import app_gui
+if HAS_SOUNDFILE:
+    import soundfile as sf
+
+
+@unittest.skipUnless(HAS_GRADIO and HAS_SOUNDFILE, "app_gui needs gradio; native padding needs soundfile")
+class NativePaddingTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def tone(self, name: str, sample_rate: int = 8000, frames: int = 1000, subtype: str = "PCM_16") -> Path:
+        path = self.dir / name
+        samples = np.full((frames, 2), 0.5, dtype=np.float32)
+        samples[:, 1] = -0.25
+        sf.write(str(path), samples, sample_rate, subtype=subtype)
+        return path
+
+    def test_wav_is_padded_without_ffmpeg(self):
+        source = self.tone("speech.wav")
+        output, message = app_gui.add_silence_padding(source, self.dir / "padded.wav", 0.5, 0.25, "WAV")
+
+        self.assertEqual(Path(output).suffix, ".wav")
+        padded, sample_rate = sf.read(str(output), always_2d=True)
+        self.assertEqual(sample_rate, 8000)
+        self.assertEqual(padded.shape, (4000 + 1000 + 2000, 2))
+        self.assertFalse(padded[:4000].any())
+        self.assertFalse(padded[5000:].any())
+        np.testing.assert_allclose(padded[4000:5000, 0], 0.5, atol=1e-4)
+        np.testing.assert_allclose(padded[4000:5000, 1], -0.25, atol=1e-4)
+        self.assertIn("Silence padding added", message)
+
+    def test_flac_keeps_24_bit_sources_at_24_bit(self):
+        source = self.tone("speech.wav", subtype="PCM_24")
+        output, _ = app_gui.add_silence_padding(source, self.dir / "padded.wav", 0.1, 0.0, "FLAC")
+
+        self.assertEqual(Path(output).suffix, ".flac")
+        info = sf.info(str(output))
+        self.assertEqual(info.subtype, "PCM_24")
+        self.assertEqual(info.frames, 800 + 1000)
+
+    def test_padding_spans_several_blocks(self):
+        source = self.tone("long.wav", frames=app_gui.NATIVE_PAD_BLOCK_FRAMES * 2 + 10)
+        output, _ = app_gui.add_silence_padding(source, self.dir / "padded.wav", 20.0, 0.0, "WAV")
+        self.assertEqual(sf.info(str(output)).frames, 160000 + app_gui.NATIVE_PAD_BLOCK_FRAMES * 2 + 10)
+
+    def test_batch_keeps_same_named_inputs_apart(self):
+        first, second = self.dir / "a", self.dir / "b"
+        first.mkdir()
+        second.mkdir()
+        files = [str(self.tone("a/take.wav")), str(self.tone("b/take.wav"))]
+
+        zip_path, _ = app_gui.process_silence_padding_batch(files, 0.1, 0, "WAV", progress=lambda *a, **k: None)
+        with zipfile.ZipFile(zip_path) as zipf:
+            names = zipf.namelist()
+        # Whichever file finishes second gets its input index appended
+        self.assertEqual(len(set(names)), 2)
+        self.assertIn("take_padded.wav", names)
+        self.assertTrue(set(names) & {"take_padded_1.wav", "take_padded_2.wav"})
+
+
+@unittest.skipUnless(HAS_GRADIO, "app_gui needs gradio")
+class UniqueArcnameTests(unittest.TestCase):
+    def test_repeated_names_get_the_input_index(self):
+        used = set()
+        self.assertEqual(app_gui.unique_arcname("take.wav", 0, used), "take.wav")
+        self.assertEqual(app_gui.unique_arcname("take.wav", 3, used), "take_4.wav")
+        self.assertEqual(app_gui.unique_arcname("take_4.wav", 5, used), "take_4_6.wav")
+        self.assertEqual(used, {"take.wav", "take_4.wav", "take_4_6.wav"})
+
+
+if __name__ == "__main__":
+    unittest.main()
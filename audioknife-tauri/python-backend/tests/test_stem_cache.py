@@ -0,0 +1,143 @@
+"""
+Stem cache tests: hits and misses, LRU eviction, entries removed from disk and stem export
+
+Run from python-backend/: python -m pytest tests
+"""
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from processors.cache import StemCache, export_stem, file_digest
+
+
+class StemCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def stems(self, name: str, size: int = 100) -> dict:
+        """A separator's output: vocals and accompaniment of `size` bytes each"""
+        out = self.dir / "separated" / name
+        out.mkdir(parents=True)
+        stems = {}
+        for stem in ("vocals", "accompaniment"):
+            stems[stem] = out / f"{stem}.wav"
+            stems[stem].write_bytes(stem[0].encode() * size)
+        return stems
+
+    def test_hit_links_stems_into_the_callers_directory(self):
+        cache = StemCache(self.dir / "cache", 10_000)
+        self.assertTrue(cache.put("song", self.stems("song")))
+
+        got = cache.get("song", self.dir / "job")
+        self.assertEqual(sorted(got), ["accompaniment", "vocals"])
+        self.assertEqual(got["vocals"].parent, self.dir / "job")
+        self.assertEqual(got["vocals"].read_bytes(), b"v" * 100)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_miss(self):
+        cache = StemCache(self.dir / "cache", 10_000)
+        self.assertEqual(cache.get("unknown", self.dir / "job"), {})
+        self.assertEqual(cache.misses, 1)
+
+    def test_taken_stems_survive_eviction(self):
+        cache = StemCache(self.dir / "cache", 500)
+        cache.put("a", self.stems("a"))
+        got = cache.get("a", self.dir / "job")
+        cache.put("b", self.stems("b"))
+        cache.put("c", self.stems("c"))
+
+        self.assertEqual(cache.get("a", self.dir / "job2"), {})
+        self.assertEqual(got["vocals"].read_bytes(), b"v" * 100)
+
+    def test_least_recently_used_entry_is_evicted_first(self):
+        cache = StemCache(self.dir / "cache", 450)
+        cache.put("a", self.stems("a"))
+        cache.put("b", self.stems("b"))
+        cache.get("a", self.dir / "touch")
+        cache.put("c", self.stems("c"))
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertTrue(cache.get("a", self.dir / "a"))
+        self.assertFalse(cache.get("b", self.dir / "b"))
+        self.assertTrue(cache.get("c", self.dir / "c"))
+
+    def test_new_entry_is_kept_even_over_budget(self):
+        cache = StemCache(self.dir / "cache", 100)
+        cache.put("big", self.stems("big"))
+        self.assertTrue(cache.get("big", self.dir / "job"))
+
+    def test_entry_deleted_from_disk_is_a_miss(self):
+        cache = StemCache(self.dir / "cache", 10_000)
+        cache.put("song", self.stems("song"))
+        for path in (self.dir / "cache" / "song").iterdir():
+            path.unlink()
+
+        self.assertEqual(cache.get("song", self.dir / "job"), {})
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_index_is_rebuilt_from_disk(self):
+        StemCache(self.dir / "cache", 10_000).put("song", self.stems("song"))
+        self.assertTrue(StemCache(self.dir / "cache", 10_000).get("song", self.dir / "job"))
+
+    def test_key_follows_content_model_and_parameters(self):
+        cache = StemCache(self.dir / "cache", 10_000)
+        first, second = self.dir / "one.wav", self.dir / "two.wav"
+        first.write_bytes(b"same audio")
+        second.write_bytes(b"same audio")
+
+        self.assertEqual(file_digest(str(first)), file_digest(str(second)))
+        self.assertEqual(cache.key(str(first), "demucs:htdemucs"), cache.key(str(second), "demucs:htdemucs"))
+        self.assertNotEqual(cache.key(str(first), "demucs:htdemucs"), cache.key(str(first), "spleeter:2stems"))
+        self.assertNotEqual(cache.key(str(first), "demucs:htdemucs", shifts=2),
+                            cache.key(str(first), "demucs:htdemucs"))
+
+
+class ExportStemTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_copies_a_separated_stem(self):
+        vocals = self.dir / "vocals.wav"
+        vocals.write_bytes(b"vocals")
+        output = str(self.dir / "out.wav")
+        self.assertEqual(export_stem({"vocals": vocals}, "vocals", output), output)
+        self.assertEqual(Path(output).read_bytes(), b"vocals")
+
+    def test_unknown_stem_raises(self):
+        with self.assertRaises(ValueError):
+            export_stem({"vocals": self.dir / "vocals.wav"}, "piano", str(self.dir / "out.wav"))
+
+    @unittest.skipUnless(importlib.util.find_spec("soundfile") and importlib.util.find_spec("numpy"),
+                         "soundfile and numpy are needed to mix stems")
+    def test_no_stem_mixes_the_others(self):
+        import numpy as np
+        import soundfile as sf
+
+        stems = {}
+        for name, value in (("vocals", 0.5), ("drums", 0.25), ("bass", 0.125)):
+            stems[name] = self.dir / f"{name}.wav"
+            sf.write(str(stems[name]), np.full((100, 2), value, dtype="float32"), 44100, subtype="FLOAT")
+
+        output = str(self.dir / "no_vocals.wav")
+        export_stem(stems, "no_vocals", output)
+        mix, sample_rate = sf.read(output, always_2d=True)
+        self.assertEqual(sample_rate, 44100)
+        self.assertEqual(mix.shape, (100, 2))
+        self.assertAlmostEqual(float(mix[0, 0]), 0.375, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Audio Handoff - Memory-mapped float32 intermediates between pipeline stages
+パイプラインの段間で音声を受け渡すための中間フォーマット
+
+WAVのエンコード/デコードを挟まず、float32のサンプルをそのままファイルに置き、
+次の段はnp.memmapでゼロコピーに読み込みます。
+
+ファイル構成:
+  ヘッダ (64バイト): magic, version, sample_rate, channels, frames
+  データ: float32 little-endian, フレーム順にインターリーブ (frames, channels)
+
+numpyと標準ライブラリのみに依存するため、どのvenvからでも利用できます。
+"""
+
+import struct
+import wave
+from pathlib import Path
+
+import numpy as np
+
+HANDOFF_SUFFIX = ".f32"
+HANDOFF_MAGIC = b"AKPCMF32"
+HANDOFF_VERSION = 1
+HEADER_FORMAT = "<8sIIIQ"
+HEADER_SIZE = 64
+
+
+def is_handoff(path):
+    """パスがハンドオフ形式かどうか"""
+    return Path(path).suffix == HANDOFF_SUFFIX
+
+
+def create_handoff(path, sample_rate, channels, frames):
+    """
+    ハンドオフファイルを作成し、書き込み用のmemmapを返す
+
+    Args:
+        path: 出力ファイルパス
+        sample_rate: サンプリングレート
+        channels: チャンネル数
+        frames: フレーム数
+
+    Returns:
+        np.memmap: shape (frames, channels) のfloat32配列
+    """
+    header = struct.pack(HEADER_FORMAT, HANDOFF_MAGIC, HANDOFF_VERSION, int(sample_rate), int(channels), int(frames))
+    with open(path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        f.truncate(HEADER_SIZE + int(frames) * int(channels) * 4)
+
+    return np.memmap(path, dtype="<f4", mode="r+", offset=HEADER_SIZE, shape=(int(frames), int(channels)))
+
+
+def write_handoff(path, audio, sample_rate):
+    """
+    波形をハンドオフファイルに書き込み
+
+    Args:
+        path: 出力ファイルパス
+        audio: shape (channels, frames) の配列
+        sample_rate: サンプリングレート
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim == 1:
+        audio = audio[np.newaxis, :]
+
+    channels, frames = audio.shape
+    data = create_handoff(path, sample_rate, channels, frames)
+    data[:] = audio.T
+    data.flush()
+    del data
+
+
+def read_header(path):
+    """ヘッダを読み込み (sample_rate, channels, frames) を返す"""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+
+    magic, version, sample_rate, channels, frames = struct.unpack_from(HEADER_FORMAT, header)
+    if magic != HANDOFF_MAGIC:
+        raise ValueError(f"Not an audio handoff file: {path}")
+    if version != HANDOFF_VERSION:
+        raise ValueError(f"Unsupported audio handoff version {version}: {path}")
+    return sample_rate, channels, frames
+
+
+def read_handoff(path):
+    """
+    ハンドオフファイルを読み込み（ゼロコピー）
+
+    Returns:
+        tuple: (shape (frames, channels) の読み取り専用memmap, sample_rate)
+    """
+    sample_rate, channels, frames = read_header(path)
+    data = np.memmap(path, dtype="<f4", mode="r", offset=HEADER_SIZE, shape=(frames, channels))
+    return data, sample_rate
+
+
+def handoff_to_wav(path, wav_path, block_frames=65536):
+    """ハンドオフファイルを16bit WAVに変換（ブロック単位で書き込み）"""
+    data, sample_rate = read_handoff(path)
+    frames, channels = data.shape
+
+    with wave.open(str(wav_path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        for start in range(0, frames, block_frames):
+            block = np.clip(data[start:start + block_frames], -1.0, 1.0)
+            w.writeframes((block * 32767.0).astype("<i2").tobytes())
+
+    return wav_path
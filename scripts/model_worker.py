@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Model Worker - Persistent inference worker for AudioKnife backends
+モデルを常駐させ、標準入出力経由でジョブを順番に処理するワーカー
+
+app_gui.py から各バックエンドのvenv Pythonで起動されます。
+モデルの読み込み（torchのimport、重みのロード）は起動時の1回だけで、
+以降のジョブはウォーム状態で処理されます。
+
+プロトコル（1行 = 1メッセージ、JSON）:
+  起動完了   -> {"ready": true, "backend": "...", "load_time": 秒}
+  起動失敗   -> {"ready": false, "backend": "...", "error": "..."}
+  ジョブ     <- {"id": "...", "input": "...", "output": "...", "options": {...}}
+  進捗       -> {"id": "...", "progress": {"stage", "processed_seconds", "total_seconds", "rtf", "eta"}}
+  結果       -> {"id": "...", "ok": true/false, "error": "...", "elapsed": 秒}
+  バッチ     <- {"id": "...", "jobs": [{"input": ..., "output": ..., "options": {...}}, ...]}
+  バッチ結果 -> {"id": "...", "ok": 全件成功か, "results": [{"ok": ..., "error": ...}, ...], "elapsed": 秒}
+  終了       <- {"command": "shutdown"}
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from pathlib import Path
+import warnings
+warnings.filterwarnings('ignore')
+
+from audio_handoff import is_handoff, read_handoff, write_handoff
+
+
+def import_script(script_path):
+    """run_*.py スクリプトをモジュールとして読み込み"""
+    script_path = Path(script_path)
+    sys.path.insert(0, str(script_path.parent))
+
+    spec = importlib.util.spec_from_file_location(script_path.stem, str(script_path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Denoiserは DENOISER_WHOLE_FILE_SECONDS 以下の入力を run_clearSound.py と同じく一括で処理する
+# それより長い入力はメモリを抑えるためこの長さのチャンク単位で処理し、チャンクごとに進捗を送る
+# （チャンク境界のクロスフェードで出力は一括処理とわずかに変わる）
+DENOISER_WHOLE_FILE_SECONDS = float(os.environ.get("AUDIOKNIFE_DENOISER_WHOLE_FILE_SECONDS", "600"))
+DENOISER_CHUNK_SECONDS = 30.0
+DENOISER_OVERLAP_SECONDS = 0.5
+
+# 進捗メッセージの最小送信間隔（秒）
+PROGRESS_INTERVAL = 0.5
+
+
+class JobProgress:
+    """ジョブの進捗（処理済み音声秒数、実時間比RTF、ETA）を親プロセスへ送る"""
+
+    def __init__(self, send, job_id, stage):
+        self.send = send
+        self.job_id = job_id
+        self.stage = stage
+        self.total_seconds = 0.0
+        self.start = time.time()
+        self._last_sent = 0.0
+
+    def update(self, fraction, force=False):
+        """全体に対する進捗率 (0.0-1.0) を報告"""
+        now = time.time()
+        if not force and now - self._last_sent < PROGRESS_INTERVAL:
+            return
+        self._last_sent = now
+
+        fraction = min(max(fraction, 0.0), 1.0)
+        processed = fraction * self.total_seconds
+        elapsed = now - self.start
+        rtf = elapsed / processed if processed > 0 else None
+        eta = elapsed * (1.0 - fraction) / fraction if fraction > 0 else None
+        self.send({
+            "id": self.job_id,
+            "progress": {
+                "stage": self.stage,
+                "processed_seconds": round(processed, 2),
+                "total_seconds": round(self.total_seconds, 2),
+                "rtf": round(rtf, 3) if rtf is not None else None,
+                "eta": round(eta, 1) if eta is not None else None,
+            }
+        })
+
+
+def audio_duration(input_path):
+    """入力の長さ（秒）。ハンドオフ形式はヘッダから、それ以外はtorchaudio.infoで取得"""
+    if is_handoff(input_path):
+        from audio_handoff import read_header
+        sample_rate, channels, frames = read_header(input_path)
+        return frames / sample_rate
+    try:
+        import torchaudio
+        info = torchaudio.info(str(input_path))
+        return info.num_frames / info.sample_rate
+    except Exception:
+        return 0.0
+
+
+def process_chunked(fn, signal, chunk, overlap, on_chunk=None):
+    """
+    1次元信号をチャンクに分けて処理し、重なり部分をクロスフェードで結合
+
+    Args:
+        fn: チャンク (1次元テンソル) を同じ長さのテンソルに変換する関数
+        signal: 1次元テンソル
+        chunk: チャンク長（サンプル数）
+        overlap: 重なり長（サンプル数）
+        on_chunk: 処理済みサンプル数を受け取るコールバック
+    """
+    import torch
+
+    length = signal.shape[-1]
+    if length <= chunk:
+        out = fn(signal)
+        if on_chunk:
+            on_chunk(length)
+        return out
+
+    out = torch.zeros(length)
+    fade = torch.linspace(0.0, 1.0, overlap)
+    start = 0
+    while True:
+        end = min(start + chunk, length)
+        piece = fn(signal[start:end])[:end - start]
+        if start > 0:
+            n = min(overlap, end - start)
+            piece[:n] = out[start:start + n] * (1.0 - fade[:n]) + piece[:n] * fade[:n]
+        out[start:end] = piece
+        if on_chunk:
+            on_chunk(end)
+        if end == length:
+            return out
+        start += chunk - overlap
+
+
+# ===== Backend Setup =====
+# 各setup関数はモデルを読み込み、ジョブ処理関数 run(input, output, options, progress) を返す
+# 処理関数は失敗時に例外を送出する
+# run.batch(jobs) があるバックエンドは、バッチを1件ずつではなくまとめて処理する
+
+def setup_denoiser(script_dir):
+    """Facebook Denoiser (clearSound) のセットアップ"""
+    module = import_script(Path(script_dir) / "run_clearSound.py")
+    model, device = module.setup_model()
+
+    def run(input_path, output_path, options, progress):
+        high_quality = options.get("quality", "high") == "high"
+        enhanced, sr = denoise_waveform(module, model, device, input_path, high_quality, progress)
+        if is_handoff(output_path):
+            # 次の段へはWAVを経由せずfloat32のまま渡す
+            write_handoff(output_path, enhanced.numpy(), sr)
+        else:
+            module.torchaudio.save(str(output_path), enhanced, sr)
+
+    return run
+
+
+def denoise_waveform(module, model, device, input_path, high_quality=True, progress=None):
+    """
+    run_clearSound.process_audio と同じ処理をメモリ上で行い、波形を返す
+    DENOISER_WHOLE_FILE_SECONDS を超える入力のみチャンク単位で処理する
+
+    Returns:
+        tuple: (shape (channels, frames) のCPUテンソル, サンプリングレート)
+    """
+    import torch
+    torchaudio = module.torchaudio
+
+    wav, sr = torchaudio.load(input_path)
+    if progress:
+        progress.total_seconds = wav.shape[-1] / sr
+    if sr != model.sample_rate:
+        wav = torchaudio.transforms.Resample(sr, model.sample_rate)(wav)
+
+    def forward(chunk):
+        with torch.no_grad():
+            return model(chunk.view(1, 1, -1).to(device)).reshape(-1).cpu()
+
+    n_channels = min(wav.shape[0], 2)
+    frames = wav.shape[-1]
+    if frames <= DENOISER_WHOLE_FILE_SECONDS * model.sample_rate:
+        chunk = frames
+    else:
+        chunk = int(DENOISER_CHUNK_SECONDS * model.sample_rate)
+    overlap = int(DENOISER_OVERLAP_SECONDS * model.sample_rate)
+
+    channels = []
+    for ch in range(n_channels):
+        def on_chunk(done, ch=ch):
+            if progress:
+                progress.update((ch * frames + done) / (n_channels * frames))
+        channels.append(process_chunked(forward, wav[ch], chunk, overlap, on_chunk).unsqueeze(0))
+    enhanced = torch.cat(channels, dim=0)
+
+    # 標準品質でもモデルのレートが16kHzでなければ変換し、出力のレートと実データを一致させる
+    target_sr = 48000 if high_quality else 16000
+    if model.sample_rate != target_sr:
+        enhanced = torchaudio.transforms.Resample(model.sample_rate, target_sr)(enhanced)
+    return enhanced, target_sr
+
+
+def setup_voicefixer(script_dir):
+    """VoiceFixer のセットアップ（script_dirはVoiceFixerのインストール先）"""
+    import run_voicefixer
+    vf = run_voicefixer.setup_voicefixer(script_dir)
+
+    def run(input_path, output_path, options, progress):
+        mode = int(options.get("mode", 0))
+        if is_handoff(input_path):
+            audio, sr = read_handoff(input_path)
+            run_voicefixer.restore_waveform(vf, audio, sr, output_path, mode=mode)
+        else:
+            vf.restore(input_path, output_path, cuda=False, mode=mode)
+
+    return run
+
+
+def setup_resemble_enhance(script_dir):
+    """Resemble Enhance のセットアップ"""
+    module = import_script(Path(script_dir) / "run_resemble_enhance.py")
+    device = module.setup_device()
+
+    # Denoiser/Enhancerの重みはresemble_enhance内部でキャッシュされるため、先に読み込んでおく
+    from resemble_enhance.enhancer import inference
+    inference.load_enhancer(None, device)
+
+    # 推論ループ (resemble_enhance.inference の trange) をチャンク単位の進捗報告に差し替え
+    # NFEソルバー内部にはフックがないため、進捗の粒度は推論チャンク単位
+    state = {"progress": None, "pass": 0, "passes": 1}
+    import resemble_enhance.inference as re_inference
+    if hasattr(re_inference, "trange"):
+        def reporting_trange(*args, **kwargs):
+            starts = range(*args)
+            for i, start in enumerate(starts):
+                yield start
+                if state["progress"]:
+                    state["progress"].update((state["pass"] + (i + 1) / len(starts)) / state["passes"])
+            state["pass"] += 1
+        re_inference.trange = reporting_trange
+
+    def run(input_path, output_path, options, progress):
+        mode = options.get("mode", "denoise")
+        waveform, sr = module.load_audio(input_path)
+        progress.total_seconds = waveform.shape[-1] / sr
+        state.update({"progress": progress, "pass": 0, "passes": 1})
+
+        # バッチ処理からチャンネルごとの処理に切り替わった場合は、進捗を数え直す
+        def on_passes(passes):
+            state.update({"pass": 0, "passes": passes})
+
+        output_wav, output_sr = module.process_with_resemble_enhance(
+            waveform, sr, device,
+            mode=mode,
+            nfe=int(options.get("nfe", 32)),
+            solver=options.get("solver", "midpoint"),
+            lambd=float(options.get("lambd", 0.5)),
+            tau=float(options.get("tau", 0.5)),
+            on_passes=on_passes
+        )
+        module.save_audio(output_wav, output_sr, output_path)
+
+    return run
+
+
+def setup_mp_senet(script_dir):
+    """MP-SENet のセットアップ"""
+    module = import_script(Path(script_dir) / "run_mp_senet.py")
+    device = module.setup_device()
+    model = module.setup_mp_senet(device)
+
+    def run(input_path, output_path, options, progress):
+        waveform, sr = module.load_audio(input_path)
+        output_wav, output_sr = module.process_with_mp_senet(waveform, sr, model, device)
+        module.save_audio(output_wav, output_sr, output_path)
+
+    return run
+
+
+def setup_mossformer2(script_dir):
+    """MossFormer2 のセットアップ"""
+    module = import_script(Path(script_dir) / "run_mossformer2.py")
+    pipeline = module.setup_mossformer2()
+
+    def run(input_path, output_path, options, progress):
+        speaker_index = int(options.get("speaker_index", 0))
+        if not module.process_with_mossformer2(input_path, output_path, pipeline, speaker_index):
+            raise RuntimeError("MossFormer2 separation failed")
+
+    return run
+
+
+def setup_spleeter(script_dir):
+    """Spleeter のセットアップ（モデルごとにセパレーターを1つ常駐させる）"""
+    module = import_script(Path(script_dir) / "run_spleeter.py")
+    separators = {}
+
+    def get_separator(model):
+        if model not in separators:
+            separators[model] = module.setup_separator(model)
+        return separators[model]
+
+    get_separator("2stems")
+
+    # 出力パスはステムを書き出すフォルダ
+    def run(input_path, output_path, options, progress):
+        ok, error = module.separate_batch(get_separator(options.get("model", "2stems")), [(input_path, output_path)])[0]
+        if not ok:
+            raise RuntimeError(error)
+
+    def run_batch(jobs):
+        # 同じモデルのジョブをまとめ、デコード/エンコードを推論と並行して処理
+        results = [None] * len(jobs)
+        by_model = {}
+        for i, job in enumerate(jobs):
+            by_model.setdefault((job.get("options") or {}).get("model", "2stems"), []).append(i)
+        for model, indices in by_model.items():
+            outcomes = module.separate_batch(get_separator(model), [(jobs[i]["input"], jobs[i]["output"]) for i in indices])
+            for i, (ok, error) in zip(indices, outcomes):
+                results[i] = {"ok": ok, "error": error or None}
+        return results
+
+    run.batch = run_batch
+    return run
+
+
+def setup_demucs(script_dir):
+    """Demucs のセットアップ（script_dirはバックエンドの demucs_engine.py があるフォルダ、モデルごとに1つ常駐）"""
+    module = import_script(Path(script_dir) / "demucs_engine.py")
+    engines = {}
+
+    def get_engine(model):
+        if model not in engines:
+            engines[model] = module.DemucsEngine(model, "cpu")
+            engines[model].load()
+        return engines[model]
+
+    get_engine("htdemucs")
+
+    # 出力パスは全ステムを <ステム名>.wav で書き出すフォルダ
+    def run(input_path, output_path, options, progress):
+        options = dict(options)
+        engine = get_engine(options.pop("model", "htdemucs"))
+        Path(output_path).mkdir(parents=True, exist_ok=True)
+        engine.separate_file(input_path, str(output_path), progress.update, **options)
+
+    return run
+
+
+BACKENDS = {
+    "denoiser": setup_denoiser,
+    "voicefixer": setup_voicefixer,
+    "resemble_enhance": setup_resemble_enhance,
+    "mp_senet": setup_mp_senet,
+    "mossformer2": setup_mossformer2,
+    "spleeter": setup_spleeter,
+    "demucs": setup_demucs,
+}
+
+
+# ===== Job Loop =====
+
+def run_job(run, job, progress):
+    """1ジョブを実行し、(成功フラグ, エラーメッセージ) を返す"""
+    try:
+        if not progress.total_seconds:
+            progress.total_seconds = audio_duration(job["input"])
+        run(job["input"], job["output"], job.get("options") or {}, progress)
+        progress.update(1.0, force=True)
+        return True, None
+    except (Exception, SystemExit) as e:
+        # 既存スクリプトはエラー時にsys.exitするため、ワーカーごと落ちないようにする
+        return False, "" if isinstance(e, SystemExit) else f"{type(e).__name__}: {e}"
+
+
+def serve(backend, script_dir, channel):
+    """モデルを読み込み、stdinのジョブを処理し続ける"""
+
+    def send(message):
+        channel.write(json.dumps(message, ensure_ascii=False) + "\n")
+        channel.flush()
+
+    start = time.time()
+    try:
+        run = BACKENDS[backend](script_dir)
+    except BaseException as e:
+        # setup関数はsys.exitで終了することがあるため、BaseExceptionで受ける
+        send({"ready": False, "backend": backend, "error": f"{type(e).__name__}: {e}"})
+        return 1
+
+    send({"ready": True, "backend": backend, "load_time": round(time.time() - start, 3)})
+    print(f"[情報] {backend} ワーカー準備完了 ({time.time() - start:.1f}秒)")
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except ValueError:
+            send({"id": None, "ok": False, "error": "Invalid JSON request"})
+            continue
+
+        if request.get("command") == "shutdown":
+            break
+
+        job_start = time.time()
+        if "jobs" in request and hasattr(run, "batch"):
+            try:
+                results = run.batch(request["jobs"])
+            except (Exception, SystemExit) as e:
+                error = "" if isinstance(e, SystemExit) else f"{type(e).__name__}: {e}"
+                results = [{"ok": False, "error": error}] * len(request["jobs"])
+            send({
+                "id": request.get("id"),
+                "ok": all(r["ok"] for r in results),
+                "results": results,
+                "elapsed": round(time.time() - job_start, 3)
+            })
+        elif "jobs" in request:
+            # 同じモデルで複数ファイルを連続処理
+            results = []
+            for job in request["jobs"]:
+                ok, error = run_job(run, job, JobProgress(send, request.get("id"), backend))
+                results.append({"ok": ok, "error": error})
+            send({
+                "id": request.get("id"),
+                "ok": all(r["ok"] for r in results),
+                "results": results,
+                "elapsed": round(time.time() - job_start, 3)
+            })
+        else:
+            ok, error = run_job(run, request, JobProgress(send, request.get("id"), backend))
+            send({"id": request.get("id"), "ok": ok, "error": error, "elapsed": round(time.time() - job_start, 3)})
+
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AudioKnife persistent model worker")
+    parser.add_argument("backend", choices=sorted(BACKENDS), help="Backend model to keep resident")
+    parser.add_argument("--script-dir", default=str(Path(__file__).parent.resolve()),
+                        help="Directory containing the backend's run_*.py script")
+    args = parser.parse_args()
+
+    # stdoutはプロトコル専用にし、スクリプトのログ（print）はstderrへ流す
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1, encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    sys.exit(serve(args.backend, args.script_dir, channel))
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -15,6 +15,10 @@ from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
+# マルチチャンネル音声の全チャンネルを1つのバッチとしてモデルに通す
+# （バッチ処理に失敗した場合はチャンネルごとの処理に切り替え）
+BATCH_CHANNELS = os.environ.get("AUDIOKNIFE_RESEMBLE_BATCH_CHANNELS", "1") != "0"
+
 
 def setup_device():
     """デバイスのセットアップ"""
@@ -58,7 +62,73 @@ def resample_audio(waveform, sr, target_sr=44100):
     return waveform, target_sr
 
 
-def process_with_resemble_enhance(waveform, sr, device, mode="denoise", nfe=32, solver="midpoint", lambd=0.5, tau=0.5):
+def inference_channels(model, waveform, sr, device, chunk_seconds=30.0, overlap_seconds=1.0):
+    """
+    resemble_enhance.inference.inference の複数チャンネル版
+    推論チャンクごとに全チャンネルをまとめて1回のforwardで処理する
+    （バックエンドの ResembleProcessor もこの関数を使用）
+
+    Args:
+        model: Enhancer または Denoiser
+        waveform: shape (channels, frames) のテンソル
+
+    Returns:
+        (shape (channels, frames) のCPUテンソル, サンプリングレート)
+    """
+    import torch
+    import torch.nn.functional as F
+    import resemble_enhance.inference as re_inference
+
+    re_inference.remove_weight_norm_recursively(model)
+    # 上流の inference() と同じ帯域制限付きカイザー窓リサンプリング
+    waveform = re_inference.resample(
+        waveform,
+        orig_freq=sr,
+        new_freq=model.hp.wav_rate,
+        lowpass_filter_width=64,
+        rolloff=0.9475937167399596,
+        resampling_method="sinc_interp_kaiser",
+        beta=14.769656459379492,
+    )
+    sr = model.hp.wav_rate
+
+    chunk_length = int(sr * chunk_seconds)
+    hop_length = chunk_length - int(sr * overlap_seconds)
+    chunks = []
+    # 進捗フックが差し替えたtrangeを使うため、呼び出し時にモジュールから参照する
+    for start in re_inference.trange(0, waveform.shape[-1], hop_length):
+        chunk = waveform[:, start:start + chunk_length].to(device)
+        length = chunk.shape[-1]
+        # inference_chunk と同じく、チャンネルごとにピークで正規化
+        abs_max = chunk.abs().max(dim=-1, keepdim=True).values.clamp(min=1e-7)
+        chunk = F.pad(chunk / abs_max, (0, 441))
+        chunks.append((model(chunk)[:, :length] * abs_max).cpu())
+
+    merged = [
+        re_inference.merge_chunks([chunk[ch] for chunk in chunks], chunk_length, hop_length, sr=sr, length=waveform.shape[-1])
+        for ch in range(waveform.shape[0])
+    ]
+    return torch.stack(merged), sr
+
+
+def process_channels_batched(waveform, sr, device, mode, nfe, solver, lambd, tau):
+    """全チャンネルをバッチで denoise (+ enhance)。denoise()/enhance() と同じモデル設定を使う"""
+    import torch
+    from resemble_enhance.enhancer.inference import load_enhancer
+
+    enhancer = load_enhancer(None, device)
+    with torch.inference_mode():
+        print("[処理中] ノイズ除去中 (全チャンネル一括)...")
+        output_wav, new_sr = inference_channels(enhancer.denoiser, waveform, sr, device)
+        if mode == "enhance":
+            print(f"[処理中] 音質向上中 (nfe={nfe}, solver={solver}, 全チャンネル一括)...")
+            enhancer.configurate_(nfe=nfe, solver=solver, lambd=lambd, tau=tau)
+            output_wav, new_sr = inference_channels(enhancer, output_wav, new_sr, device)
+    return output_wav, new_sr
+
+
+def process_with_resemble_enhance(waveform, sr, device, mode="denoise", nfe=32, solver="midpoint", lambd=0.5, tau=0.5,
+                                  on_passes=None):
     """
     Resemble Enhanceで音声を処理
     
@@ -71,6 +141,7 @@ def process_with_resemble_enhance(waveform, sr, device, mode="denoise", nfe=32,
         solver: ソルバー ("midpoint", "rk4", "euler")
         lambd: Enhancer強度パラメータ (0.0-1.0)
         tau: Enhancer時間パラメータ (0.0-1.0)
+        on_passes: 推論パス数（trangeの呼び出し回数）が決まるたびに呼ばれる（進捗表示用）
     
     Returns:
         処理後の波形とサンプリングレート
@@ -85,6 +156,20 @@ def process_with_resemble_enhance(waveform, sr, device, mode="denoise", nfe=32,
     # モノラルに変換（ステレオの場合は各チャンネルを処理）
     is_stereo = waveform.shape[0] > 1
     processed_channels = []
+    stage_passes = 2 if mode == "enhance" else 1
+    
+    if is_stereo and BATCH_CHANNELS:
+        print("[情報] ステレオ音声を検出、全チャンネルをバッチ処理...")
+        if on_passes:
+            on_passes(stage_passes)
+        try:
+            return process_channels_batched(waveform, sr, device, mode, nfe, solver, lambd, tau)
+        except (AttributeError, RuntimeError) as e:
+            print(f"[警告] バッチ処理に失敗、各チャンネル個別処理に切り替え: {e}")
+    
+    # チャンネルごとに denoise (+ enhance) の推論パスが走る
+    if on_passes:
+        on_passes(waveform.shape[0] * stage_passes)
     
     if is_stereo:
         print("[情報] ステレオ音声を検出、各チャンネル個別処理...")
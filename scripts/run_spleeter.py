@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Spleeter - Batch Source Separation Script
+Spleeterのセパレーターを1回だけ構築し、複数ファイルをまとめて分離
+
+`spleeter separate` をファイルごとに実行すると、毎回TensorFlowのグラフ構築と
+チェックポイントの読み込みが発生します。このスクリプトでは1つのセパレーターで
+全ファイルを処理し、入力のデコードと各ステムのエンコードは別スレッドで並行して行います。
+
+Spleeter venvのPythonで実行してください（app_gui.pyのモデルワーカーからも使用）。
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import warnings
+warnings.filterwarnings('ignore')
+
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3", ".m4a", ".ogg", ".aiff", ".aif"}
+
+# 並列にデコードする入力数 / 並列にステムを書き出すファイル数
+DECODE_THREADS = int(os.environ.get("AUDIOKNIFE_SPLEETER_DECODE_THREADS", "2"))
+ENCODE_THREADS = int(os.environ.get("AUDIOKNIFE_SPLEETER_ENCODE_THREADS", "2"))
+
+
+def setup_separator(model="2stems"):
+    """Spleeterセパレーターのセットアップ (2stems / 4stems / 5stems)"""
+    try:
+        from spleeter.separator import Separator
+    except ImportError as e:
+        print(f"[エラー] Spleeterが見つかりません: {e}")
+        print("インストール方法:")
+        print("  pip install spleeter")
+        sys.exit(1)
+
+    # エンコードは自前のスレッドプールで行うため、Spleeterのプロセスプールは使わない
+    return Separator(f"spleeter:{model}", multiprocess=False)
+
+
+def separate_batch(separator, jobs, decode_threads=DECODE_THREADS, encode_threads=ENCODE_THREADS, on_result=None):
+    """
+    構築済みのセパレーターで複数ファイルを分離し、<出力フォルダ>/<ステム名>.wav に保存
+
+    次の入力のデコードと、分離済みステムのエンコードはモデル推論と並行して行う。
+    先読みはdecode_threads件までなので、大量のファイルでもメモリ使用量は一定。
+
+    Args:
+        separator: Separatorインスタンス
+        jobs: (input_path, output_dir) のリスト
+        decode_threads: 並列デコード数
+        encode_threads: 並列エンコード数
+        on_result: 各ジョブの完了時に (index, 成功フラグ, エラーメッセージ) で呼ばれる（任意のスレッドから）
+
+    Returns:
+        (成功フラグ, エラーメッセージ) のリスト（jobsと同じ順番）
+    """
+    from spleeter.audio.adapter import AudioAdapter
+
+    adapter = AudioAdapter.default()
+    sample_rate = separator._params["sample_rate"]
+    results = [None] * len(jobs)
+
+    def finish(index, ok, error):
+        results[index] = (ok, error)
+        if on_result is not None:
+            on_result(index, ok, error)
+
+    def decode(input_path):
+        waveform, _ = adapter.load(str(input_path), sample_rate=sample_rate)
+        return waveform
+
+    def encode(index, output_dir, prediction):
+        try:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+            for stem, data in prediction.items():
+                adapter.save(str(Path(output_dir) / f"{stem}.wav"), data, sample_rate, "wav", "128k")
+            finish(index, True, "")
+        except Exception as e:
+            print(f"[エラー] {Path(jobs[index][0]).name}: {e}")
+            finish(index, False, f"{type(e).__name__}: {e}")
+
+    decode_threads = max(decode_threads, 1)
+    with ThreadPoolExecutor(decode_threads) as decoders, ThreadPoolExecutor(max(encode_threads, 1)) as encoders:
+        decoding = {}
+        for i, (input_path, output_dir) in enumerate(jobs):
+            # このファイルの分離中に、後続decode_threads件のデコードを進めておく
+            for ahead in range(i, min(i + decode_threads + 1, len(jobs))):
+                if ahead not in decoding:
+                    decoding[ahead] = decoders.submit(decode, jobs[ahead][0])
+
+            print(f"[処理中] ({i + 1}/{len(jobs)}) {Path(input_path).name}")
+            try:
+                prediction = separator.separate(decoding.pop(i).result(), str(input_path))
+            except Exception as e:
+                print(f"[エラー] {Path(input_path).name}: {e}")
+                finish(i, False, f"{type(e).__name__}: {e}")
+                continue
+            encoders.submit(encode, i, output_dir, prediction)
+    return results
+
+
+def collect_jobs(input_path, output_dir):
+    """入力ファイルまたはフォルダからジョブリストを作成（出力は <出力フォルダ>/<ファイル名>/）"""
+    input_path = Path(input_path)
+
+    if input_path.is_dir():
+        files = sorted(p for p in input_path.iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS)
+        output_dir = Path(output_dir) if output_dir else input_path / "separated"
+    else:
+        files = [input_path]
+        output_dir = Path(output_dir) if output_dir else input_path.parent / "separated"
+
+    return [(f, output_dir / f.stem) for f in files]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Spleeter - バッチ音源分離ツール",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  単一ファイル:
+    python run_spleeter.py song.mp3
+
+  フォルダ内の全ファイル（モデル読み込みは1回）:
+    python run_spleeter.py songs/ -o separated/ -p 4stems --decode-threads 4
+"""
+    )
+    parser.add_argument("input", help="入力音声ファイルまたはフォルダ")
+    parser.add_argument("-o", "--output-dir", help="出力フォルダ (デフォルト: 入力と同じ場所の separated/)")
+    parser.add_argument("-p", "--model", choices=["2stems", "4stems", "5stems"], default="2stems",
+                       help="分離モデル (デフォルト: 2stems)")
+    parser.add_argument("--decode-threads", type=int, default=DECODE_THREADS,
+                       help=f"並列デコード数 (デフォルト: {DECODE_THREADS})")
+    parser.add_argument("--encode-threads", type=int, default=ENCODE_THREADS,
+                       help=f"並列エンコード数 (デフォルト: {ENCODE_THREADS})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"[エラー] ファイルが見つかりません: {args.input}")
+        sys.exit(1)
+
+    jobs = collect_jobs(args.input, args.output_dir)
+    if not jobs:
+        print("[エラー] 音声ファイルが見つかりません")
+        sys.exit(1)
+
+    print(f"入力: {args.input} ({len(jobs)}ファイル)")
+    print(f"モデル: {args.model}")
+    print(f"スレッド: デコード {args.decode_threads} / エンコード {args.encode_threads}")
+    print("")
+
+    separator = setup_separator(args.model)
+    results = separate_batch(separator, jobs, args.decode_threads, args.encode_threads)
+
+    failed = sum(1 for ok, _ in results if not ok)
+    print(f"\n成功: {len(results) - failed} / {len(results)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n[中断] Ctrl+Cで中断されました")
+        sys.exit(0)
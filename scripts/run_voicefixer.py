@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+VoiceFixer - Batch Audio Restoration Script
+VoiceFixerモデルを1回だけ読み込み、複数ファイルをまとめて復元
+
+VoiceFixer()の構築とチェックポイントの読み込みは重いため、
+フォルダ単位の処理でもモデル構築は1回だけにします。
+
+モード:
+  0: Standard (標準)
+  1: High Noise (強力なノイズ除去)
+  2: Severely Degraded (最大復元)
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+import warnings
+warnings.filterwarnings('ignore')
+
+VOICEFIXER_DIR = Path.home() / "voicefixer_app"
+
+AUDIO_EXTENSIONS = {".wav", ".flac", ".mp3", ".m4a", ".ogg", ".aiff", ".aif"}
+
+
+def setup_voicefixer(voicefixer_dir=VOICEFIXER_DIR):
+    """VoiceFixerモデルのセットアップ"""
+    voicefixer_dir = Path(voicefixer_dir)
+    sys.path.insert(0, str(voicefixer_dir))
+    sys.path.insert(0, str(voicefixer_dir / "voicefixer"))
+
+    try:
+        from voicefixer import VoiceFixer
+    except ImportError as e:
+        print(f"[エラー] VoiceFixerが見つかりません: {e}")
+        print("インストール方法:")
+        print("  pip install voicefixer")
+        sys.exit(1)
+
+    print("[情報] VoiceFixerモデル読み込み中...")
+    vf = VoiceFixer()
+    print("[情報] モデル読み込み完了")
+    return vf
+
+
+def restore_batch(vf, jobs, cuda=False):
+    """
+    読み込み済みのVoiceFixerで複数ファイルを復元
+
+    Args:
+        vf: VoiceFixerインスタンス
+        jobs: (input_path, output_path, mode) のリスト
+        cuda: CUDAを使用する場合True
+
+    Returns:
+        (成功フラグ, エラーメッセージ) のリスト（jobsと同じ順番）
+    """
+    results = []
+    for i, (input_path, output_path, mode) in enumerate(jobs):
+        print(f"[処理中] ({i + 1}/{len(jobs)}) {Path(input_path).name} (mode {mode})")
+        try:
+            vf.restore(str(input_path), str(output_path), cuda=cuda, mode=int(mode))
+            results.append((True, ""))
+        except Exception as e:
+            print(f"[エラー] {Path(input_path).name}: {e}")
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def restore_waveform(vf, audio, sr, output_path, mode=0, cuda=False):
+    """
+    メモリ上の波形を復元してファイルに保存（入力ファイルのデコードを省略）
+
+    Args:
+        vf: VoiceFixerインスタンス
+        audio: shape (frames,) または (frames, channels) の配列
+        sr: サンプリングレート
+        output_path: 出力ファイルパス
+        mode: 復元モード
+        cuda: CUDAを使用する場合True
+    """
+    import numpy as np
+    import soundfile as sf
+
+    # VoiceFixerは44.1kHzモノラルを入力とする
+    if audio.ndim == 2:
+        audio = audio[:, 0] if audio.shape[1] == 1 else audio.mean(axis=1)
+    audio = np.asarray(audio, dtype=np.float32)
+
+    if sr != 44100:
+        import librosa
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=44100)
+
+    restored = vf.restore_inmem(audio, cuda=cuda, mode=int(mode))
+    sf.write(str(output_path), np.squeeze(restored), 44100)
+
+
+def collect_jobs(input_path, output_dir, mode):
+    """入力ファイルまたはフォルダからジョブリストを作成"""
+    input_path = Path(input_path)
+
+    if input_path.is_dir():
+        files = sorted(p for p in input_path.iterdir() if p.suffix.lower() in AUDIO_EXTENSIONS)
+        output_dir = Path(output_dir) if output_dir else input_path / "restored"
+    else:
+        files = [input_path]
+        output_dir = Path(output_dir) if output_dir else input_path.parent
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return [(f, output_dir / f"{f.stem}_restored.wav", mode) for f in files]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="VoiceFixer - バッチ音声復元ツール",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用例:
+  単一ファイル:
+    python run_voicefixer.py input.wav
+
+  フォルダ内の全ファイル（モデル読み込みは1回）:
+    python run_voicefixer.py recordings/ -o restored/ -m 1
+"""
+    )
+    parser.add_argument("input", help="入力音声ファイルまたはフォルダ")
+    parser.add_argument("-o", "--output-dir", help="出力フォルダ (デフォルト: 入力と同じ場所)")
+    parser.add_argument("-m", "--mode", type=int, choices=[0, 1, 2], default=0,
+                       help="復元モード: 0=標準, 1=強力なノイズ除去, 2=最大復元 (デフォルト: 0)")
+    parser.add_argument("--voicefixer-dir", default=str(VOICEFIXER_DIR),
+                       help=f"VoiceFixerのインストール先 (デフォルト: {VOICEFIXER_DIR})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"[エラー] ファイルが見つかりません: {args.input}")
+        sys.exit(1)
+
+    jobs = collect_jobs(args.input, args.output_dir, args.mode)
+    if not jobs:
+        print("[エラー] 音声ファイルが見つかりません")
+        sys.exit(1)
+
+    print(f"入力: {args.input} ({len(jobs)}ファイル)")
+    print(f"モード: {args.mode}")
+    print("")
+
+    vf = setup_voicefixer(args.voicefixer_dir)
+    results = restore_batch(vf, jobs)
+
+    failed = sum(1 for ok, _ in results if not ok)
+    print(f"\n成功: {len(results) - failed} / {len(results)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n[中断] Ctrl+Cで中断されました")
+        sys.exit(0)